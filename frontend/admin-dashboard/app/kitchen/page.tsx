@@ -213,59 +213,80 @@ export default function KitchenPage() {
     }
   };
 
-  // ── Fetch all orders ─────────────────────────────────────────────────────────
-  const fetchOrders = useCallback(async () => {
-    setLoading(true);
-    try {
-      const r = await fetch(`${KITCHEN_URL}/kitchen/all-orders`);
-      if (r.ok) {
-        const fresh: KitchenOrder[] = await r.json();
-        setOrders((prev) => {
-          const existingIds = new Set(prev.map((o) => o.order_id));
-          const incoming = new Set(fresh.map((o) => o.order_id));
-          const brandNew = [...incoming].filter((id) => !existingIds.has(id));
-          if (brandNew.length > 0) {
-            setNewOrderIds((ids) => {
-              const next = new Set(ids);
-              brandNew.forEach((id) => next.add(id));
-              return next;
-            });
-            // Clear highlight after 3s
-            setTimeout(() => {
-              setNewOrderIds((ids) => {
-                const next = new Set(ids);
-                brandNew.forEach((id) => next.delete(id));
-                return next;
-              });
-            }, 3000);
-          }
-          return fresh;
-        });
-        setLastRefresh(new Date().toLocaleTimeString());
-      }
-    } catch {}
-    setLoading(false);
+  // ── Highlight newly arrived orders for 3s ───────────────────────────────────
+  const highlightNew = useCallback((ids: string[]) => {
+    if (ids.length === 0) return;
+    setNewOrderIds((prev) => {
+      const next = new Set(prev);
+      ids.forEach((id) => next.add(id));
+      return next;
+    });
+    setTimeout(() => {
+      setNewOrderIds((prev) => {
+        const next = new Set(prev);
+        ids.forEach((id) => next.delete(id));
+        return next;
+      });
+    }, 3000);
   }, []);
 
   // ── Manually advance / revert an order ───────────────────────────────────
+  // expected_status makes a second click on a stale card a no-op (409)
+  // instead of moving the order another stage. The change comes back
+  // through the live feed; no refetch needed.
   const moveOrder = useCallback(
-    async (orderId: string, direction: "advance" | "revert") => {
+    async (order: KitchenOrder, direction: "advance" | "revert") => {
       try {
-        await fetch(`${KITCHEN_URL}/kitchen/orders/${orderId}/${direction}`, {
-          method: "POST",
-        });
-        await fetchOrders();
+        await fetch(
+          `${KITCHEN_URL}/kitchen/orders/${order.order_id}/${direction}?expected_status=${order.status}`,
+          { method: "POST" },
+        );
       } catch {}
     },
-    [fetchOrders],
+    [],
   );
 
+  // ── Live board feed (SSE): snapshot, then inserts + status changes ─────────
+  // EventSource reconnects by itself and sends Last-Event-ID, so the server
+  // replays only the events missed while disconnected.
   useEffect(() => {
     if (!token) return;
-    fetchOrders();
-    const interval = setInterval(fetchOrders, 5000);
-    return () => clearInterval(interval);
-  }, [token, fetchOrders]);
+    setLoading(true);
+    const es = new EventSource(`${KITCHEN_URL}/kitchen/board/stream`);
+    const touched = () => setLastRefresh(new Date().toLocaleTimeString());
+
+    es.addEventListener("snapshot", (e) => {
+      const { orders: snapshot } = JSON.parse((e as MessageEvent).data) as {
+        orders: KitchenOrder[];
+      };
+      setOrders(snapshot);
+      setLoading(false);
+      touched();
+    });
+    es.addEventListener("order_inserted", (e) => {
+      const order: KitchenOrder = JSON.parse((e as MessageEvent).data);
+      setOrders((prev) => [
+        order,
+        ...prev.filter((o) => o.order_id !== order.order_id),
+      ]);
+      highlightNew([order.order_id]);
+      touched();
+    });
+    es.addEventListener("order_status", (e) => {
+      const change: Pick<KitchenOrder, "order_id" | "status" | "updated_at"> =
+        JSON.parse((e as MessageEvent).data);
+      setOrders((prev) =>
+        prev.map((o) =>
+          o.order_id === change.order_id
+            ? { ...o, status: change.status, updated_at: change.updated_at }
+            : o,
+        ),
+      );
+      touched();
+    });
+    es.onerror = () => setLoading(false);
+    return () => es.close();
+  }, [token, highlightNew]);
 
   const activeOrders = orders.filter(
     (o) => o.status !== "failed" && o.status !== "ready",
@@ -585,12 +606,12 @@ export default function KitchenPage() {
               marginTop: "0.25rem",
             }}
           >
-            Live feed · Auto-refreshes every 5s · 👤 {adminId}
+            Live feed · Updates as orders change · 👤 {adminId}
           </p>
         </div>
         <div style={{ display: "flex", gap: "0.75rem", alignItems: "center" }}>
           <span style={{ fontSize: "0.75rem", color: "var(--text-muted)" }}>
-            Last refresh: {lastRefresh}
+            Last update: {lastRefresh}
           </span>
           <a
             href="/admin"
@@ -737,8 +758,8 @@ export default function KitchenPage() {
                       color={col.color}
                       bg={col.bg}
                       isNew={newOrderIds.has(order.order_id)}
-                      onAdvance={() => moveOrder(order.order_id, "advance")}
-                      onRevert={() => moveOrder(order.order_id, "revert")}
+                      onAdvance={() => moveOrder(order, "advance")}
+                      onRevert={() => moveOrder(order, "revert")}
                     />
                   ))
                 )}
@@ -5,11 +5,11 @@
 # Restarts all services.
 #
 # 🔴 TRANSACTIONAL DATA cleared:
-#   - orders, order_items (kitchen-db)
-#   - stock_deduction_log (stock-db)
-#   - inventory.current_stock reset to initial_stock values
-#   - Redis: idempotency keys, rate limit counters, stock cache, queue messages
-#   - Celery task results in Redis
+#   - orders, order_items, order_dispatch_outbox (kitchen-db)
+#   - stock_deduction_log, stock_reservations, stock_restorations (stock-db)
+#   - inventory.current_stock reset to initial_stock values (version_id keeps counting up)
+#   - Redis: idempotency keys, rate limit counters, stock cache + stock:events stream, queue messages
+#   - Celery task results in Redis, kitchen board feed + order counters (rebuilt by reconcile)
 #
 # 🟢 CONFIG DATA preserved:
 #   - users (identity-db)
@@ -50,7 +50,9 @@ fi
 
 echo ""
 echo "── Step 1: Stopping services (keeping databases and Redis up) ──"
-$DC stop order-gateway stock-service kitchen-queue kitchen-worker notification-hub identity-provider student-ui admin-dashboard
+# The stream worker only runs under --profile stream; remember whether it was up
+STREAM_WORKER_RUNNING=$($DC ps -q kitchen-stream-worker 2>/dev/null || true)
+$DC stop order-gateway stock-service kitchen-queue kitchen-worker kitchen-worker-express kitchen-worker-bulk kitchen-beat kitchen-stream-worker notification-hub identity-provider student-ui admin-dashboard
 
 echo ""
 echo "── Step 2: Clearing Redis transactional keys ──"
@@ -64,8 +66,15 @@ $DC exec -T redis redis-cli ${REDIS_PASSWORD:+-a "$REDIS_PASSWORD"} --no-auth-wa
     for _, k in ipairs(keys) do redis.call('del', k) end
     keys = redis.call('keys', 'celery*')
     for _, k in ipairs(keys) do redis.call('del', k) end
+    for _, q in ipairs({'express', 'standard', 'bulk'}) do
+        redis.call('del', q)
+        keys = redis.call('keys', q .. ':*')
+        for _, k in ipairs(keys) do redis.call('del', k) end
+    end
     keys = redis.call('keys', 'order:*')
     for _, k in ipairs(keys) do redis.call('del', k) end
+    keys = redis.call('keys', 'kitchen:*')
+    for _, k in ipairs(keys) do redis.call('del', k) end
     return 'cleared'
     " 0 || echo "Warning: Could not run Redis cleanup (service may be down)"
 
@@ -76,7 +85,7 @@ echo "── Step 3: Clearing Kitchen DB transactional tables ──"
 $DC exec -T kitchen-db psql \
     -U "${KITCHEN_DB_USER:-kitchen_user}" \
     -d "${KITCHEN_DB_NAME:-kitchen_db}" \
-    -c "TRUNCATE TABLE orders, order_items RESTART IDENTITY CASCADE;" 2>/dev/null || \
+    -c "TRUNCATE TABLE orders, order_items, orders_archive, order_items_archive, order_dispatch_outbox, order_status_history RESTART IDENTITY CASCADE;" 2>/dev/null || \
     echo "   ⚠️  Could not truncate kitchen tables (may not exist yet)"
 echo "   ✅ Kitchen DB transactional tables cleared"
 
@@ -85,22 +94,25 @@ echo "── Step 4: Clearing Stock DB transactional log ──"
 $DC exec -T stock-db psql \
     -U "${STOCK_DB_USER:-stock_user}" \
     -d "${STOCK_DB_NAME:-stock_db}" \
-    -c "TRUNCATE TABLE stock_deduction_log RESTART IDENTITY CASCADE;" 2>/dev/null || \
-    echo "   ⚠️  Could not truncate stock_deduction_log (may not exist yet)"
-echo "   ✅ Stock deduction log cleared"
+    -c "TRUNCATE TABLE stock_deduction_log, stock_reservations, stock_restorations RESTART IDENTITY CASCADE;" 2>/dev/null || \
+    echo "   ⚠️  Could not truncate stock_deduction_log / stock_reservations (may not exist yet)"
+echo "   ✅ Stock deduction log and reservations cleared"
 
 echo ""
 echo "── Step 5: Resetting inventory to initial_stock values ──"
 $DC exec -T stock-db psql \
     -U "${STOCK_DB_USER:-stock_user}" \
     -d "${STOCK_DB_NAME:-stock_db}" \
-    -c "UPDATE inventory SET current_stock = initial_stock, version_id = 1, updated_at = NOW();" 2>/dev/null || \
+    -c "UPDATE inventory SET current_stock = initial_stock, version_id = version_id + 1, updated_at = NOW();" 2>/dev/null || \
     echo "   ⚠️  Could not reset inventory (table may not exist yet)"
 echo "   ✅ Inventory quantities reset to initial_stock"
 
 echo ""
 echo "── Step 6: Restarting all services ──"
 $DC up -d
+if [[ -n "$STREAM_WORKER_RUNNING" ]]; then
+    $DC up -d kitchen-stream-worker
+fi
 
 echo ""
 echo "── Step 7: Waiting for services to be healthy ──"
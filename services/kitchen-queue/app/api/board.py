@@ -0,0 +1,109 @@
+"""
+Kitchen Queue — Live display board feed (SSE)
+
+GET /kitchen/board/stream replaces polling /kitchen/all-orders:
+
+  1. event: snapshot       — the newest ORDER_PAGE_MAX_SIZE orders, sent once
+  2. event: order_inserted — a new order (full board row)
+     event: order_status   — {order_id, status, updated_at}
+
+Events are read from the kitchen:board Redis Stream (app/core/board_events.py)
+and carry the stream entry id as their SSE id. A reconnecting EventSource
+sends it back as Last-Event-ID and gets only what it missed; if that id has
+already been trimmed from the stream (or is unknown) it gets a new snapshot.
+
+The stream position is taken *before* the snapshot is read, so changes that
+land in between are replayed on top of it rather than lost. Replayed events
+are idempotent for a client that upserts by order_id.
+"""
+import json
+import logging
+from typing import AsyncGenerator
+
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from app.api.kitchen import order_page, order_to_dict
+from app.core.board_events import BOARD_STREAM
+from app.core.config import get_settings
+from app.core.redis_client import get_redis
+from app.db.database import AsyncSessionLocal
+from app.models.order import Order
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/kitchen/board", tags=["kitchen"])
+
+
+def _parse_id(entry_id: str) -> tuple[int, int] | None:
+    try:
+        ms, seq = entry_id.split("-")
+        return int(ms), int(seq)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _sse(event: str, data: str, event_id: str) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+async def _resumable(redis, last_event_id: str | None) -> bool:
+    """True if every event after last_event_id is still in the stream."""
+    wanted = _parse_id(last_event_id) if last_event_id else None
+    if wanted is None:
+        return False
+    first = await redis.xrange(BOARD_STREAM, count=1)
+    last = await redis.xrevrange(BOARD_STREAM, count=1)
+    if not first:
+        return False
+    # Trimmed past it, or an id from a stream that has since been reset
+    return _parse_id(first[0][0]) <= wanted <= _parse_id(last[0][0])
+
+
+async def _snapshot() -> str:
+    async with AsyncSessionLocal() as db:
+        orders, _ = await order_page(db, select(Order), settings.ORDER_PAGE_MAX_SIZE)
+        return json.dumps({"orders": [order_to_dict(o, board=True) for o in orders]})
+
+
+async def _board_events(request: Request, last_event_id: str | None) -> AsyncGenerator[str, None]:
+    redis = get_redis()
+    yield f"retry: {settings.SSE_RETRY_MILLISECONDS}\n\n"
+
+    if await _resumable(redis, last_event_id):
+        cursor = last_event_id
+    else:
+        head = await redis.xrevrange(BOARD_STREAM, count=1)
+        cursor = head[0][0] if head else "0-0"
+        yield _sse("snapshot", await _snapshot(), cursor)
+
+    while not await request.is_disconnected():
+        response = await redis.xread(
+            {BOARD_STREAM: cursor}, count=500, block=settings.SSE_KEEPALIVE_INTERVAL_SECONDS * 1000,
+        )
+        if not response:
+            yield ": keepalive\n\n"
+            continue
+        for _stream, entries in response:
+            for entry_id, fields in entries:
+                cursor = entry_id
+                yield _sse(fields.get("event", "message"), fields.get("data", "{}"), entry_id)
+
+
+@router.get("/stream")
+async def stream_board(
+    request: Request,
+    last_event_id: str | None = Query(None, description="Resume after this event id"),
+    last_event_id_header: str | None = Header(None, alias="Last-Event-ID"),
+):
+    """SSE feed of the kitchen display board: snapshot, then inserts and status changes."""
+    return StreamingResponse(
+        _board_events(request, last_event_id_header or last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable Nginx buffering
+            "Connection": "keep-alive",
+        },
+    )
@@ -0,0 +1,123 @@
+"""
+Kitchen Queue — Dead-letter inspection and replay
+
+GET  /kitchen/dead-letters         list / filter failed tasks, newest first
+POST /kitchen/dead-letters/replay  re-send them, spread out at rate_per_second
+
+Replay sends each entry's task again with its original kwargs and a
+countdown of n / rate_per_second, so a bulk replay after an outage reaches
+the workers at a controlled pace instead of all at once. The pipeline is
+resumable (compare-and-set steps), so a replayed order continues from
+wherever it stopped. Entries are skipped if their order no longer exists or
+is already READY / FAILED: a failed order's stock has been given back, so
+it is not cooked again. Only the newest entry per (task, order) is sent.
+"""
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.kitchen import NEXT_CURSOR_HEADER, _set_next_cursor
+from app.core.celery_app import celery_app
+from app.core.config import get_settings
+from app.core.dead_letters import DEAD_LETTER_REPLAYS, get_dead_letters, list_dead_letters
+from app.core.redis_client import get_redis
+from app.db.database import get_db
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/kitchen/dead-letters", tags=["kitchen"])
+
+OPEN_STATUSES = ("PENDING", "STOCK_VERIFIED", "IN_KITCHEN")
+
+
+class ReplayRequest(BaseModel):
+    # Either explicit entry ids, or a filter (newest matching entries first)
+    ids: list[str] | None = Field(None, min_length=1, max_length=settings.KITCHEN_DEAD_LETTER_REPLAY_MAX)
+    task: str | None = None
+    order_id: str | None = None
+    error: str | None = None
+    limit: int = Field(100, ge=1, le=settings.KITCHEN_DEAD_LETTER_REPLAY_MAX)
+    rate_per_second: float = Field(settings.KITCHEN_DEAD_LETTER_REPLAY_RATE, gt=0, le=1000)
+
+
+@router.get("")
+async def list_entries(
+    response: Response,
+    task: str | None = Query(None, description="process_order or finish_order"),
+    order_id: str | None = Query(None),
+    error: str | None = Query(None, description="Case-insensitive substring of the error"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str | None = Query(None, description=f"{NEXT_CURSOR_HEADER} from the previous page"),
+):
+    """Dead-lettered kitchen tasks, newest first (keyset-paginated by entry id)."""
+    entries, next_cursor = await list_dead_letters(get_redis(), limit, cursor, task, order_id, error)
+    _set_next_cursor(response, next_cursor)
+    return entries
+
+
+def _send(entries: list[tuple[str, dict]], rate_per_second: float) -> list[float]:
+    countdowns = []
+    with celery_app.producer_or_acquire() as producer:
+        for n, (_entry_id, fields) in enumerate(entries):
+            countdown = n / rate_per_second
+            celery_app.send_task(
+                fields["task"], kwargs=json.loads(fields["kwargs"]), countdown=countdown, producer=producer,
+            )
+            countdowns.append(round(countdown, 3))
+    return countdowns
+
+
+@router.post("/replay")
+async def replay_entries(payload: ReplayRequest, db: AsyncSession = Depends(get_db)):
+    """Re-send dead-lettered tasks for orders that are still open, spaced out by rate_per_second."""
+    redis = get_redis()
+    if payload.ids:
+        entries = await get_dead_letters(redis, payload.ids)
+    else:
+        listed, _ = await list_dead_letters(redis, payload.limit, None, payload.task, payload.order_id, payload.error)
+        entries = [(e["id"], {**e, "kwargs": json.dumps(e["kwargs"])}) for e in listed]
+
+    order_ids = list({fields["order_id"] for _, fields in entries})
+    statuses = dict((await db.execute(
+        text("SELECT id, status::text FROM orders WHERE id = ANY(:ids)"), {"ids": order_ids},
+    )).fetchall()) if order_ids else {}
+
+    to_send: list[tuple[str, dict]] = []
+    skipped: list[dict] = []
+    seen: set[tuple[str, str]] = set()
+    for entry_id, fields in entries:
+        key = (fields["task"], fields["order_id"])
+        status = statuses.get(fields["order_id"])
+        if key in seen:
+            reason = "duplicate"
+        elif status is None:
+            reason = "order_not_found"
+        elif status not in OPEN_STATUSES:
+            reason = "order_terminal"
+        else:
+            seen.add(key)
+            to_send.append((entry_id, fields))
+            continue
+        skipped.append({"id": entry_id, "order_id": fields["order_id"], "reason": reason,
+                        "status": status.lower() if status else None})
+
+    countdowns = await asyncio.to_thread(_send, to_send, payload.rate_per_second) if to_send else []
+    if to_send:
+        pipe = redis.pipeline(transaction=False)
+        for entry_id, _ in to_send:
+            pipe.hincrby(DEAD_LETTER_REPLAYS, entry_id, 1)
+        await pipe.execute()
+        logger.info("Replaying %d dead-lettered task(s) at %.1f/s", len(to_send), payload.rate_per_second)
+
+    return {
+        "replayed": [
+            {"id": entry_id, "task": fields["task"], "order_id": fields["order_id"], "countdown": countdown}
+            for (entry_id, fields), countdown in zip(to_send, countdowns)
+        ],
+        "skipped": skipped,
+    }
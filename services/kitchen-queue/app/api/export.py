@@ -0,0 +1,60 @@
+"""
+Kitchen Queue — Bulk order export
+
+GET /kitchen/export/orders?start=...&end=...&format=ndjson|csv
+
+Every order created in [start, end), live and archived alike, oldest first,
+with its items, streamed in constant memory (app/core/export.py). Meant for
+the nightly reconciliation; the listings stay the API for the UI.
+
+    {"order_id", "student_id", "status", "special_notes",
+     "created_at", "updated_at", "archived", "items": [{"menu_item_id", "quantity"}]}
+
+In CSV, items is the same list as a JSON string.
+"""
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import JSON, text
+
+from app.core.export import MEDIA_TYPES, ExportFormat, stream_export
+
+router = APIRouter(prefix="/kitchen/export", tags=["kitchen"])
+
+ORDER_EXPORT_COLUMNS = [
+    "order_id", "student_id", "status", "special_notes", "created_at", "updated_at", "archived", "items",
+]
+
+
+def _order_rows(orders: str, items: str, archived: bool) -> str:
+    return (
+        f"SELECT o.id, o.student_id, lower(o.status::text), o.special_notes, o.created_at, o.updated_at, "
+        f"{str(archived).upper()}, "
+        f"  COALESCE((SELECT json_agg(json_build_object('menu_item_id', i.menu_item_id, 'quantity', i.quantity)) "
+        f"            FROM {items} i WHERE i.order_id = o.id), '[]'::json) AS items "
+        f"FROM {orders} o WHERE o.created_at >= :start AND o.created_at < :end"
+    )
+
+
+# Both sides are index range scans on (created_at, id), merged in order
+ORDER_EXPORT_SQL = text(
+    f"{_order_rows('orders', 'order_items', False)} "
+    f"UNION ALL {_order_rows('orders_archive', 'order_items_archive', True)} "
+    "ORDER BY 5, 1"
+).columns(items=JSON)
+
+
+@router.get("/orders")
+async def export_orders(
+    start: datetime = Query(..., description="Created at or after (ISO-8601)"),
+    end: datetime = Query(..., description="Created before (ISO-8601)"),
+    format: ExportFormat = Query("ndjson"),
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start.")
+    return StreamingResponse(
+        stream_export(ORDER_EXPORT_SQL, {"start": start, "end": end}, ORDER_EXPORT_COLUMNS, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
@@ -1,15 +1,28 @@
 """
 Kitchen Queue — FastAPI routes
 """
+import base64
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timezone
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import selectinload
 from pydantic import BaseModel, Field
 
 from app.db.database import get_db
-from app.models.order import Order, OrderItem, OrderStatus
+from app.db.order_ops import transition_orders
+from app.db.status_history import stage_percentiles
+from app.models.order import Order, OrderArchive, OrderItem, OrderStatus, OrderDispatch, OrderStatusHistory
 from app.core.config import get_settings
+from app.core.dispatch_relay import wake_dispatch_relay
+from app.core.board_events import order_inserted, status_changed
+from app.core.capacity import current_snapshot, estimate_order_wait
+from app.core.order_cache import fill_order_cache, get_cached_order
+from app.core.order_events import publish_order_changes
+from app.core.order_stats import CREATED, STATUS_COUNTS_KEY, STATUSES, minute_bucket_keys
+from app.core.redis_client import get_redis
 
 settings = get_settings()
 router = APIRouter(prefix="/kitchen", tags=["kitchen"])
@@ -22,10 +35,106 @@ class QueueRequest(BaseModel):
     special_notes: str | None = None
 
 
+def order_to_dict(order: Order | OrderArchive, board: bool = False) -> dict:
+    """Order + items as returned by the listings; board adds student/updated_at."""
+    out = {
+        "order_id": order.id,
+        "status": order.status,
+        "special_notes": order.special_notes,
+        "created_at": order.created_at.isoformat() if order.created_at else None,
+        "items": [
+            {"menu_item_id": i.menu_item_id, "quantity": i.quantity}
+            for i in order.items
+        ],
+    }
+    if board:
+        out["student_id"] = order.student_id
+        out["updated_at"] = order.updated_at.isoformat() if order.updated_at else None
+    return out
+
+
+# ── Keyset pagination ─────────────────────────────────────────────────────────
+# Listings are ordered by (created_at DESC, id DESC). The cursor is the
+# (created_at, id) of the last order on a page, and the next page starts
+# strictly after it, so the query is an index range scan however deep the
+# client pages. The next cursor comes back in the X-Next-Cursor header (the
+# body stays a plain list); no header means there are no more pages.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_cursor(order: Order | OrderArchive) -> str:
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), order_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+async def _fetch_page(db: AsyncSession, query: Select, limit: int, cursor: str | None, model=Order) -> list:
+    """Up to limit + 1 rows of query in page order, items eager-loaded."""
+    query = (
+        query.options(selectinload(model.items))
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(*_decode_cursor(cursor)))
+    return list((await db.execute(query)).scalars().all())
+
+
+def _trim_page(orders: list, limit: int) -> tuple[list, str | None]:
+    if len(orders) > limit:
+        orders = orders[:limit]
+        return orders, _encode_cursor(orders[-1])
+    return orders, None
+
+
+async def order_page(
+    db: AsyncSession, query: Select, limit: int, cursor: str | None = None,
+) -> tuple[list[Order], str | None]:
+    """One page of query (items eager-loaded) and the cursor of the next page, if any."""
+    return _trim_page(await _fetch_page(db, query, limit, cursor), limit)
+
+
+async def student_order_page(
+    db: AsyncSession, student_id: str, limit: int, cursor: str | None = None,
+) -> tuple[list[Order | OrderArchive], str | None]:
+    """
+    A page of a student's history across the hot and archive tables. Both
+    are read with the same keyset and merged, so the cursor works unchanged
+    whichever table the orders on a page came from. The hot table is read
+    first: an order archived in between shows up in both reads and is
+    de-duplicated, never missed.
+    """
+    hot = await _fetch_page(db, select(Order).where(Order.student_id == student_id), limit, cursor)
+    cold = await _fetch_page(
+        db, select(OrderArchive).where(OrderArchive.student_id == student_id), limit, cursor, OrderArchive,
+    )
+    seen = {o.id for o in hot}
+    merged = sorted(
+        hot + [o for o in cold if o.id not in seen],
+        key=lambda o: (o.created_at, o.id), reverse=True,
+    )
+    return _trim_page(merged, limit)
+
+
+def _set_next_cursor(response: Response, next_cursor: str | None):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
 @router.post("/queue", status_code=202)
 async def queue_order(payload: QueueRequest, db: AsyncSession = Depends(get_db)):
     """
-    Persist order and dispatch Celery task.
+    Persist order and schedule the Celery task.
+    The order and its outbox row are committed together; the dispatch relay
+    publishes process_order afterwards, so the request never waits on the
+    broker and an order can't be saved without eventually being dispatched.
     Returns acknowledgment immediately (<2s), kitchen processes asynchronously.
     """
     order = Order(
@@ -43,144 +152,236 @@ async def queue_order(payload: QueueRequest, db: AsyncSession = Depends(get_db))
             quantity=item["quantity"],
         ))
 
+    db.add(OrderDispatch(
+        order_id=payload.order_id,
+        payload={
+            "student_id": payload.student_id,
+            "items": payload.items,
+            "special_notes": payload.special_notes,
+        },
+    ))
+
     await db.commit()
 
+    # Board clients must learn of the order before a worker can publish its
+    # first status change, so the relay is only woken after order_inserted
+    now = datetime.now(timezone.utc).isoformat()
+    await publish_order_changes([order_inserted({
+        "order_id": payload.order_id,
+        "student_id": payload.student_id,
+        "status": OrderStatus.PENDING,
+        "special_notes": payload.special_notes,
+        "created_at": now,
+        "updated_at": now,
+        "items": [{"menu_item_id": i["menu_item_id"], "quantity": i["quantity"]} for i in payload.items],
+    })], [(None, OrderStatus.PENDING)])
+    wake_dispatch_relay()
+
     return {
         "order_id": payload.order_id,
         "status": OrderStatus.PENDING,
         "message": "Order queued for kitchen processing.",
+        "estimated_wait_seconds": await estimate_order_wait(payload.items),
     }
 
 
 @router.get("/orders")
 async def list_orders(
+    response: Response,
     student_id: str = Query(..., description="Filter orders by student ID"),
+    limit: int = Query(settings.ORDER_PAGE_SIZE, ge=1, le=settings.ORDER_PAGE_MAX_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all orders for a student, newest first, with their items."""
-    result = await db.execute(
-        select(Order)
-        .where(Order.student_id == student_id)
-        .order_by(Order.created_at.desc())
-    )
-    orders = result.scalars().all()
+    """
+    List a student's orders, newest first, with their items (keyset-paginated).
+    Includes archived orders.
+    """
+    orders, next_cursor = await student_order_page(db, student_id, limit, cursor)
+    _set_next_cursor(response, next_cursor)
+    return [order_to_dict(order) for order in orders]
 
-    out = []
-    for order in orders:
-        items_result = await db.execute(
-            select(OrderItem).where(OrderItem.order_id == order.id)
-        )
-        items = items_result.scalars().all()
-        out.append({
-            "order_id": order.id,
-            "status": order.status,
-            "special_notes": order.special_notes,
-            "created_at": order.created_at.isoformat() if order.created_at else None,
-            "items": [
-                {"menu_item_id": i.menu_item_id, "quantity": i.quantity}
-                for i in items
-            ],
-        })
 
+@router.get("/orders/{order_id}")
+async def get_order(order_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Get order status (falls back to the archive for old finished orders).
+    Read through the Redis order cache (app/core/order_cache.py).
+    No wait estimate: the snapshot's is a new order's, not this one's
+    remaining time (POST /kitchen/queue returns the order's own).
+    """
+    redis = get_redis()
+    out = await get_cached_order(redis, order_id)
+    if out is None:
+        result = await db.execute(select(Order).where(Order.id == order_id))
+        order = result.scalar_one_or_none()
+        if not order:
+            result = await db.execute(select(OrderArchive).where(OrderArchive.id == order_id))
+            order = result.scalar_one_or_none()
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found.")
+        out = {"order_id": order.id, "status": order.status.value, "student_id": order.student_id}
+        await fill_order_cache(redis, order.id, order.status.value, order.student_id)
     return out
 
 
-@router.get("/orders/{order_id}")
-async def get_order(order_id: str, db: AsyncSession = Depends(get_db)):
-    """Get order status."""
-    result = await db.execute(select(Order).where(Order.id == order_id))
-    order = result.scalar_one_or_none()
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found.")
-    return {"order_id": order.id, "status": order.status, "student_id": order.student_id}
+@router.get("/orders/{order_id}/history")
+async def get_order_history(order_id: str, db: AsyncSession = Depends(get_db)):
+    """Every status transition of the order, oldest first, with the time spent in the status it left."""
+    rows = (await db.execute(
+        select(OrderStatusHistory)
+        .where(OrderStatusHistory.order_id == order_id)
+        .order_by(OrderStatusHistory.changed_at, OrderStatusHistory.id)
+    )).scalars().all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="No status history for this order.")
+    return [
+        {
+            "from_status": h.from_status.lower(),
+            "to_status": h.to_status.lower(),
+            "entered_at": h.entered_at.isoformat() if h.entered_at else None,
+            "changed_at": h.changed_at.isoformat(),
+            "seconds_in_state": h.seconds_in_state,
+        }
+        for h in rows
+    ]
+
+
+@router.get("/eta")
+async def kitchen_eta():
+    """
+    Current wait-time estimate from the capacity model: seconds until a new
+    order would be ready, and each station's backlog. Served from the
+    in-process snapshot (refreshed every KITCHEN_ETA_REFRESH_SECONDS).
+    """
+    return await current_snapshot()
 
 
 @router.get("/all-orders")
 async def list_all_orders(
+    response: Response,
     status: str | None = Query(None, description="Filter by status (pending, in_kitchen, ready, failed, stock_verified)"),
+    limit: int = Query(settings.ORDER_PAGE_SIZE, ge=1, le=settings.ORDER_PAGE_MAX_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Kitchen display board — all orders, newest first, with items.
+    Kitchen display board — orders newest first, with items, one page at a time.
     Optional ?status= filter. No student_id filter.
     """
-    query = select(Order).order_by(Order.created_at.desc())
+    query = select(Order)
     if status:
         query = query.where(Order.status == status)
+    orders, next_cursor = await order_page(db, query, limit, cursor)
+    _set_next_cursor(response, next_cursor)
+    return [order_to_dict(order, board=True) for order in orders]
+
+
+@router.get("/stats")
+async def order_stats():
+    """
+    Orders per status and per-minute transition counts for the last
+    KITCHEN_STATS_WINDOW_MINUTES, from the Redis counters (no DB scan).
+    "created" in a bucket is the number of orders created that minute; the
+    statuses count transitions into them ("pending": reverts).
+    """
+    buckets = minute_bucket_keys(settings.KITCHEN_STATS_WINDOW_MINUTES)
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hgetall(STATUS_COUNTS_KEY)
+    for _, key in buckets:
+        pipe.hgetall(key)
+    counts, *per_minute = await pipe.execute()
+
+    minutes = [
+        {"minute": start.isoformat(), **{s: int(bucket.get(s, 0)) for s in [CREATED, *STATUSES]}}
+        for (start, _), bucket in zip(buckets, per_minute)
+    ]
+    complete = minutes[:-1][-5:]  # the current minute is still filling up
+    return {
+        "status_counts": {s: int(counts.get(s, 0)) for s in STATUSES},
+        "orders_per_minute": (
+            sum(m[CREATED] for m in complete) / len(complete) if complete else 0.0
+        ),
+        "per_minute": minutes,
+    }
+
+
+@router.get("/stats/stages")
+async def stage_stats(
+    window_minutes: int = Query(60, ge=1, le=7 * 24 * 60),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Time spent in each kitchen stage (pending, stock_verified, in_kitchen)
+    by orders that moved on to the next one within the last window_minutes:
+    count and p50 / p95 / p99 seconds, from order_status_history.
+    """
+    return {"window_minutes": window_minutes, "stages": await stage_percentiles(db, window_minutes)}
+
 
-    result = await db.execute(query)
-    orders = result.scalars().all()
+# ── Manual status transitions (kitchen staff) ─────────────────────────────────
+class BulkTransitionRequest(BaseModel):
+    order_ids: list[str] = Field(..., min_length=1, max_length=settings.KITCHEN_BULK_MAX_ORDERS)
+    expected_status: str | None = None
 
-    out = []
-    for order in orders:
-        items_result = await db.execute(
-            select(OrderItem).where(OrderItem.order_id == order.id)
+
+async def _transition(
+    db: AsyncSession, order_ids: list[str], direction: str, expected_status: str | None,
+) -> list[dict]:
+    results = await transition_orders(db, order_ids, direction, expected_status)
+    moved = [r for r in results if r["ok"]]
+    if moved:
+        await publish_order_changes(
+            [status_changed(r["order_id"], r["status"], r["seq"]) for r in moved],
+            [(r["previous_status"], r["status"]) for r in moved],
         )
-        items = items_result.scalars().all()
-        out.append({
-            "order_id": order.id,
-            "student_id": order.student_id,
-            "status": order.status,
-            "special_notes": order.special_notes,
-            "created_at": order.created_at.isoformat() if order.created_at else None,
-            "updated_at": order.updated_at.isoformat() if order.updated_at else None,
-            "items": [
-                {"menu_item_id": i.menu_item_id, "quantity": i.quantity}
-                for i in items
-            ],
-        })
+    return results
 
-    return out
+
+async def _transition_one(db: AsyncSession, order_id: str, direction: str, expected_status: str | None) -> dict:
+    [result] = await _transition(db, [order_id], direction, expected_status)
+    if result["ok"]:
+        return {"order_id": order_id, "status": result["status"]}
+    if result["error"] == "not_found":
+        raise HTTPException(status_code=404, detail="Order not found.")
+    if result["error"] == "status_mismatch":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Order is '{result['status']}', not '{expected_status.lower()}'; it was changed concurrently.",
+        )
+    raise HTTPException(status_code=400, detail=f"Cannot {direction} order from status '{result['status'].upper()}'.")
 
 
-# ── Manual status transition maps ─────────────────────────────────────────────
-NEXT_STATUS: dict[str, str] = {
-    "PENDING":        "STOCK_VERIFIED",
-    "STOCK_VERIFIED": "IN_KITCHEN",
-    "IN_KITCHEN":     "READY",
-}
-PREV_STATUS: dict[str, str] = {
-    "READY":          "IN_KITCHEN",
-    "IN_KITCHEN":     "STOCK_VERIFIED",
-    "STOCK_VERIFIED": "PENDING",
-}
+@router.post("/orders/bulk/{direction}", status_code=200)
+async def bulk_transition_orders(
+    direction: Literal["advance", "revert"],
+    payload: BulkTransitionRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Advance or revert many orders in one statement. Never fails as a whole:
+    each order gets its own result (ok, or not_found / status_mismatch /
+    invalid_transition).
+    """
+    results = await _transition(db, payload.order_ids, direction, payload.expected_status)
+    return {"results": results, "moved": sum(r["ok"] for r in results)}
 
 
 @router.post("/orders/{order_id}/advance", status_code=200)
-async def advance_order(order_id: str, db: AsyncSession = Depends(get_db)):
+async def advance_order(
+    order_id: str,
+    expected_status: str | None = Query(None, description="Only advance if the order is still in this status"),
+    db: AsyncSession = Depends(get_db),
+):
     """Manually advance an order to the next stage (kitchen staff action)."""
-    row = (await db.execute(
-        text("SELECT status::text FROM orders WHERE id = :id"), {"id": order_id}
-    )).fetchone()
-    if not row:
-        raise HTTPException(status_code=404, detail="Order not found.")
-    current = row[0]
-    next_s = NEXT_STATUS.get(current)
-    if not next_s:
-        raise HTTPException(status_code=400, detail=f"Cannot advance order from status '{current}'.")
-    await db.execute(
-        text("UPDATE orders SET status = CAST(:s AS order_status), updated_at = NOW() WHERE id = :id"),
-        {"s": next_s, "id": order_id},
-    )
-    await db.commit()
-    return {"order_id": order_id, "status": next_s.lower()}
+    return await _transition_one(db, order_id, "advance", expected_status)
 
 
 @router.post("/orders/{order_id}/revert", status_code=200)
-async def revert_order(order_id: str, db: AsyncSession = Depends(get_db)):
+async def revert_order(
+    order_id: str,
+    expected_status: str | None = Query(None, description="Only revert if the order is still in this status"),
+    db: AsyncSession = Depends(get_db),
+):
     """Manually revert an order to the previous stage (error correction)."""
-    row = (await db.execute(
-        text("SELECT status::text FROM orders WHERE id = :id"), {"id": order_id}
-    )).fetchone()
-    if not row:
-        raise HTTPException(status_code=404, detail="Order not found.")
-    current = row[0]
-    prev_s = PREV_STATUS.get(current)
-    if not prev_s:
-        raise HTTPException(status_code=400, detail=f"Cannot revert order from status '{current}'.")
-    await db.execute(
-        text("UPDATE orders SET status = CAST(:s AS order_status), updated_at = NOW() WHERE id = :id"),
-        {"s": prev_s, "id": order_id},
-    )
-    await db.commit()
-    return {"order_id": order_id, "status": prev_s.lower()}
+    return await _transition_one(db, order_id, "revert", expected_status)
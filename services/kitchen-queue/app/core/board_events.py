@@ -0,0 +1,47 @@
+"""
+Kitchen Queue — Display board change feed (Redis Stream kitchen:board)
+
+Every order insert (POST /kitchen/queue) and status change (worker
+transitions, manual advance/revert) is appended to the stream after its DB
+commit (published through app/core/order_events.py):
+
+    event=order_inserted  data={full board order}
+    event=order_status    data={"order_id", "status", "updated_at"}
+
+The stream entry id (e.g. "1718000000000-0") is the event's sequence number:
+it only ever increases, and GET /kitchen/board/stream uses it as the SSE id
+so a reconnecting dashboard resumes from Last-Event-ID. Publishing is
+best-effort; a lost event is repaired by the snapshot the next reconnect
+falls back to once its id has been trimmed.
+"""
+import json
+from datetime import datetime, timezone
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+BOARD_STREAM = "kitchen:board"
+
+
+def order_inserted(order: dict) -> tuple[str, dict]:
+    return "order_inserted", order
+
+
+def status_changed(order_id: str, status: str, seq: int) -> tuple[str, dict]:
+    """seq: the transition's order_status_history id (app/db/status_history.py)."""
+    return "order_status", {
+        "order_id": order_id,
+        "status": status.lower(),
+        "seq": seq,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def stage_board_events(pipe, events: list[tuple[str, dict]]):
+    """Queue XADDs on a (sync or async) pipeline; the caller executes it."""
+    for event, data in events:
+        pipe.xadd(
+            BOARD_STREAM, {"event": event, "data": json.dumps(data)},
+            maxlen=settings.KITCHEN_BOARD_STREAM_MAXLEN, approximate=True,
+        )
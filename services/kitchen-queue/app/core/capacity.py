@@ -0,0 +1,154 @@
+"""
+Kitchen Queue — Capacity model and wait-time estimates
+
+The kitchen is a set of stations, each cooking KITCHEN_STATIONS[name]
+items in parallel. Every menu item is cooked at one station
+(KITCHEN_ITEM_STATIONS, default: the first station) and takes
+KITCHEN_ITEM_PREP_SECONDS[item] per unit (default:
+KITCHEN_DEFAULT_ITEM_PREP_SECONDS).
+
+A station's backlog is the prep work of every unit not yet ready: all of
+it for PENDING / STOCK_VERIFIED orders, what is left of it for IN_KITCHEN
+ones. Its wait is backlog / slots. A new order is ready once each of its
+stations has worked off the wait ahead of it plus the order's own items.
+
+Every API worker refreshes a snapshot of the model every
+KITCHEN_ETA_REFRESH_SECONDS (one grouped query); GET /kitchen/eta and the
+queue response read that snapshot and never hit the DB.
+"""
+import asyncio
+import logging
+import math
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.db.database import AsyncSessionLocal
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Outstanding units per (menu item, status); elapsed is Σ quantity × seconds in that status
+BACKLOG_SQL = text(
+    "SELECT oi.menu_item_id, o.status::text, SUM(oi.quantity), "
+    "       COALESCE(SUM(oi.quantity * EXTRACT(EPOCH FROM NOW() - o.updated_at)), 0) "
+    "FROM orders o JOIN order_items oi ON oi.order_id = o.id "
+    "WHERE o.status IN ('PENDING', 'STOCK_VERIFIED', 'IN_KITCHEN') "
+    "GROUP BY oi.menu_item_id, o.status"
+)
+
+
+class CapacityModel:
+    def __init__(
+        self,
+        stations: dict[str, int],
+        item_stations: dict[str, str],
+        item_prep_seconds: dict[str, float],
+        default_prep_seconds: float,
+    ):
+        if not stations:
+            raise ValueError("KITCHEN_STATIONS must define at least one station")
+        self.stations = {name: max(1, slots) for name, slots in stations.items()}
+        self.default_station = next(iter(self.stations))
+        self.item_stations = item_stations
+        self.item_prep_seconds = item_prep_seconds
+        self.default_prep_seconds = default_prep_seconds
+
+    def station_for(self, menu_item_id: str) -> str:
+        station = self.item_stations.get(menu_item_id, self.default_station)
+        return station if station in self.stations else self.default_station
+
+    def prep_seconds(self, menu_item_id: str) -> float:
+        return self.item_prep_seconds.get(menu_item_id, self.default_prep_seconds)
+
+    def station_waits(self, backlog: dict[str, float]) -> dict[str, float]:
+        """Seconds until each station is free, given its backlog in seconds of work."""
+        return {name: backlog.get(name, 0.0) / slots for name, slots in self.stations.items()}
+
+    def order_eta(self, waits: dict[str, float], items: list[dict]) -> float:
+        """Seconds until an order with these items, queued now, would be ready."""
+        work: dict[str, float] = {}
+        longest: dict[str, float] = {}
+        for item in items:
+            station = self.station_for(item["menu_item_id"])
+            prep = self.prep_seconds(item["menu_item_id"])
+            work[station] = work.get(station, 0.0) + prep * item["quantity"]
+            longest[station] = max(longest.get(station, 0.0), prep)
+        if not work:
+            return max(waits.values(), default=0.0) + self.default_prep_seconds
+        return max(
+            waits.get(station, 0.0) + max(longest[station], work[station] / self.stations[station])
+            for station in work
+        )
+
+
+capacity_model = CapacityModel(
+    settings.KITCHEN_STATIONS,
+    settings.KITCHEN_ITEM_STATIONS,
+    settings.KITCHEN_ITEM_PREP_SECONDS,
+    settings.KITCHEN_DEFAULT_ITEM_PREP_SECONDS,
+)
+
+_snapshot: dict | None = None
+
+
+async def compute_snapshot(model: CapacityModel = capacity_model) -> dict:
+    """Read the kitchen backlog and turn it into per-station waits."""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(BACKLOG_SQL)).fetchall()
+
+    backlog: dict[str, float] = {}
+    for menu_item_id, status, quantity, elapsed in rows:
+        work = model.prep_seconds(menu_item_id) * int(quantity)
+        if status == "IN_KITCHEN":
+            work = max(0.0, work - float(elapsed))
+        station = model.station_for(menu_item_id)
+        backlog[station] = backlog.get(station, 0.0) + work
+
+    waits = model.station_waits(backlog)
+    return {
+        "estimated_wait_seconds": math.ceil(model.order_eta(waits, [])),
+        "stations": {
+            name: {
+                "slots": slots,
+                "backlog_seconds": round(backlog.get(name, 0.0), 1),
+                "wait_seconds": round(waits[name], 1),
+            }
+            for name, slots in model.stations.items()
+        },
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def current_snapshot() -> dict:
+    """Latest snapshot; computed on the spot only before the first refresh."""
+    global _snapshot
+    if _snapshot is None:
+        _snapshot = await compute_snapshot()
+    return _snapshot
+
+
+async def estimate_order_wait(items: list[dict]) -> int | None:
+    """ETA in seconds for a new order with these items, or None if unknown."""
+    try:
+        snapshot = await current_snapshot()
+    except Exception as exc:
+        logger.warning("No capacity snapshot for ETA: %s", exc)
+        return None
+    waits = {name: s["wait_seconds"] for name, s in snapshot["stations"].items()}
+    return math.ceil(capacity_model.order_eta(waits, items))
+
+
+async def run_capacity_refresh(stop: asyncio.Event):
+    """Refresh the snapshot every KITCHEN_ETA_REFRESH_SECONDS until stop is set."""
+    global _snapshot
+    while not stop.is_set():
+        try:
+            _snapshot = await compute_snapshot()
+        except Exception:
+            logger.exception("Capacity snapshot refresh failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.KITCHEN_ETA_REFRESH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
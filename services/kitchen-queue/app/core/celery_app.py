@@ -1,29 +1,121 @@
 """
 Kitchen Queue — Celery application
 
-Uses Redis as both broker and result backend.
-Workers run in separate containers (kitchen-worker).
+Uses Redis as the broker. Workers run in separate containers
+(kitchen-worker); periodic jobs are scheduled by celery beat (kitchen-beat).
+
+Every kitchen task is fire-and-forget and nothing reads task state, so
+there is no result backend: no per-task result or STARTED keys are written.
+Task outcomes and timings go to the worker's Prometheus exporter instead
+(app/core/worker_metrics.py).
+
+Orders are routed by size so quick snacks never queue behind a 10-item
+order: process_order goes to "express", "standard" or "bulk" according to
+its estimated prep work, and each queue has its own worker pool
+(kitchen-worker-express / kitchen-worker / kitchen-worker-bulk), so big
+orders are never starved either. Within a queue, smaller orders carry a
+higher priority (Redis priority sub-queues, 0 runs first).
 """
+import time
+
 from celery import Celery
+from celery.signals import before_task_publish
+from kombu import Exchange, Queue
 from app.core.config import get_settings
 
 settings = get_settings()
 
+EXPRESS_QUEUE = "express"
+STANDARD_QUEUE = "standard"
+BULK_QUEUE = "bulk"
+ORDER_QUEUES = (EXPRESS_QUEUE, STANDARD_QUEUE, BULK_QUEUE)
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+PUBLISHED_AT_HEADER = "published_at"  # queue wait metric (app/core/queue_metrics.py)
+
+
+def order_prep_work(items: list[dict]) -> float:
+    """Estimated prep seconds for an order (same per-item times as app/core/capacity.py)."""
+    return sum(
+        settings.KITCHEN_ITEM_PREP_SECONDS.get(i["menu_item_id"], settings.KITCHEN_DEFAULT_ITEM_PREP_SECONDS)
+        * i["quantity"]
+        for i in items
+    )
+
+
+def order_route(items: list[dict]) -> dict:
+    """Queue and priority for an order's process_order task."""
+    work = order_prep_work(items)
+    if work <= settings.KITCHEN_EXPRESS_MAX_PREP_SECONDS:
+        queue = EXPRESS_QUEUE
+    elif work >= settings.KITCHEN_BULK_MIN_PREP_SECONDS:
+        queue = BULK_QUEUE
+    else:
+        queue = STANDARD_QUEUE
+    # Prep work in default-item units: shorter jobs first within the queue
+    priority = min(PRIORITY_STEPS[-1], int(work // settings.KITCHEN_DEFAULT_ITEM_PREP_SECONDS))
+    return {"queue": queue, "priority": priority}
+
+
+def route_kitchen_task(name, args, kwargs, options, task=None, **kw):
+    if name == "process_order":
+        return order_route(kwargs.get("items") or [])
+    if name in ("finish_order", "start_cooking_batch", "finish_cooking_batch"):
+        # Short conditional UPDATEs that are already due: never behind cooking
+        return {"queue": EXPRESS_QUEUE, "priority": 0}
+    return None  # periodic jobs → task_default_queue
+
+
 celery_app = Celery(
     "kitchen_queue",
     broker=settings.celery_broker_url,
-    backend=settings.celery_result_backend,
     include=["app.tasks.kitchen_tasks"],
 )
 
 celery_app.conf.update(
     task_serializer="json",
-    result_serializer="json",
     accept_content=["json"],
     timezone="UTC",
     enable_utc=True,
     task_acks_late=True,           # Only ack after task completes (fault-tolerant)
     task_reject_on_worker_lost=True,
     worker_prefetch_multiplier=1,  # One task at a time per worker
-    task_track_started=True,
+    broker_transport_options={
+        # finish_order is scheduled with a countdown: the worker holds it
+        # unacked until it is due, which must stay well under the visibility timeout
+        "visibility_timeout": 3600,
+        "queue_order_strategy": "priority",
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_SEP,
+    },
+    task_ignore_result=True,
+    task_queues=[Queue(name, Exchange(name), routing_key=name) for name in ORDER_QUEUES],
+    task_default_queue=STANDARD_QUEUE,
+    task_routes=(route_kitchen_task,),
 )
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **_):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+celery_app.conf.beat_schedule = {
+    "restore-failed-order-stock": {
+        "task": "restore_failed_order_stock",
+        "schedule": settings.STOCK_RESTORE_INTERVAL_SECONDS,
+    },
+    "reconcile-order-stats": {
+        "task": "reconcile_order_stats",
+        "schedule": settings.KITCHEN_STATS_RECONCILE_INTERVAL_SECONDS,
+    },
+    "sweep-stuck-orders": {
+        "task": "sweep_stuck_orders",
+        "schedule": settings.KITCHEN_STUCK_SWEEP_INTERVAL_SECONDS,
+    },
+    "archive-terminal-orders": {
+        "task": "archive_terminal_orders",
+        "schedule": settings.KITCHEN_ARCHIVE_INTERVAL_SECONDS,
+    },
+}
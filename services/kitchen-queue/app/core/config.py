@@ -3,6 +3,7 @@ Kitchen Queue — Configuration
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -52,20 +53,100 @@ class Settings(BaseSettings):
     def celery_broker_url(self) -> str:
         return self.redis_url
 
-    @property
-    def celery_result_backend(self) -> str:
-        return self.redis_url
-
     # ── Kitchen Timing ──────────────────────────────────────
     KITCHEN_MIN_PREP_SECONDS: int = 3
     KITCHEN_MAX_PREP_SECONDS: int = 7
 
     # ── Downstream Services ────────────────────────────────────
     NOTIFICATION_HUB_URL: str = "http://notification-hub:8005"
+    # Workers publish status updates straight to the hub's Redis channels;
+    # POST /notifications/publish is only used when that fails
+    NOTIFY_VIA_REDIS: bool = True
     STOCK_SERVICE_URL: str = "http://stock-service:8003"
 
+    # ── Order listings (keyset pagination) ────────────────────
+    ORDER_PAGE_SIZE: int = 200       # default page for /kitchen/orders and /kitchen/all-orders
+    ORDER_PAGE_MAX_SIZE: int = 499   # + 1 look-ahead row = 500, selectinload's IN chunk: items in one query
+
+    # ── Order lookup cache (app/core/order_cache.py) ──────────
+    KITCHEN_ORDER_CACHE_ENABLED: bool = True
+    KITCHEN_ORDER_CACHE_TTL_SECONDS: int = 30            # active orders; bounds a lost update
+    KITCHEN_ORDER_CACHE_TERMINAL_TTL_SECONDS: int = 300  # once READY / FAILED
+
+    # ── Bulk exports (app/api/export.py) ──────────────────────
+    EXPORT_FETCH_SIZE: int = 1000    # rows per server-side cursor fetch / streamed chunk
+
+    # ── Display board live feed (SSE) ──────────────────────────
+    KITCHEN_BOARD_STREAM_MAXLEN: int = 10000      # events kept for Last-Event-ID resume
+    SSE_KEEPALIVE_INTERVAL_SECONDS: int = 15
+    SSE_RETRY_MILLISECONDS: int = 3000
+
+    # ── Manual transitions ─────────────────────────────────────
+    KITCHEN_BULK_MAX_ORDERS: int = 500   # order ids per /kitchen/orders/bulk/{direction}
+
+    # ── Order counters / throughput stats ─────────────────────
+    KITCHEN_STATS_WINDOW_MINUTES: int = 60              # per-minute buckets returned by /kitchen/stats
+    KITCHEN_STATS_BUCKET_TTL_SECONDS: int = 86400
+    KITCHEN_STATS_RECONCILE_INTERVAL_SECONDS: float = 60.0
+
+    # ── Capacity model / wait-time estimates (app/core/capacity.py) ──
+    KITCHEN_STATIONS: dict[str, int] = {"line": 8}            # station → items cooked in parallel
+    KITCHEN_ITEM_STATIONS: dict[str, str] = {}                # menu_item_id → station (default: first)
+    KITCHEN_ITEM_PREP_SECONDS: dict[str, float] = {}          # menu_item_id → prep seconds per unit
+    KITCHEN_DEFAULT_ITEM_PREP_SECONDS: float = 5.0
+    KITCHEN_ETA_REFRESH_SECONDS: float = 2.0
+
+    # ── Order queues (routing by estimated prep work) ─────────
+    KITCHEN_EXPRESS_MAX_PREP_SECONDS: float = 10.0   # up to this → express queue
+    KITCHEN_BULK_MIN_PREP_SECONDS: float = 30.0      # from this → bulk queue
+
+    # ── Cooking batches (app/core/cooking_batches.py) ─────────
+    KITCHEN_BATCHING_ENABLED: bool = False
+    KITCHEN_BATCH_MAX_UNITS: int = 12                # a batch starts cooking once it holds this many
+    KITCHEN_BATCH_MAX_WAIT_SECONDS: float = 3.0      # ... or this long after it opened
+
+    # ── Worker status writes ──────────────────────────────────
+    STATUS_WRITE_FLUSH_INTERVAL_MS: float = 5.0     # gather transitions this long per UPDATE
+    STATUS_WRITE_MAX_BATCH: int = 500
+
+    # ── Dead letters / stuck orders ───────────────────────────
+    KITCHEN_DEAD_LETTER_MAXLEN: int = 100_000
+    KITCHEN_DEAD_LETTER_REPLAY_MAX: int = 1000       # entries per replay call
+    KITCHEN_DEAD_LETTER_REPLAY_RATE: float = 20.0    # default tasks/second a replay is spread at
+    KITCHEN_STUCK_ORDER_AFTER_SECONDS: int = 300     # unchanged this long in a non-terminal state
+    KITCHEN_STUCK_SWEEP_INTERVAL_SECONDS: float = 60.0
+    KITCHEN_STUCK_SWEEP_BATCH_SIZE: int = 200
+    KITCHEN_STUCK_MAX_DISPATCHES: int = 5
+
+    # ── Hot/cold split (terminal order archive) ────────────────
+    KITCHEN_ARCHIVE_AFTER_HOURS: int = 24           # READY/FAILED orders older than this leave the hot tables
+    KITCHEN_ARCHIVE_INTERVAL_SECONDS: float = 300.0
+    KITCHEN_ARCHIVE_BATCH_SIZE: int = 1000
+    KITCHEN_ARCHIVE_MAX_BATCHES_PER_RUN: int = 50
+    KITCHEN_STATUS_HISTORY_RETENTION_DAYS: int = 30  # order_status_history rows kept (purged with the archive run)
+
+    # ── Dispatch outbox (orders → Celery) ──────────────────────
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 1.0   # idle poll; new orders wake the relay immediately
+    OUTBOX_RELAY_BATCH_SIZE: int = 200
+    OUTBOX_RETENTION_HOURS: int = 24             # dispatched rows are purged after this
+    OUTBOX_PURGE_INTERVAL_SECONDS: float = 300.0
+    KITCHEN_DISPATCH_BACKEND: Literal["celery", "stream"] = "celery"   # "stream": app/tasks/stream_worker.py
+
+    # ── Asyncio stream worker (KITCHEN_DISPATCH_BACKEND=stream) ─
+    KITCHEN_ORDER_STREAM_MAXLEN: int = 100_000
+    KITCHEN_STREAM_CONCURRENCY: int = 2000          # order pipelines in flight per worker
+    KITCHEN_STREAM_READ_COUNT: int = 200            # entries per XREADGROUP
+    KITCHEN_STREAM_CLAIM_IDLE_SECONDS: float = 120.0  # claim entries a dead consumer left this long
+    KITCHEN_STREAM_CLAIM_INTERVAL_SECONDS: float = 30.0
+    KITCHEN_STREAM_DRAIN_SECONDS: float = 30.0      # wait this long for in-flight orders on shutdown
+
+    # ── Stock Compensation (failed orders) ─────────────────────
+    STOCK_RESTORE_INTERVAL_SECONDS: float = 5.0   # beat schedule for the batch flush
+    STOCK_RESTORE_BATCH_SIZE: int = 200
+
     # ── Observability ─────────────────────────────────────────
     METRICS_ENABLED: bool = True
+    WORKER_METRICS_PORT: int = 9808               # Celery worker's Prometheus exporter
     HEALTH_CHECK_TIMEOUT: float = 5.0
 
 
@@ -0,0 +1,196 @@
+"""
+Kitchen Queue — Cooking batches across orders (KITCHEN_BATCHING_ENABLED)
+
+The kitchen cooks the same item for many orders at once. With batching on,
+an order that has passed STOCK_VERIFIED joins one forming batch per
+distinct menu item instead of going to the stove alone:
+
+  join   — add the order's units to the item's open batch (opening one if
+           needed). A batch closes when it reaches KITCHEN_BATCH_MAX_UNITS,
+           or KITCHEN_BATCH_MAX_WAIT_SECONDS after it opened.
+  close  — cooking starts: every member still STOCK_VERIFIED moves to
+           IN_KITCHEN in one bulk transition; finish is scheduled after the
+           prep time.
+  finish — each member has one batch fewer to wait for; the orders with
+           none left move to READY in one bulk transition.
+
+State lives in Redis and every step is a Lua script, so concurrent joins,
+timers and redeliveries cannot double-count: an order joins each item's
+batch once, and a batch is counted as closed and as finished once. Closing
+and finishing again return the same members, so a retried task can redo
+its (compare-and-set) DB transition.
+
+Every key shares the {kitchen:batch} hash tag, so on a Redis Cluster they
+all live in one slot. Scripts get the keys they know up front as KEYS;
+keys only known inside a script (a batch id allocated by a join, a batch's
+members) are derived from the tag, in that same slot.
+
+  {kitchen:batch}:seq                     batch id counter
+  {kitchen:batch}:open:{menu_item_id}     id of the item's forming batch
+  {kitchen:batch}:{id}                    hash menu_item_id, units, opened_at, closed, finished
+  {kitchen:batch}:{id}:orders             hash order_id → student_id
+  {kitchen:batch}:{id}:done               members finished by this batch
+  {kitchen:batch}:order:{order_id}        hash menu_item_id → batch id (joined)
+  {kitchen:batch}:remaining:{order_id}    batches the order still waits for
+"""
+import time
+
+from prometheus_client import Histogram
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+BATCH_KEY_TTL_SECONDS = 86400
+BATCH_KEY_PREFIX = "{kitchen:batch}:"
+BATCH_SEQ_KEY = f"{BATCH_KEY_PREFIX}seq"
+
+BATCH_ORDERS = Histogram(
+    "kitchen_cooking_batch_orders", "Orders cooked together per cooking batch",
+    buckets=(1, 2, 5, 10, 20, 40, 80),
+)
+
+# KEYS: seq, order's joined batches, order's remaining count, then each item's open-batch key
+# ARGV: key prefix, order_id, student_id, max units, now, ttl, distinct items, then (item, qty) pairs
+_JOIN = """
+local prefix, order_id, student_id = ARGV[1], ARGV[2], ARGV[3]
+local max_units, now, ttl, distinct = tonumber(ARGV[4]), ARGV[5], tonumber(ARGV[6]), tonumber(ARGV[7])
+redis.call('SET', KEYS[3], distinct, 'NX', 'EX', ttl)
+local out = {}
+for i = 8, #ARGV, 2 do
+  local item, qty = ARGV[i], tonumber(ARGV[i + 1])
+  local open_key = KEYS[4 + (i - 8) / 2]
+  if redis.call('HEXISTS', KEYS[2], item) == 0 then
+    local batch = redis.call('GET', open_key)
+    local is_new = 0
+    if not batch then
+      batch = tostring(redis.call('INCR', KEYS[1]))
+      redis.call('HSET', prefix .. batch, 'menu_item_id', item, 'units', 0, 'opened_at', now)
+      redis.call('EXPIRE', prefix .. batch, ttl)
+      redis.call('SET', open_key, batch, 'EX', ttl)
+      is_new = 1
+    end
+    local batch_key = prefix .. batch
+    local units = redis.call('HINCRBY', batch_key, 'units', qty)
+    redis.call('HSET', batch_key .. ':orders', order_id, student_id)
+    redis.call('EXPIRE', batch_key .. ':orders', ttl)
+    redis.call('HSET', KEYS[2], item, batch)
+    redis.call('EXPIRE', KEYS[2], ttl)
+    local full = 0
+    if units >= max_units then
+      redis.call('DEL', open_key)
+      full = 1
+    end
+    table.insert(out, {batch, is_new, full})
+  end
+end
+return out
+"""
+
+# KEYS: batch, batch orders
+# ARGV: key prefix, batch id
+_CLOSE = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return {0}
+end
+local first = redis.call('HSETNX', KEYS[1], 'closed', 1)
+local open_key = ARGV[1] .. 'open:' .. redis.call('HGET', KEYS[1], 'menu_item_id')
+if redis.call('GET', open_key) == ARGV[2] then
+  redis.call('DEL', open_key)
+end
+local members = redis.call('HGETALL', KEYS[2])
+table.insert(members, 1, first)
+return members
+"""
+
+# KEYS: batch, batch orders, batch done
+# ARGV: key prefix
+_FINISH = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  return {}
+end
+if redis.call('HSETNX', KEYS[1], 'finished', 1) == 0 then
+  return redis.call('HGETALL', KEYS[3])
+end
+local members = redis.call('HGETALL', KEYS[2])
+local done = {}
+for i = 1, #members, 2 do
+  local order_id = members[i]
+  local remaining_key = ARGV[1] .. 'remaining:' .. order_id
+  if redis.call('DECR', remaining_key) <= 0 then
+    redis.call('DEL', remaining_key, ARGV[1] .. 'order:' .. order_id)
+    table.insert(done, order_id)
+    table.insert(done, members[i + 1])
+  end
+end
+if #done > 0 then
+  redis.call('HSET', KEYS[3], unpack(done))
+  redis.call('EXPIRE', KEYS[3], redis.call('TTL', KEYS[1]))
+end
+return done
+"""
+
+# Registered on first use; run with EVALSHA against whichever client is passed
+_scripts: dict[str, object] = {}
+
+
+def _script(redis, source: str):
+    if source not in _scripts:
+        _scripts[source] = redis.register_script(source)
+    return _scripts[source]
+
+
+def _batch_key(batch_id: str) -> str:
+    return f"{BATCH_KEY_PREFIX}{batch_id}"
+
+
+def _pairs(flat: list) -> dict[str, str]:
+    return dict(zip(flat[0::2], flat[1::2]))
+
+
+def join_batches(redis, order_id: str, student_id: str, items: list[dict]) -> list[tuple[str, bool, bool]]:
+    """
+    Add the order to its items' forming batches. Returns (batch id, opened
+    by this call, now full) for each batch joined; items already joined
+    (a retried task) are skipped.
+    """
+    units: dict[str, int] = {}
+    for item in items:
+        units[item["menu_item_id"]] = units.get(item["menu_item_id"], 0) + int(item["quantity"])
+    keys = [
+        BATCH_SEQ_KEY,
+        f"{BATCH_KEY_PREFIX}order:{order_id}",
+        f"{BATCH_KEY_PREFIX}remaining:{order_id}",
+    ] + [f"{BATCH_KEY_PREFIX}open:{menu_item_id}" for menu_item_id in units]
+    args = [
+        BATCH_KEY_PREFIX, order_id, student_id, settings.KITCHEN_BATCH_MAX_UNITS,
+        time.time(), BATCH_KEY_TTL_SECONDS, len(units),
+    ]
+    for menu_item_id, quantity in units.items():
+        args += [menu_item_id, quantity]
+    joined = _script(redis, _JOIN)(keys=keys, args=args, client=redis)
+    return [(str(b), bool(new), bool(full)) for b, new, full in joined]
+
+
+def close_batch(redis, batch_id: str) -> tuple[bool, dict[str, str]]:
+    """
+    Stop the batch taking orders. Returns whether this call closed it (only
+    that caller schedules the cook) and its members (order_id → student_id).
+    """
+    batch_key = _batch_key(batch_id)
+    first, *members = _script(redis, _CLOSE)(
+        keys=[batch_key, f"{batch_key}:orders"], args=[BATCH_KEY_PREFIX, batch_id], client=redis,
+    )
+    return bool(first), _pairs(members)
+
+
+def finish_batch(redis, batch_id: str) -> dict[str, str]:
+    """
+    Mark the batch cooked. Returns the members with no batches left to wait
+    for (order_id → student_id); a repeated call returns the same orders
+    without counting the batch twice.
+    """
+    batch_key = _batch_key(batch_id)
+    return _pairs(_script(redis, _FINISH)(
+        keys=[batch_key, f"{batch_key}:orders", f"{batch_key}:done"], args=[BATCH_KEY_PREFIX], client=redis,
+    ))
@@ -0,0 +1,132 @@
+"""
+Kitchen Queue — Dead-letter store for kitchen tasks (Redis Stream kitchen:dead_letters)
+
+A process_order / finish_order that is still failing after max_retries is
+recorded here before the order is given up on:
+
+    task=process_order  order_id=...  kwargs={task kwargs, JSON}
+    error="ExcType: message"  retries=3  failed_at=ISO-8601
+
+The store is in Redis rather than the kitchen DB on purpose: the outage
+that exhausts a task's retries is very often the DB itself, and the broker
+(the same Redis) has to be up for the task to have run at all.
+
+GET /kitchen/dead-letters lists and filters entries, newest first, and
+POST /kitchen/dead-letters/replay re-sends them at a controlled rate
+(app/api/dead_letters.py). Replay counts are kept in a hash next to the
+stream. The stream is capped at KITCHEN_DEAD_LETTER_MAXLEN entries; the
+counters of entries trimmed off it are dropped on the next record.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_STREAM = "kitchen:dead_letters"
+DEAD_LETTER_REPLAYS = "kitchen:dead_letters:replays"  # hash: entry id → times replayed
+
+
+def record_dead_letter(redis, task_name: str, kwargs: dict, exc: BaseException, retries: int):
+    """Append a failed task to the store (sync client; called from the worker). Best-effort."""
+    try:
+        redis.xadd(
+            DEAD_LETTER_STREAM,
+            {
+                "task": task_name,
+                "order_id": kwargs.get("order_id", ""),
+                "kwargs": json.dumps(kwargs),
+                "error": f"{type(exc).__name__}: {exc}"[:2000],
+                "retries": retries,
+                "failed_at": datetime.now(timezone.utc).isoformat(),
+            },
+            maxlen=settings.KITCHEN_DEAD_LETTER_MAXLEN, approximate=True,
+        )
+    except Exception as store_exc:
+        logger.error("Could not dead-letter %s for order %s: %s", task_name, kwargs.get("order_id"), store_exc)
+        return
+    try:
+        _prune_replays(redis)
+    except Exception as prune_exc:
+        logger.warning("Could not prune dead-letter replay counts: %s", prune_exc)
+
+
+def _stream_id(entry_id: str) -> tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _prune_replays(redis):
+    """HDEL the replay counts of entries the MAXLEN cap has trimmed off the stream."""
+    replayed = redis.hkeys(DEAD_LETTER_REPLAYS)
+    if not replayed:
+        return
+    oldest = redis.xrange(DEAD_LETTER_STREAM, count=1)
+    floor = _stream_id(oldest[0][0]) if oldest else None
+    trimmed = [i for i in replayed if floor is None or _stream_id(i) < floor]
+    if trimmed:
+        redis.hdel(DEAD_LETTER_REPLAYS, *trimmed)
+
+
+def entry_to_dict(entry_id: str, fields: dict, replays: int = 0) -> dict:
+    return {
+        "id": entry_id,
+        "task": fields.get("task"),
+        "order_id": fields.get("order_id"),
+        "kwargs": json.loads(fields.get("kwargs") or "{}"),
+        "error": fields.get("error"),
+        "retries": int(fields.get("retries") or 0),
+        "failed_at": fields.get("failed_at"),
+        "replay_count": replays,
+    }
+
+
+def _matches(fields: dict, task: str | None, order_id: str | None, error: str | None) -> bool:
+    return (
+        (task is None or fields.get("task") == task)
+        and (order_id is None or fields.get("order_id") == order_id)
+        and (error is None or error.lower() in (fields.get("error") or "").lower())
+    )
+
+
+async def list_dead_letters(
+    redis,
+    limit: int,
+    cursor: str | None = None,
+    task: str | None = None,
+    order_id: str | None = None,
+    error: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """
+    Up to limit matching entries, newest first, starting strictly before
+    cursor (an entry id). Returns them and the next cursor, if any.
+    Filtering scans the stream in chunks, at most KITCHEN_DEAD_LETTER_MAXLEN
+    entries per call.
+    """
+    found: list[tuple[str, dict]] = []
+    end = f"({cursor}" if cursor else "+"
+    scanned = 0
+    while len(found) <= limit and scanned < settings.KITCHEN_DEAD_LETTER_MAXLEN:
+        chunk = await redis.xrevrange(DEAD_LETTER_STREAM, max=end, min="-", count=500)
+        if not chunk:
+            break
+        scanned += len(chunk)
+        found.extend((i, f) for i, f in chunk if _matches(f, task, order_id, error))
+        end = f"({chunk[-1][0]}"
+
+    page = found[:limit]
+    replays = await redis.hmget(DEAD_LETTER_REPLAYS, [i for i, _ in page]) if page else []
+    entries = [entry_to_dict(i, f, int(r or 0)) for (i, f), r in zip(page, replays)]
+    next_cursor = page[-1][0] if len(found) > limit else None
+    return entries, next_cursor
+
+
+async def get_dead_letters(redis, entry_ids: list[str]) -> list[tuple[str, dict]]:
+    """Entries by id, in the given order; unknown (or trimmed) ids are left out."""
+    pipe = redis.pipeline(transaction=False)
+    for entry_id in entry_ids:
+        pipe.xrange(DEAD_LETTER_STREAM, min=entry_id, max=entry_id, count=1)
+    return [rows[0] for rows in await pipe.execute() if rows]
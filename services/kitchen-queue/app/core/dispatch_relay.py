@@ -0,0 +1,172 @@
+"""
+Kitchen Queue — Outbox relay: order_dispatch_outbox → Celery process_order
+
+POST /kitchen/queue commits the order and its outbox row in one
+transaction and returns; it never talks to the broker. This relay, running
+in every API worker process, publishes undispatched rows in batches:
+
+  1. SELECT ... FOR UPDATE SKIP LOCKED  — claim a batch (workers never overlap)
+  2. send_task for each row over one broker connection (in a thread), or
+     with KITCHEN_DISPATCH_BACKEND=stream one pipelined XADD per batch to
+     the asyncio worker's stream (app/core/order_stream.py)
+  3. mark the sent rows dispatched, same transaction as the claim
+
+A crash between 2 and 3 leaves the rows undispatched, so they are sent
+again on the next pass: delivery is at-least-once and process_order skips
+orders that have already left PENDING. queue_order wakes the relay right
+after its commit, so an idle system dispatches immediately rather than on
+the next poll.
+
+Metrics (exposed on /metrics):
+  kitchen_outbox_backlog                 rows waiting to be dispatched
+  kitchen_outbox_oldest_pending_seconds  age of the oldest waiting row
+  kitchen_outbox_dispatch_lag_seconds    order commit → broker publish
+"""
+import asyncio
+import logging
+import time
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import JSON, text
+
+from app.core.celery_app import celery_app
+from app.core.config import get_settings
+from app.core.order_stream import publish_order_dispatches
+from app.core.redis_client import get_redis
+from app.db.database import AsyncSessionLocal
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+OUTBOX_BACKLOG = Gauge(
+    "kitchen_outbox_backlog", "Orders committed but not yet dispatched to Celery",
+)
+OUTBOX_OLDEST_PENDING = Gauge(
+    "kitchen_outbox_oldest_pending_seconds", "Age of the oldest undispatched outbox row",
+)
+OUTBOX_DISPATCH_LAG = Histogram(
+    "kitchen_outbox_dispatch_lag_seconds", "Time from order commit to Celery publish",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+_wake = asyncio.Event()
+
+
+def wake_dispatch_relay():
+    """Called after an outbox row is committed so the relay publishes it now."""
+    _wake.set()
+
+
+def _publish(rows) -> tuple[list[int], str | None]:
+    """Send process_order for each row; stops at the first broker error.
+    Returns (outbox ids sent, error message or None)."""
+    sent: list[int] = []
+    try:
+        with celery_app.producer_or_acquire() as producer:
+            for row in rows:
+                celery_app.send_task(
+                    "process_order", kwargs={"order_id": row.order_id, **row.payload}, producer=producer,
+                )
+                sent.append(row.id)
+    except Exception as exc:
+        return sent, str(exc)
+    return sent, None
+
+
+async def _publish_to_stream(rows) -> tuple[list[int], str | None]:
+    """Append every row to the order stream; all or nothing (a partial batch is re-sent)."""
+    try:
+        await publish_order_dispatches(get_redis(), [{"order_id": row.order_id, **row.payload} for row in rows])
+    except Exception as exc:
+        return [], str(exc)
+    return [row.id for row in rows], None
+
+
+async def relay_batch() -> int:
+    """Publish one batch of pending dispatches. Returns how many were sent."""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            text(
+                "SELECT id, order_id, payload, created_at FROM order_dispatch_outbox "
+                "WHERE dispatched_at IS NULL ORDER BY id LIMIT :batch FOR UPDATE SKIP LOCKED"
+            ).columns(payload=JSON),
+            {"batch": settings.OUTBOX_RELAY_BATCH_SIZE},
+        )).fetchall()
+        if not rows:
+            return 0
+
+        if settings.KITCHEN_DISPATCH_BACKEND == "stream":
+            sent, error = await _publish_to_stream(rows)
+        else:
+            sent, error = await asyncio.to_thread(_publish, rows)
+        if sent:
+            dispatched = (await db.execute(
+                text(
+                    "UPDATE order_dispatch_outbox SET dispatched_at = NOW(), attempts = attempts + 1 "
+                    "WHERE id = ANY(:ids) RETURNING EXTRACT(EPOCH FROM dispatched_at - created_at)"
+                ),
+                {"ids": sent},
+            )).scalars().all()
+            for lag in dispatched:
+                OUTBOX_DISPATCH_LAG.observe(float(lag))
+        if error:
+            failed_id = rows[len(sent)].id
+            await db.execute(
+                text("UPDATE order_dispatch_outbox SET attempts = attempts + 1, last_error = :err WHERE id = :id"),
+                {"err": error[:1000], "id": failed_id},
+            )
+            logger.warning("Celery dispatch failed for outbox row %s, will retry: %s", failed_id, error)
+        await db.commit()
+        return len(sent)
+
+
+async def _update_backlog_metrics():
+    async with AsyncSessionLocal() as db:
+        backlog, oldest = (await db.execute(text(
+            "SELECT COUNT(*), COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(created_at)), 0) "
+            "FROM order_dispatch_outbox WHERE dispatched_at IS NULL"
+        ))).one()
+    OUTBOX_BACKLOG.set(backlog)
+    OUTBOX_OLDEST_PENDING.set(float(oldest))
+
+
+async def _purge_dispatched():
+    """Drop dispatched rows past OUTBOX_RETENTION_HOURS, a bounded chunk at a time."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text(
+                "DELETE FROM order_dispatch_outbox WHERE id IN ("
+                "  SELECT id FROM order_dispatch_outbox "
+                "  WHERE dispatched_at < NOW() - make_interval(hours => :hours) LIMIT 5000"
+                ")"
+            ),
+            {"hours": settings.OUTBOX_RETENTION_HOURS},
+        )
+        await db.commit()
+    if result.rowcount:
+        logger.info("Purged %d dispatched outbox row(s)", result.rowcount)
+
+
+async def run_dispatch_relay(stop: asyncio.Event):
+    """Relay outbox rows to Celery until stop is set."""
+    last_purge = 0.0
+    while not stop.is_set():
+        _wake.clear()
+        sent = 0
+        try:
+            sent = await relay_batch()
+            await _update_backlog_metrics()
+            if time.monotonic() - last_purge >= settings.OUTBOX_PURGE_INTERVAL_SECONDS:
+                last_purge = time.monotonic()
+                await _purge_dispatched()
+        except Exception:
+            logger.exception("Outbox relay pass failed")
+
+        # A full batch means more backlog: go again straight away
+        if sent >= settings.OUTBOX_RELAY_BATCH_SIZE:
+            continue
+        waiters = [asyncio.ensure_future(stop.wait()), asyncio.ensure_future(_wake.wait())]
+        await asyncio.wait(waiters, timeout=settings.OUTBOX_RELAY_INTERVAL_SECONDS,
+                           return_when=asyncio.FIRST_COMPLETED)
+        for w in waiters:
+            w.cancel()
@@ -0,0 +1,129 @@
+"""
+Kitchen Queue — Order lookup cache (GET /kitchen/orders/{order_id})
+
+The gateway proxies every status poll to get_order, so each order's
+projection (status, student_id) is kept in a Redis hash, kitchen:order:{id}:
+
+  read     get_order tries the hash first; on a miss it reads Postgres (live
+           table, then archive) and fills the cache
+  write    every committed status change updates the hash in the same
+           pipeline as the board events and counters (app/core/order_events.py),
+           so API, Celery worker and stream worker transitions all reach it
+           without an extra round trip; a queued order is cached as pending
+  expiry   KITCHEN_ORDER_CACHE_TERMINAL_TTL_SECONDS once READY / FAILED;
+           KITCHEN_ORDER_CACHE_TTL_SECONDS (tens of seconds) before that,
+           which bounds how long an update lost to a Redis error can leave
+           a student's poll stale
+
+Updates are versioned: each transition carries its order_status_history id
+(seq, increasing per order in commit order) and a Lua script only applies
+it if it is newer than the seq in the hash, so a transition published late
+(API and worker racing) cannot overwrite a newer one. The queued order is
+seq 0. A fill only sets fields that are missing (HSETNX), with seq 0, and a
+TTL if there is none, so a fill that read the row just before a transition
+committed cannot put the old status back. A hash without student_id (a
+transition on an order that was not cached) counts as a miss and is
+completed by the fill.
+
+Metrics:
+  kitchen_order_cache_lookups_total{result}  hit / miss; the hit ratio is
+      rate(...{result="hit"}[5m]) / rate(...[5m])
+"""
+import logging
+
+from prometheus_client import Counter
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ORDER_CACHE_PREFIX = "kitchen:order:"
+TERMINAL = {"ready", "failed"}
+
+# KEYS: order hash
+# ARGV: status, seq, ttl, student_id ('' to leave it as is)
+_SET_IF_NEWER = """
+if ARGV[4] ~= '' then
+    redis.call('HSET', KEYS[1], 'student_id', ARGV[4])
+end
+local cached = tonumber(redis.call('HGET', KEYS[1], 'seq') or '-1')
+if tonumber(ARGV[2]) <= cached then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', ARGV[1], 'seq', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+ORDER_CACHE_LOOKUPS = Counter(
+    "kitchen_order_cache_lookups_total", "Single-order lookups by cache result", ["result"],
+)
+
+
+def _key(order_id: str) -> str:
+    return f"{ORDER_CACHE_PREFIX}{order_id}"
+
+
+def _status(status) -> str:
+    # Events carry OrderStatus members or labels in either case
+    return getattr(status, "value", status).lower()
+
+
+def _ttl(status: str) -> int:
+    if status in TERMINAL:
+        return settings.KITCHEN_ORDER_CACHE_TERMINAL_TTL_SECONDS
+    return settings.KITCHEN_ORDER_CACHE_TTL_SECONDS
+
+
+def stage_order_cache(pipe, events: list[tuple[str, dict]]):
+    """Queue the projection updates for order_inserted / order_status events on a (sync or async) pipeline."""
+    if not settings.KITCHEN_ORDER_CACHE_ENABLED:
+        return
+    script = None
+    for event, data in events:
+        if event == "order_inserted":
+            seq, student_id = 0, data["student_id"]
+        elif event == "order_status":
+            seq, student_id = data["seq"], ""
+        else:
+            continue
+        if script is None:
+            # Run as EVALSHA; the pipeline loads the script on execute if Redis lacks it
+            script = pipe.register_script(_SET_IF_NEWER)
+            pipe.scripts.add(script)
+        status = _status(data["status"])
+        pipe.evalsha(script.sha, 1, _key(data["order_id"]), status, seq, _ttl(status), student_id)
+
+
+async def get_cached_order(redis, order_id: str) -> dict | None:
+    """{"order_id", "status", "student_id"} from the cache, or None on a miss (or when disabled)."""
+    if not settings.KITCHEN_ORDER_CACHE_ENABLED:
+        return None
+    try:
+        cached = await redis.hgetall(_key(order_id))
+    except Exception as exc:
+        logger.warning("Order cache read failed for %s: %s", order_id, exc)
+        cached = {}
+    if "status" in cached and "student_id" in cached:
+        ORDER_CACHE_LOOKUPS.labels("hit").inc()
+        return {"order_id": order_id, "status": cached["status"], "student_id": cached["student_id"]}
+    ORDER_CACHE_LOOKUPS.labels("miss").inc()
+    return None
+
+
+async def fill_order_cache(redis, order_id: str, status: str, student_id: str):
+    """Cache a projection read from Postgres without overwriting a newer transition. Best-effort."""
+    if not settings.KITCHEN_ORDER_CACHE_ENABLED:
+        return
+    key = _key(order_id)
+    status = _status(status)
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.hsetnx(key, "status", status)
+        pipe.hsetnx(key, "student_id", student_id)
+        pipe.hsetnx(key, "seq", 0)
+        pipe.expire(key, _ttl(status), nx=True)
+        await pipe.execute()
+    except Exception as exc:
+        logger.warning("Order cache fill failed for %s: %s", order_id, exc)
@@ -0,0 +1,46 @@
+"""
+Kitchen Queue — Post-commit order change publishing
+
+One Redis round trip per DB commit carries the display board events
+(app/core/board_events.py), the status counter updates
+(app/core/order_stats.py) and the order lookup cache updates
+(app/core/order_cache.py). Best-effort: a Redis failure is logged and never
+fails the request or task; the board recovers via snapshot, the counters
+via the periodic reconcile and the cache via its TTL.
+"""
+import logging
+
+from app.core.board_events import stage_board_events
+from app.core.order_cache import stage_order_cache
+from app.core.order_stats import stage_status_transitions
+from app.core.redis_client import get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+
+async def publish_order_changes(
+    events: list[tuple[str, dict]],
+    transitions: list[tuple[str | None, str]],
+):
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        stage_board_events(pipe, events)
+        stage_status_transitions(pipe, transitions)
+        stage_order_cache(pipe, events)
+        await pipe.execute()
+    except Exception as exc:
+        logger.warning("Could not publish %d order change(s): %s", len(events), exc)
+
+
+def publish_order_changes_sync(
+    events: list[tuple[str, dict]],
+    transitions: list[tuple[str | None, str]],
+):
+    try:
+        pipe = get_sync_redis().pipeline(transaction=False)
+        stage_board_events(pipe, events)
+        stage_status_transitions(pipe, transitions)
+        stage_order_cache(pipe, events)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Could not publish %d order change(s): %s", len(events), exc)
@@ -0,0 +1,152 @@
+"""
+Kitchen Queue — Incrementally maintained order counters (Redis)
+
+  kitchen:stats:status            hash  status → orders currently in it (hot table)
+  kitchen:stats:minute:{YYYYmmddHHMM}
+                                  hash  status → transitions into it that
+                                        minute ("pending" only counts
+                                        reverts), created → orders created
+
+Every transition adjusts the counters by ±1 in the same pipeline that
+publishes the board event, so reading them is O(1) instead of a scan of
+orders. The status hash can drift (a crash between DB commit and publish,
+a Redis flush); reconcile_status_counts — run periodically by celery beat —
+corrects it from a GROUP BY over the DB once the same difference has shown
+up on two runs in a row.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+import redis
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.models.order import OrderStatus
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+STATUS_COUNTS_KEY = "kitchen:stats:status"
+STATUS_DRIFT_KEY = "kitchen:stats:status:drift"  # hash  status → db - cached seen by the last reconcile
+MINUTE_BUCKET_KEY = "kitchen:stats:minute:{minute}"
+STATUSES = [s.value for s in OrderStatus]
+CREATED = "created"  # per-minute field for new orders (kept apart from reverts into pending)
+
+
+def _minute(at: datetime) -> str:
+    return at.strftime("%Y%m%d%H%M")
+
+
+def stage_status_transitions(pipe, transitions: list[tuple[str | None, str]]):
+    """
+    Queue counter updates for (old_status, new_status) pairs on a (sync or
+    async) pipeline; old_status is None for a new order, which counts as
+    created in the minute bucket rather than as a transition. Statuses are
+    case-insensitive.
+    """
+    bucket = MINUTE_BUCKET_KEY.format(minute=_minute(datetime.now(timezone.utc)))
+    for old, new in transitions:
+        new = new.lower()
+        if old is not None:
+            old = old.lower()
+            if old == new:
+                continue
+            pipe.hincrby(STATUS_COUNTS_KEY, old, -1)
+        pipe.hincrby(STATUS_COUNTS_KEY, new, 1)
+        pipe.hincrby(bucket, CREATED if old is None else new, 1)
+    if transitions:
+        pipe.expire(bucket, settings.KITCHEN_STATS_BUCKET_TTL_SECONDS)
+
+
+def stage_status_removals(pipe, removed: dict[str, int]):
+    """Queue counter decrements for orders that left the hot table (archived)."""
+    for status, count in removed.items():
+        pipe.hincrby(STATUS_COUNTS_KEY, status.lower(), -count)
+
+
+def minute_bucket_keys(minutes: int) -> list[tuple[datetime, str]]:
+    """(minute start, key) for the last `minutes` minutes, oldest first."""
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    starts = [now - timedelta(minutes=n) for n in range(minutes - 1, -1, -1)]
+    return [(start, MINUTE_BUCKET_KEY.format(minute=_minute(start))) for start in starts]
+
+
+def reconcile_status_counts(client: redis.Redis, session) -> dict[str, int]:
+    """
+    Correct the status hash towards the DB's counts; returns the corrections
+    applied (status → db - cached).
+
+    The count and the hash are not read at the same moment: a transition
+    committed before the GROUP BY may still have its HINCRBY in flight
+    (StatusWriter publishes after coalescing), and correcting for it would
+    count it twice once that lands. So a status is only corrected when the
+    same difference was already seen by the previous run; any other
+    difference is remembered for the next one. Nothing is written (returns
+    {}) if a transition changed the hash between reading and writing it.
+    """
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(STATUS_COUNTS_KEY, STATUS_DRIFT_KEY)
+            cached = {k: int(v) for k, v in pipe.hgetall(STATUS_COUNTS_KEY).items()}
+            seen = {k: int(v) for k, v in pipe.hgetall(STATUS_DRIFT_KEY).items()}
+            actual = {s: 0 for s in STATUSES}
+            for status, count in session.execute(
+                text("SELECT status::text, COUNT(*) FROM orders GROUP BY status")
+            ):
+                actual[status.lower()] = count
+            drift = {s: actual[s] - cached.get(s, 0) for s in STATUSES if actual[s] != cached.get(s, 0)}
+            confirmed = {s: d for s, d in drift.items() if seen.get(s) == d}
+            pending = {s: d for s, d in drift.items() if s not in confirmed}
+
+            pipe.multi()
+            for status, delta in confirmed.items():
+                pipe.hincrby(STATUS_COUNTS_KEY, status, delta)
+            pipe.delete(STATUS_DRIFT_KEY)
+            if pending:
+                pipe.hset(STATUS_DRIFT_KEY, mapping=pending)
+                # Only the run right after this one may confirm it
+                pipe.expire(STATUS_DRIFT_KEY, int(2 * settings.KITCHEN_STATS_RECONCILE_INTERVAL_SECONDS))
+            pipe.execute()
+        except redis.WatchError:
+            return {}
+    return confirmed
+
+
+class OrderStatsCollector:
+    """Prometheus collector reading the counters from Redis at scrape time."""
+
+    def __init__(self, client: redis.Redis):
+        self._client = client
+
+    @staticmethod
+    def _families():
+        return (
+            GaugeMetricFamily(
+                "kitchen_orders_by_status", "Orders currently in each status", labels=["status"],
+            ),
+            GaugeMetricFamily(
+                "kitchen_order_transitions_last_minute",
+                "Transitions into each status during the last complete minute", labels=["status"],
+            ),
+        )
+
+    def describe(self):
+        # Lets the registry learn the metric names without touching Redis
+        return list(self._families())
+
+    def collect(self):
+        by_status, last_minute = self._families()
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.hgetall(STATUS_COUNTS_KEY)
+            pipe.hgetall(minute_bucket_keys(2)[0][1])
+            counts, previous_minute = pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("Order stats unavailable for /metrics: %s", exc)
+            return
+        for status in STATUSES:
+            by_status.add_metric([status], int(counts.get(status, 0)))
+            last_minute.add_metric([status], int(previous_minute.get(status, 0)))
+        yield by_status
+        yield last_minute
@@ -0,0 +1,33 @@
+"""
+Kitchen Queue — Order dispatch stream (Redis Stream kitchen:orders)
+
+With KITCHEN_DISPATCH_BACKEND=stream the outbox relay appends each order
+here instead of sending a Celery process_order task, and the asyncio
+worker (app/tasks/stream_worker.py) consumes it through the consumer group
+"kitchen":
+
+    kwargs={process_order kwargs, JSON}
+
+Entries are acknowledged once the order's pipeline is over; until then
+they stay in the group's pending list, where another consumer claims them
+if their consumer dies.
+"""
+import json
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+ORDER_STREAM = "kitchen:orders"
+ORDER_STREAM_GROUP = "kitchen"
+
+
+async def publish_order_dispatches(redis, dispatches: list[dict]):
+    """XADD one entry per process_order kwargs, in one round trip."""
+    pipe = redis.pipeline(transaction=False)
+    for kwargs in dispatches:
+        pipe.xadd(
+            ORDER_STREAM, {"kwargs": json.dumps(kwargs)},
+            maxlen=settings.KITCHEN_ORDER_STREAM_MAXLEN, approximate=True,
+        )
+    await pipe.execute()
@@ -0,0 +1,74 @@
+"""
+Kitchen Queue — Per-queue Celery metrics (worker exporter)
+
+  kitchen_queue_depth{queue}         messages waiting in the broker, all priorities
+  kitchen_queue_wait_seconds{queue}  publish (or countdown due time) → task start
+
+Depth is read from the Redis lists at scrape time; with priorities each
+queue is one list per priority step ("express", "express:1", ...). Wait
+time uses the published_at header celery_app stamps on every message.
+"""
+import logging
+import time
+from datetime import datetime
+
+from celery.signals import task_prerun
+from prometheus_client import Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+from app.core.celery_app import ORDER_QUEUES, PRIORITY_SEP, PRIORITY_STEPS, PUBLISHED_AT_HEADER
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT = Histogram(
+    "kitchen_queue_wait_seconds", "Time a kitchen task waited in its queue before starting",
+    ["queue"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+
+
+def _priority_lists(queue: str) -> list[str]:
+    return [queue if step == 0 else f"{queue}{PRIORITY_SEP}{step}" for step in PRIORITY_STEPS]
+
+
+class QueueDepthCollector:
+    """Reads every order queue's backlog from the broker when scraped."""
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+
+    def describe(self):
+        # Static description so registering does not trigger a Redis read
+        return [GaugeMetricFamily("kitchen_queue_depth", "Kitchen tasks waiting per queue", labels=["queue"])]
+
+    def collect(self):
+        depth = GaugeMetricFamily("kitchen_queue_depth", "Kitchen tasks waiting per queue", labels=["queue"])
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for queue in ORDER_QUEUES:
+                for name in _priority_lists(queue):
+                    pipe.llen(name)
+            lengths = iter(pipe.execute())
+            for queue in ORDER_QUEUES:
+                depth.add_metric([queue], sum(next(lengths) for _ in PRIORITY_STEPS))
+        except Exception as exc:
+            logger.warning("Could not read queue depths: %s", exc)
+            return
+        yield depth
+
+
+@task_prerun.connect
+def _observe_queue_wait(task=None, **_):
+    request = task.request
+    published_at = getattr(request, PUBLISHED_AT_HEADER, None)
+    queue = (request.delivery_info or {}).get("routing_key")
+    if published_at is None or queue not in ORDER_QUEUES:
+        return
+    # Countdown tasks are not waiting until they are due
+    due = float(published_at)
+    if request.eta:
+        try:
+            eta = request.eta if isinstance(request.eta, datetime) else datetime.fromisoformat(request.eta)
+            due = max(due, eta.timestamp())
+        except (TypeError, ValueError):
+            pass
+    QUEUE_WAIT.labels(queue).observe(max(0.0, time.time() - due))
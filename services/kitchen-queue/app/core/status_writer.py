@@ -0,0 +1,178 @@
+"""
+Kitchen Queue — Coalesced order status writes (worker side)
+
+Kitchen tasks used to commit one single-row UPDATE per transition, and at
+peak the kitchen DB is bound by commit rate, not rows. Tasks now hand their
+transition to the worker's StatusWriter and wait for it; a background
+thread gathers whatever arrives within STATUS_WRITE_FLUSH_INTERVAL_MS and
+writes it as one UPDATE ... FROM (VALUES ...) and one commit.
+
+Ordering per order is kept: a task blocks until its write is committed, and
+a flush never carries two writes for the same order (a second one goes in
+the next statement), so an order's transitions hit the DB in submission
+order. Rows are locked in id order, so concurrent flushes from several
+workers cannot deadlock.
+
+Metrics (worker exporter, app/core/worker_metrics.py):
+  kitchen_status_flush_seconds        UPDATE + commit time per flush
+  kitchen_status_flush_batch_size     transitions per flush
+  kitchen_order_state_seconds{state}  time an order spent in a status before leaving it
+
+The same statement appends each transition to order_status_history
+(app/db/status_history.py).
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from prometheus_client import Histogram
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session
+
+from app.core.board_events import status_changed
+from app.core.config import get_settings
+from app.core.order_events import publish_order_changes_sync
+from app.db.status_history import observe_time_in_state, with_history
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+STATUS_FLUSH_SECONDS = Histogram(
+    "kitchen_status_flush_seconds", "Time to write and commit one batch of status transitions",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+STATUS_FLUSH_BATCH_SIZE = Histogram(
+    "kitchen_status_flush_batch_size", "Status transitions written per flush",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+
+
+@dataclass
+class _Write:
+    order_id: str
+    status: str             # upper-case DB label
+    expected: str | None    # only move from this status (upper-case), if set
+    future: Future = field(default_factory=Future)
+
+
+@lru_cache(maxsize=64)
+def _flush_sql(rows: int):
+    values = ", ".join(
+        f"(CAST(:id{i} AS varchar), CAST(:status{i} AS text), CAST(:expected{i} AS text))" for i in range(rows)
+    )
+    # The locked self-join hands back each row's status (and since when) before this UPDATE
+    return text(with_history(
+        "UPDATE orders o SET status = CAST(v.status AS order_status), updated_at = NOW() "
+        f"FROM (VALUES {values}) AS v(id, status, expected), "
+        "(SELECT id, status, updated_at FROM orders WHERE id = ANY(:ids) ORDER BY id FOR UPDATE) prev "
+        "WHERE o.id = v.id AND prev.id = v.id "
+        "AND (v.expected IS NULL OR prev.status::text = v.expected) "
+        "RETURNING o.id, prev.status::text AS from_status, o.status::text AS to_status, "
+        "prev.updated_at AS entered_at",
+        "id, from_status, seconds_in_state, seq",
+    ))
+
+
+class StatusWriter:
+    """Batches order status UPDATEs from the tasks running in this process."""
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._queue: queue.Queue[_Write] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+
+    def write(self, order_id: str, status: str, expected: str | None = None) -> bool:
+        """
+        Set order_id to status (only if it is currently expected, when given)
+        and wait until committed. Returns whether the row was updated.
+        """
+        self._ensure_thread()
+        pending = _Write(order_id, status.upper(), expected.upper() if expected else None)
+        self._queue.put(pending)
+        return pending.future.result()
+
+    def write_many(self, order_ids: list[str], status: str, expected: str | None = None) -> list[str]:
+        """
+        write() for several orders at once. They are queued together, so up
+        to STATUS_WRITE_MAX_BATCH of them land in one statement. Returns the
+        ids that were updated.
+        """
+        self._ensure_thread()
+        expected = expected.upper() if expected else None
+        pending = [_Write(order_id, status.upper(), expected) for order_id in dict.fromkeys(order_ids)]
+        for w in pending:
+            self._queue.put(w)
+        return [w.order_id for w in pending if w.future.result()]
+
+    def _ensure_thread(self):
+        # Threads do not survive fork: a prefork child starts its own
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()  # writes queued in the parent are not ours
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="status-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = settings.STATUS_WRITE_FLUSH_INTERVAL_MS / 1000
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + interval
+            while len(batch) < settings.STATUS_WRITE_MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            while batch:
+                # One write per order per statement; repeats wait for the next
+                current: dict[str, _Write] = {}
+                later: list[_Write] = []
+                for pending in batch:
+                    if pending.order_id in current:
+                        later.append(pending)
+                    else:
+                        current[pending.order_id] = pending
+                self._flush(list(current.values()))
+                batch = later
+
+    def _flush(self, writes: list[_Write]):
+        params = {"ids": [w.order_id for w in writes]}
+        for i, w in enumerate(writes):
+            params.update({f"id{i}": w.order_id, f"status{i}": w.status, f"expected{i}": w.expected})
+
+        started = time.perf_counter()
+        try:
+            with Session(self._engine) as session:
+                rows = session.execute(_flush_sql(len(writes)), params).fetchall()
+                session.commit()
+        except Exception as exc:
+            logger.warning("Status flush of %d transition(s) failed: %s", len(writes), exc)
+            for w in writes:
+                w.future.set_exception(exc)
+            return
+        STATUS_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        STATUS_FLUSH_BATCH_SIZE.observe(len(writes))
+
+        moved = {order_id: (previous, seq) for order_id, previous, _, seq in rows}
+        observe_time_in_state([(previous, seconds) for _, previous, seconds, _ in rows])
+
+        done = [w for w in writes if w.order_id in moved]
+        if done:
+            publish_order_changes_sync(
+                [status_changed(w.order_id, w.status, moved[w.order_id][1]) for w in done],
+                [(moved[w.order_id][0], w.status) for w in done],
+            )
+        for w in writes:
+            w.future.set_result(w.order_id in moved)
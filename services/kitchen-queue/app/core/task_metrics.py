@@ -0,0 +1,61 @@
+"""
+Kitchen Queue — Celery task runtime metrics (worker exporter)
+
+  kitchen_task_duration_seconds{task, outcome}  task start → end; outcome is
+                                                success, retry or failure
+                                                (its _count is the task counter)
+
+Replaces what the result backend used to record per task (STARTED, SUCCESS,
+FAILURE keys nobody read). Start times are kept per task id, so the
+threads pool's concurrent tasks are timed independently.
+
+Kitchen tasks that exhaust their retries dead-letter the work and return
+instead of raising, so task_failure never fires for them: they report
+themselves with mark_task_failed.
+"""
+import threading
+import time
+
+from celery.signals import task_failure, task_postrun, task_prerun, task_retry
+from prometheus_client import Histogram
+
+TASK_DURATION = Histogram(
+    "kitchen_task_duration_seconds", "Kitchen Celery task run time",
+    ["task", "outcome"], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+_started: dict[str, float] = {}
+_outcomes: dict[str, str] = {}
+_lock = threading.Lock()
+
+
+@task_prerun.connect
+def _task_started(task_id=None, **_):
+    with _lock:
+        _started[task_id] = time.perf_counter()
+
+
+@task_retry.connect
+def _task_retried(request=None, **_):
+    with _lock:
+        _outcomes[request.id] = "retry"
+
+
+@task_failure.connect
+def _task_failed(task_id=None, **_):
+    mark_task_failed(task_id)
+
+
+def mark_task_failed(task_id: str):
+    """Record the running task as a failure even though it returns normally."""
+    with _lock:
+        _outcomes[task_id] = "failure"
+
+
+@task_postrun.connect
+def _task_finished(task_id=None, task=None, **_):
+    with _lock:
+        started = _started.pop(task_id, None)
+        outcome = _outcomes.pop(task_id, "success")
+    if started is not None:
+        TASK_DURATION.labels(task.name, outcome).observe(time.perf_counter() - started)
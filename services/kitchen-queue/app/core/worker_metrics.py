@@ -0,0 +1,35 @@
+"""
+Kitchen Queue — Prometheus exporter for the Celery worker
+
+The FastAPI container serves /metrics itself; the worker has no web server,
+so it starts prometheus_client's HTTP server on WORKER_METRICS_PORT when the
+worker boots. Workers run the threads pool, so every task shares the one
+process-wide registry. Scraped as job "kitchen-worker".
+
+  queue depth, enqueue → start wait   app/core/queue_metrics.py
+  task run time and outcome           app/core/task_metrics.py
+  time orders spend in each status    app/db/status_history.py
+  status flush time and batch size    app/core/status_writer.py
+"""
+import logging
+
+from prometheus_client import REGISTRY, start_http_server
+
+from app.core import task_metrics  # noqa: F401  (connects the task signals)
+from app.core.config import get_settings
+from app.core.queue_metrics import QueueDepthCollector
+from app.core.redis_client import get_sync_redis
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def start_worker_metrics_server():
+    if not settings.METRICS_ENABLED:
+        return
+    REGISTRY.register(QueueDepthCollector(get_sync_redis()))
+    try:
+        start_http_server(settings.WORKER_METRICS_PORT)
+    except OSError as exc:
+        # Another worker in the same network namespace already serves it
+        logger.warning("Worker metrics server not started on :%d: %s", settings.WORKER_METRICS_PORT, exc)
@@ -0,0 +1,64 @@
+"""
+Kitchen Queue — Hot/cold split: archiving terminal orders
+
+READY and FAILED orders older than KITCHEN_ARCHIVE_AFTER_HOURS are moved
+from orders / order_items into orders_archive / order_items_archive, so
+the hot tables (and their indexes) only ever hold roughly a day of orders
+however long the semester runs.
+
+Each batch is one statement: DELETE ... RETURNING from the hot tables feeds
+INSERT into the archive tables through data-modifying CTEs, so a row is
+never in both places or in neither. Rows are claimed with SKIP LOCKED and
+in updated_at order, oldest first.
+"""
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+ARCHIVE_BATCH_SQL = text(
+    "WITH moved AS ("
+    "  DELETE FROM orders WHERE id IN ("
+    "    SELECT id FROM orders "
+    "    WHERE status IN ('READY', 'FAILED') "
+    "      AND updated_at < NOW() - make_interval(hours => :hours) "
+    "    ORDER BY updated_at LIMIT :batch FOR UPDATE SKIP LOCKED"
+    "  ) RETURNING id, student_id, status, special_notes, created_at, updated_at"
+    "), moved_items AS ("
+    "  DELETE FROM order_items WHERE order_id IN (SELECT id FROM moved) "
+    "  RETURNING id, order_id, menu_item_id, quantity"
+    "), archived_items AS ("
+    "  INSERT INTO order_items_archive (id, order_id, menu_item_id, quantity) "
+    "  SELECT id, order_id, menu_item_id, quantity FROM moved_items "
+    "  ON CONFLICT (id) DO NOTHING"
+    ") "
+    "INSERT INTO orders_archive (id, student_id, status, special_notes, created_at, updated_at) "
+    "SELECT id, student_id, status, special_notes, COALESCE(created_at, NOW()), COALESCE(updated_at, NOW()) "
+    "FROM moved "
+    "ON CONFLICT (id) DO NOTHING "
+    "RETURNING status::text"
+)
+
+
+def archive_terminal_orders(session: Session) -> Counter:
+    """
+    Archive eligible orders in batches of KITCHEN_ARCHIVE_BATCH_SIZE, one
+    commit per batch, for at most KITCHEN_ARCHIVE_MAX_BATCHES_PER_RUN
+    batches. Returns how many orders left the hot table per status
+    (lower-case).
+    """
+    archived: Counter = Counter()
+    for _ in range(settings.KITCHEN_ARCHIVE_MAX_BATCHES_PER_RUN):
+        statuses = session.execute(
+            ARCHIVE_BATCH_SQL,
+            {"hours": settings.KITCHEN_ARCHIVE_AFTER_HOURS, "batch": settings.KITCHEN_ARCHIVE_BATCH_SIZE},
+        ).scalars().all()
+        session.commit()
+        archived.update(s.lower() for s in statuses)
+        if len(statuses) < settings.KITCHEN_ARCHIVE_BATCH_SIZE:
+            break
+    return archived
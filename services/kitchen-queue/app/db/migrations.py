@@ -0,0 +1,49 @@
+"""
+Kitchen Queue — Startup schema migrations
+
+create_all only creates missing tables; indexes added to an existing table
+have to be created here. Each statement is idempotent (IF NOT EXISTS) and
+built CONCURRENTLY so a rolling deploy never blocks writes to orders. The
+API workers start together, so they serialise on an advisory lock.
+"""
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK_KEY = 804_001  # arbitrary, unique to this job
+
+# Keyset pagination order is (created_at DESC, id DESC); id is the tiebreaker
+ORDER_INDEXES = {
+    "ix_orders_status_created_at": "orders (status, created_at, id)",
+    "ix_orders_student_id_created_at": "orders (student_id, created_at, id)",
+    "ix_orders_created_at": "orders (created_at, id)",
+    # archive_terminal_orders scans terminal orders oldest-updated first
+    "ix_orders_status_updated_at": "orders (status, updated_at)",
+    # bulk export range scans (app/api/export.py) cover the archive too
+    "ix_orders_archive_created_at": "orders_archive (created_at, id)",
+}
+
+
+async def run_migrations(bind: AsyncEngine = engine):
+    async with bind.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            for name, definition in ORDER_INDEXES.items():
+                # A failed concurrent build leaves an INVALID index behind that
+                # IF NOT EXISTS would skip; drop it so it is rebuilt.
+                invalid = (await conn.execute(text(
+                    "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name AND NOT i.indisvalid"
+                ), {"name": name})).scalar()
+                if invalid:
+                    logger.warning("Rebuilding invalid index %s", name)
+                    await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
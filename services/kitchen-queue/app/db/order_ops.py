@@ -0,0 +1,100 @@
+"""
+Kitchen Queue — Manual order status transitions (advance / revert)
+
+Every transition is a single conditional UPDATE: the new status is computed
+from the current one by a CASE inside the statement, and the WHERE clause
+only matches rows that can make that move (optionally only from the status
+the caller last saw). Two staff acting on the same order can therefore
+never skip a stage, and any number of orders move in one round trip.
+The same statement appends each move to order_status_history.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.status_history import observe_time_in_state, with_history
+
+# DB enum labels are UPPER_CASE (see kitchen_tasks._update_order_status)
+NEXT_STATUS: dict[str, str] = {
+    "PENDING":        "STOCK_VERIFIED",
+    "STOCK_VERIFIED": "IN_KITCHEN",
+    "IN_KITCHEN":     "READY",
+}
+PREV_STATUS: dict[str, str] = {
+    "READY":          "IN_KITCHEN",
+    "IN_KITCHEN":     "STOCK_VERIFIED",
+    "STOCK_VERIFIED": "PENDING",
+}
+TRANSITIONS = {"advance": NEXT_STATUS, "revert": PREV_STATUS}
+
+
+def _transition_sql(moves: dict[str, str]) -> str:
+    # Labels come from the constant maps above, never from the request.
+    # prev is the locked row before the UPDATE, for order_status_history.
+    cases = " ".join(f"WHEN '{old}' THEN '{new}'" for old, new in moves.items())
+    sources = ", ".join(f"'{old}'" for old in moves)
+    return with_history(
+        f"UPDATE orders o SET status = CAST(CASE prev.status::text {cases} END AS order_status), "
+        f"updated_at = NOW() "
+        f"FROM (SELECT id, status, updated_at FROM orders WHERE id = ANY(:ids) ORDER BY id FOR UPDATE) prev "
+        f"WHERE o.id = prev.id AND prev.status::text IN ({sources}) "
+        f"AND (CAST(:expected AS text) IS NULL OR prev.status::text = :expected) "
+        f"RETURNING o.id, prev.status::text AS from_status, o.status::text AS to_status, "
+        f"prev.updated_at AS entered_at",
+        "id, to_status, from_status, seconds_in_state, seq",
+    )
+
+
+_TRANSITION_SQL = {direction: text(_transition_sql(moves)) for direction, moves in TRANSITIONS.items()}
+
+
+async def transition_orders(
+    db: AsyncSession,
+    order_ids: list[str],
+    direction: str,
+    expected_status: str | None = None,
+) -> list[dict]:
+    """
+    Advance or revert every order in order_ids in one statement and commit.
+
+    Returns one result per distinct id, in request order:
+      {"order_id", "ok": True,  "previous_status", "status", "seq" (history id)}
+      {"order_id", "ok": False, "error": not_found | status_mismatch | invalid_transition,
+       "status": current status or None}
+    Statuses in results are lower-case; expected_status is case-insensitive.
+    """
+    moves = TRANSITIONS[direction]
+    reverse = {new: old for old, new in moves.items()}
+    ids = list(dict.fromkeys(order_ids))
+    expected = expected_status.upper() if expected_status else None
+
+    rows = (await db.execute(
+        _TRANSITION_SQL[direction], {"ids": ids, "expected": expected},
+    )).fetchall()
+    await db.commit()
+    moved = {order_id: (new, seq) for order_id, new, _, _, seq in rows}
+    observe_time_in_state([(old, seconds) for _, _, old, seconds, _ in rows])
+
+    current: dict[str, str] = {}
+    missed = [i for i in ids if i not in moved]
+    if missed:
+        current = dict((await db.execute(
+            text("SELECT id, status::text FROM orders WHERE id = ANY(:ids)"), {"ids": missed},
+        )).fetchall())
+
+    results = []
+    for order_id in ids:
+        if order_id in moved:
+            new, seq = moved[order_id]
+            results.append({"order_id": order_id, "ok": True,
+                            "previous_status": reverse[new].lower(), "status": new.lower(), "seq": seq})
+            continue
+        status = current.get(order_id)
+        if status is None:
+            error = "not_found"
+        elif expected and status != expected:
+            error = "status_mismatch"
+        else:
+            error = "invalid_transition"
+        results.append({"order_id": order_id, "ok": False, "error": error,
+                        "status": status.lower() if status else None})
+    return results
@@ -0,0 +1,125 @@
+"""
+Kitchen Queue — Order status history (order_status_history)
+
+orders only keeps the current status, so every transition also appends a
+row here: when the order entered the status it left, when it left, and the
+seconds in between. The row is written by the transition's own statement —
+each status UPDATE runs as a data-modifying CTE whose RETURNING feeds the
+INSERT — so a coalesced flush of 500 transitions is still one statement and
+one commit, and history can never disagree with orders.
+
+Writers: the worker's StatusWriter flush, the stream worker, and manual
+advance / revert (app/db/order_ops.py). Each also observes
+kitchen_order_state_seconds{state} with the same durations.
+
+GET /kitchen/stats/stages turns the rows into p50 / p95 / p99 per stage over
+a window. History outlives the order's move to the archive tables and is
+purged after KITCHEN_STATUS_HISTORY_RETENTION_DAYS.
+"""
+from prometheus_client import Histogram
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+ORDER_STATE_SECONDS = Histogram(
+    "kitchen_order_state_seconds", "Time an order spent in a status before moving on",
+    ["state"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900),
+)
+
+# The forward path through the kitchen: time in each of these is a "stage"
+STAGES = {
+    "PENDING": "STOCK_VERIFIED",
+    "STOCK_VERIFIED": "IN_KITCHEN",
+    "IN_KITCHEN": "READY",
+}
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def with_history(update_sql: str, select: str) -> str:
+    """
+    Wrap a status UPDATE so it also appends history. The UPDATE must
+    RETURN id, from_status, to_status (text labels) and entered_at (the
+    row's updated_at before the UPDATE), at most one row per order; select
+    is the column list the statement returns, read from those same names
+    plus seconds_in_state and seq.
+
+    seq is the new history row's id. It is drawn while the order's row is
+    locked, so an order's transitions get increasing seqs in commit order:
+    the order lookup cache uses it to ignore an older transition published
+    after a newer one.
+    """
+    return (
+        f"WITH moved AS ({update_sql}), "
+        "recorded AS ("
+        "  INSERT INTO order_status_history "
+        "    (order_id, from_status, to_status, entered_at, changed_at, seconds_in_state) "
+        "  SELECT id, from_status, to_status, entered_at, NOW(), EXTRACT(EPOCH FROM NOW() - entered_at) "
+        "  FROM moved"
+        "  RETURNING id AS seq, order_id"
+        ") "
+        f"SELECT {select} FROM ("
+        "  SELECT moved.*, recorded.seq, EXTRACT(EPOCH FROM NOW() - moved.entered_at) AS seconds_in_state "
+        "  FROM moved JOIN recorded ON recorded.order_id = moved.id"
+        ") m"
+    )
+
+
+def observe_time_in_state(moves: list[tuple[str, float | None]]):
+    """Record (from_status, seconds_in_state) pairs in the time-in-state histogram."""
+    for from_status, seconds in moves:
+        if from_status and seconds is not None:
+            ORDER_STATE_SECONDS.labels(from_status.lower()).observe(max(0.0, float(seconds)))
+
+
+STAGE_PERCENTILES_SQL = text(
+    "SELECT from_status, COUNT(*), "
+    + ", ".join(f"percentile_cont({p}) WITHIN GROUP (ORDER BY seconds_in_state)" for p in PERCENTILES)
+    + " FROM order_status_history "
+    "WHERE changed_at >= NOW() - make_interval(mins => :minutes) "
+    "AND (from_status, to_status) IN ("
+    + ", ".join(f"('{old}', '{new}')" for old, new in STAGES.items())
+    + ") GROUP BY from_status"
+)
+
+
+async def stage_percentiles(db: AsyncSession, window_minutes: int) -> dict[str, dict]:
+    """
+    Seconds spent in each stage by orders that finished it within the last
+    window_minutes: count, p50, p95, p99 (None when no order did).
+    """
+    rows = {r[0]: r[1:] for r in (await db.execute(STAGE_PERCENTILES_SQL, {"minutes": window_minutes})).all()}
+    stages = {}
+    for stage in STAGES:
+        count, *values = rows.get(stage, (0,) + (None,) * len(PERCENTILES))
+        stages[stage.lower()] = {
+            "count": count,
+            **{f"p{round(p * 100)}": round(v, 3) if v is not None else None for p, v in zip(PERCENTILES, values)},
+        }
+    return stages
+
+
+PURGE_HISTORY_SQL = text(
+    "DELETE FROM order_status_history WHERE id IN ("
+    "  SELECT id FROM order_status_history "
+    "  WHERE changed_at < NOW() - make_interval(days => :days) LIMIT :batch"
+    ")"
+)
+
+
+def purge_status_history(session: Session) -> int:
+    """Delete history past KITCHEN_STATUS_HISTORY_RETENTION_DAYS, in bounded chunks. Commits."""
+    purged = 0
+    for _ in range(settings.KITCHEN_ARCHIVE_MAX_BATCHES_PER_RUN):
+        deleted = session.execute(PURGE_HISTORY_SQL, {
+            "days": settings.KITCHEN_STATUS_HISTORY_RETENTION_DAYS,
+            "batch": settings.KITCHEN_ARCHIVE_BATCH_SIZE,
+        }).rowcount
+        session.commit()
+        purged += deleted
+        if deleted < settings.KITCHEN_ARCHIVE_BATCH_SIZE:
+            break
+    return purged
@@ -0,0 +1,64 @@
+"""
+Kitchen Queue — Stuck-order sweeper
+
+An order can be left in PENDING / STOCK_VERIFIED / IN_KITCHEN with no task
+to move it on: its message was lost, or its task ran out of retries while
+the DB was unreachable so it could not even be marked FAILED. The
+sweep_stuck_orders beat task finds orders that have not changed for
+KITCHEN_STUCK_ORDER_AFTER_SECONDS and re-dispatches them through the
+outbox, so the relay sends them in its usual batches; process_order
+resumes each from its current status.
+
+An order is re-dispatched at most once per threshold period and at most
+KITCHEN_STUCK_MAX_DISPATCHES times in total (the outbox attempts counter);
+beyond that it is logged and left for the dead-letter tooling.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+REQUEUE_STUCK_SQL = text(
+    "INSERT INTO order_dispatch_outbox (order_id, payload, attempts, created_at) "
+    "SELECT o.id, json_build_object("
+    "  'student_id', o.student_id, "
+    "  'items', COALESCE((SELECT json_agg(json_build_object('menu_item_id', i.menu_item_id, 'quantity', i.quantity)) "
+    "                     FROM order_items i WHERE i.order_id = o.id), '[]'::json), "
+    "  'special_notes', o.special_notes"
+    "), 0, NOW() "
+    "FROM orders o "
+    "WHERE o.status IN ('PENDING', 'STOCK_VERIFIED', 'IN_KITCHEN') "
+    "  AND o.updated_at < NOW() - make_interval(secs => :age) "
+    "  AND NOT EXISTS ("
+    "    SELECT 1 FROM order_dispatch_outbox d WHERE d.order_id = o.id AND ("
+    "      d.dispatched_at IS NULL "                                     # already waiting for the relay
+    "      OR d.dispatched_at >= NOW() - make_interval(secs => :age) "   # sent recently
+    "      OR d.attempts >= :max_dispatches)"                            # given up on
+    "  ) "
+    "ORDER BY o.updated_at LIMIT :batch "
+    "ON CONFLICT (order_id) DO UPDATE SET dispatched_at = NULL, created_at = NOW() "
+    "RETURNING order_id"
+)
+
+GIVEN_UP_SQL = text(
+    "SELECT o.id FROM orders o JOIN order_dispatch_outbox d ON d.order_id = o.id "
+    "WHERE o.status IN ('PENDING', 'STOCK_VERIFIED', 'IN_KITCHEN') "
+    "  AND o.updated_at < NOW() - make_interval(secs => :age) "
+    "  AND d.attempts >= :max_dispatches "
+    "LIMIT 100"
+)
+
+
+def requeue_stuck_orders(session: Session) -> tuple[list[str], list[str]]:
+    """Re-dispatch one batch of stuck orders. Returns (requeued ids, given-up ids)."""
+    params = {
+        "age": settings.KITCHEN_STUCK_ORDER_AFTER_SECONDS,
+        "batch": settings.KITCHEN_STUCK_SWEEP_BATCH_SIZE,
+        "max_dispatches": settings.KITCHEN_STUCK_MAX_DISPATCHES,
+    }
+    requeued = session.execute(REQUEUE_STUCK_SQL, params).scalars().all()
+    session.commit()
+    given_up = session.execute(GIVEN_UP_SQL, params).scalars().all()
+    return list(requeued), list(given_up)
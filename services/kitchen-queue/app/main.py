@@ -1,13 +1,20 @@
 """
 Kitchen Queue — FastAPI entrypoint
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import REGISTRY
 from prometheus_fastapi_instrumentator import Instrumentator
 from app.core.config import get_settings
+from app.core.capacity import run_capacity_refresh
+from app.core.dispatch_relay import run_dispatch_relay
+from app.core.redis_client import close_redis, get_sync_redis
+from app.core.order_stats import OrderStatsCollector
 from app.db.database import engine, Base
-from app.api import kitchen, health
+from app.db.migrations import run_migrations
+from app.api import kitchen, board, dead_letters, export, health
 
 settings = get_settings()
 
@@ -15,16 +22,28 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await run_migrations()
+
+    stop = asyncio.Event()
+    relay = asyncio.create_task(run_dispatch_relay(stop))
+    capacity = asyncio.create_task(run_capacity_refresh(stop))
     yield
+    stop.set()
+    await asyncio.gather(relay, capacity)
+    await close_redis()
     await engine.dispose()
 
 app = FastAPI(title="TrioTect Kitchen Queue", version=settings.SERVICE_VERSION,
               lifespan=lifespan, docs_url="/docs" if settings.DEBUG else None, redoc_url=None)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
-                   allow_methods=["*"], allow_headers=["*"])
+                   allow_methods=["*"], allow_headers=["*"], expose_headers=[kitchen.NEXT_CURSOR_HEADER])
 if settings.METRICS_ENABLED:
     Instrumentator().instrument(app).expose(app, endpoint="/metrics")
+    REGISTRY.register(OrderStatsCollector(get_sync_redis()))
 app.include_router(kitchen.router)
+app.include_router(board.router)
+app.include_router(dead_letters.router)
+app.include_router(export.router)
 app.include_router(health.router)
 
 @app.get("/")
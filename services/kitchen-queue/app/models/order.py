@@ -1,13 +1,19 @@
 """
 Kitchen Queue — Order DB models
 
-[TRANSACTIONAL DATA] — orders and state transitions are wiped on reset.
+[TRANSACTIONAL DATA] — orders, their items, the dispatch outbox, the
+archive tables and the status history are wiped on reset.
+
+orders / order_items are the hot tables: live and recently finished orders.
+Terminal (READY/FAILED) orders are moved to orders_archive /
+order_items_archive by the archive_terminal_orders beat task
+(app/db/archive.py) once they are older than KITCHEN_ARCHIVE_AFTER_HOURS.
 """
 import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import String, Integer, DateTime, func, Text, Enum
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, BigInteger, DateTime, Float, func, Text, Enum, Index, JSON, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.database import Base
 
 
@@ -23,6 +29,8 @@ class Order(Base):
     """
     [TRANSACTIONAL DATA] — wiped on reset.
     Tracks order state through the kitchen pipeline.
+    Listing indexes on (status|student_id, created_at, id) are created by
+    app/db/migrations.py.
     """
     __tablename__ = "orders"
 
@@ -37,6 +45,15 @@ class Order(Base):
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
+    # No FK in the schema, so the join is spelled out. Read-only and
+    # lazy="raise": listings must eager-load items (selectinload) instead of
+    # issuing one query per order.
+    items: Mapped[list["OrderItem"]] = relationship(
+        primaryjoin="Order.id == foreign(OrderItem.order_id)",
+        viewonly=True,
+        lazy="raise",
+    )
+
 
 class OrderItem(Base):
     """
@@ -48,3 +65,85 @@ class OrderItem(Base):
     order_id: Mapped[str] = mapped_column(String(36), index=True, nullable=False)
     menu_item_id: Mapped[str] = mapped_column(String(36), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class OrderArchive(Base):
+    """
+    [TRANSACTIONAL DATA] — wiped on reset.
+    Cold copy of a terminal order; same columns as orders plus archived_at.
+    Read by the student history listing, never by the display board.
+    """
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_student_id_created_at", "student_id", "created_at", "id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    student_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(Enum(OrderStatus, name="order_status"), nullable=False)
+    special_notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    items: Mapped[list["OrderItemArchive"]] = relationship(
+        primaryjoin="OrderArchive.id == foreign(OrderItemArchive.order_id)",
+        viewonly=True,
+        lazy="raise",
+    )
+
+
+class OrderItemArchive(Base):
+    """
+    [TRANSACTIONAL DATA] — wiped on reset.
+    """
+    __tablename__ = "order_items_archive"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    order_id: Mapped[str] = mapped_column(String(36), index=True, nullable=False)
+    menu_item_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class OrderDispatch(Base):
+    """
+    [TRANSACTIONAL DATA] — wiped on reset.
+    Transactional outbox: one row per order that still has to be (or has
+    been) handed to the Celery process_order task. Written in the same
+    commit as the order itself, published by app/core/dispatch_relay.py.
+    """
+    __tablename__ = "order_dispatch_outbox"
+    __table_args__ = (
+        # The relay only ever scans undispatched rows
+        Index("ix_order_dispatch_outbox_pending", "id", postgresql_where=text("dispatched_at IS NULL")),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    order_id: Mapped[str] = mapped_column(String(36), unique=True, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)  # process_order kwargs
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    dispatched_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class OrderStatusHistory(Base):
+    """
+    [TRANSACTIONAL DATA] — wiped on reset.
+    Append-only: one row per status transition, written by the transition's
+    own UPDATE statement (app/db/status_history.py). Statuses are the DB
+    labels (upper-case). Kept after the order is archived.
+    """
+    __tablename__ = "order_status_history"
+    __table_args__ = (
+        Index("ix_order_status_history_changed_at", "changed_at"),
+        Index("ix_order_status_history_order_id", "order_id", "changed_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    order_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    from_status: Mapped[str] = mapped_column(String(20), nullable=False)
+    to_status: Mapped[str] = mapped_column(String(20), nullable=False)
+    entered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)  # into from_status
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    seconds_in_state: Mapped[float | None] = mapped_column(Float, nullable=True)
@@ -2,58 +2,233 @@
 Kitchen Queue — Celery tasks (order state machine)
 
 Worker processes these tasks asynchronously, separate from the FastAPI container.
-State transitions: PENDING → STOCK_VERIFIED → IN_KITCHEN → READY
-On each state change, notifies Notification Hub via HTTP.
+State transitions: PENDING → STOCK_VERIFIED → IN_KITCHEN → READY, each a
+compare-and-set, so retries resume from the order's current state.
+On each state change, notifies Notification Hub by publishing to its Redis
+channel order:{order_id} (HTTP POST /notifications/publish as a fallback).
+Prep time is not slept through: process_order schedules finish_order with a
+countdown and returns, so a worker slot is only held while work runs.
+With KITCHEN_BATCHING_ENABLED, orders are cooked in cross-order batches of
+the same item instead (app/core/cooking_batches.py): start_cooking_batch and
+finish_cooking_batch move all of a batch's orders in one bulk transition
+and one notification fan-out.
+Orders that fail for good have their stock given back in batches via
+Stock Service POST /stock/restore.
 """
 import asyncio
+import json
 import logging
 import random
-import time
 
 import httpx
+from celery.signals import worker_init, worker_shutdown
+from redis.exceptions import LockError
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import Session
 
 from app.core.celery_app import celery_app
 from app.core.config import get_settings
+from app.core.cooking_batches import BATCH_ORDERS, close_batch, finish_batch, join_batches
+from app.core.dead_letters import record_dead_letter
+from app.core.order_stats import reconcile_status_counts, stage_status_removals
+from app.core.redis_client import get_sync_redis
+from app.core.status_writer import StatusWriter
+from app.core.task_metrics import mark_task_failed
+from app.core.worker_metrics import start_worker_metrics_server
+from app.db.archive import archive_terminal_orders as _archive_batches
+from app.db.status_history import purge_status_history
+from app.db.stuck_orders import requeue_stuck_orders
 from app.models.order import OrderStatus
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
 # Sync engine for Celery (Celery tasks are not async-native)
-sync_engine = create_engine(settings.sync_database_url, pool_pre_ping=True)
+sync_engine = create_engine(settings.sync_database_url, pool_pre_ping=True, pool_size=10, max_overflow=20)
 
+# Status transitions from all tasks in this process share one UPDATE per flush
+status_writer = StatusWriter(sync_engine)
 
-def _update_order_status(order_id: str, status: str):
+# Notification Hub streams whatever is published here to the student's SSE
+# connection (services/notification-hub/app/api/notifications.py)
+NOTIFICATION_CHANNEL = "order:{order_id}"
+
+# Order ids whose stock must be returned; drained by restore_failed_order_stock
+STOCK_RESTORE_QUEUE = "kitchen:stock_restore"
+STOCK_RESTORE_LOCK = "kitchen:stock_restore:lock"
+
+# One keep-alive HTTP client per worker (hub fallback, stock restore)
+_http_client: httpx.Client | None = None
+
+
+@worker_init.connect
+def _init_worker(**_):
+    """
+    The workers run --pool=threads: one process whose task threads share
+    the DB engine, the Redis client and the HTTP client, created here once
+    and reused by every task (their connection pools fill on first use).
+    """
+    start_worker_metrics_server()
+    get_sync_redis()
+    _get_http_client()
+
+
+@worker_shutdown.connect
+def _close_worker(**_):
+    if _http_client is not None:
+        _http_client.close()
+    sync_engine.dispose()
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:  # opened by worker_init; eager tasks get here first
+        _http_client = httpx.Client(timeout=3.0)
+    return _http_client
+
+
+def _update_order_status(order_id: str, status: str, expected: str | None = None) -> bool:
     """Synchronously update order status in DB.
 
     The Postgres enum type uses UPPER_CASE labels (created before the Python
     model switched to lower-case values).  Raw text() queries bypass SQLAlchemy's
     ORM enum mapping, so we cast to uppercase explicitly.
+
+    With expected set, the order only moves if it is currently in that status.
+    Returns whether a row was updated.
+
+    Writes from concurrent tasks are coalesced by status_writer, which also
+    publishes the board events and counter updates once committed.
     """
-    db_val = status.upper()          # e.g. "stock_verified" → "STOCK_VERIFIED"
+    return status_writer.write(order_id, status, expected)
+
+
+def _update_order_statuses(order_ids: list[str], status: str, expected: str | None = None) -> list[str]:
+    """_update_order_status for many orders in one statement; returns the ids that moved."""
+    return status_writer.write_many(order_ids, status, expected)
+
+
+def _current_status(order_id: str) -> str | None:
+    """Current order status as the upper-case DB label, or None if unknown."""
     with Session(sync_engine) as session:
-        session.execute(
-            text("UPDATE orders SET status = CAST(:status AS order_status), updated_at = NOW() WHERE id = :id"),
-            {"status": db_val, "id": order_id},
-        )
-        session.commit()
+        return session.execute(
+            text("SELECT status::text FROM orders WHERE id = :id"), {"id": order_id}
+        ).scalar_one_or_none()
 
 
 def _notify_hub(order_id: str, status: str, student_id: str):
     """Push state change to Notification Hub."""
+    payload = {"order_id": order_id, "status": status, "student_id": student_id}
+    if settings.NOTIFY_VIA_REDIS:
+        try:
+            get_sync_redis().publish(NOTIFICATION_CHANNEL.format(order_id=order_id), json.dumps(payload))
+            return
+        except Exception as exc:
+            logger.warning("Redis publish failed, notifying hub over HTTP: %s", exc)
+    _post_to_hub(payload)
+
+
+def _notify_hub_many(orders: dict[str, str], status: str):
+    """_notify_hub for many orders (order_id → student_id), in one Redis round trip."""
+    payloads = [{"order_id": o, "status": status, "student_id": s} for o, s in orders.items()]
+    if not payloads:
+        return
+    if settings.NOTIFY_VIA_REDIS:
+        try:
+            pipe = get_sync_redis().pipeline(transaction=False)
+            for payload in payloads:
+                pipe.publish(NOTIFICATION_CHANNEL.format(order_id=payload["order_id"]), json.dumps(payload))
+            pipe.execute()
+            return
+        except Exception as exc:
+            logger.warning("Redis publish failed, notifying hub over HTTP: %s", exc)
+    for payload in payloads:
+        _post_to_hub(payload)
+
+
+def _post_to_hub(payload: dict):
     try:
-        with httpx.Client(timeout=3.0) as client:
-            client.post(
-                f"{settings.NOTIFICATION_HUB_URL}/notifications/publish",
-                json={"order_id": order_id, "status": status, "student_id": student_id},
-            )
+        _get_http_client().post(f"{settings.NOTIFICATION_HUB_URL}/notifications/publish", json=payload)
     except Exception as exc:
         # Notification failures MUST NOT affect order processing
         logger.warning("Notification Hub unreachable: %s", exc)
 
 
+def _queue_stock_restore(order_id: str):
+    """Schedule a failed order's stock to be returned by the next batch flush."""
+    try:
+        get_sync_redis().rpush(STOCK_RESTORE_QUEUE, order_id)
+    except Exception as exc:
+        logger.error("Could not queue stock restore for order %s: %s", order_id, exc)
+
+
+# process_order's steps, each a compare-and-set from the previous state
+PIPELINE_STEPS = [
+    (OrderStatus.PENDING, OrderStatus.STOCK_VERIFIED),
+    (OrderStatus.STOCK_VERIFIED, OrderStatus.IN_KITCHEN),
+]
+TERMINAL_STATUSES = {OrderStatus.READY.name, OrderStatus.FAILED.name}
+
+
+def _advance(order_id: str, student_id: str, old: OrderStatus, new: OrderStatus) -> str | None:
+    """
+    Move the order old → new and notify. If it was not in old (a concurrent
+    or earlier attempt got there first), nothing is written or sent.
+    Returns the status the order is in afterwards.
+    """
+    if _update_order_status(order_id, new, expected=old):
+        _notify_hub(order_id, new, student_id)
+        logger.info("Order %s: %s", order_id, new.value)
+        return new.name
+    return _current_status(order_id)
+
+
+def _join_cooking_batches(order_id: str, student_id: str, items: list) -> bool:
+    """
+    Hand a STOCK_VERIFIED order to its items' cooking batches, scheduling
+    each batch's start when this order opened or filled it. Returns False if
+    there was nothing to join (no items, or a repeated dispatch of an order
+    that already joined): the caller then cooks it on its own.
+    """
+    joined = join_batches(get_sync_redis(), order_id, student_id, items)
+    for batch_id, opened, full in joined:
+        if full:
+            start_cooking_batch.apply_async(kwargs={"batch_id": batch_id})
+        elif opened:
+            start_cooking_batch.apply_async(
+                kwargs={"batch_id": batch_id}, countdown=settings.KITCHEN_BATCH_MAX_WAIT_SECONDS,
+            )
+    if joined:
+        logger.info("Order %s: waiting in cooking batch(es) %s", order_id, [b for b, _, _ in joined])
+    return bool(joined)
+
+
+def _give_up(task, exc: Exception):
+    """
+    Retries exhausted: dead-letter the task, then fail the order. If even
+    that fails (DB down), the order stays open for the stuck-order sweeper
+    and dead-letter replay.
+    """
+    mark_task_failed(task.request.id)
+    kwargs = dict(task.request.kwargs or {})
+    record_dead_letter(get_sync_redis(), task.name, kwargs, exc, task.request.retries)
+    try:
+        _fail_order(kwargs["order_id"], kwargs["student_id"])
+    except Exception as fail_exc:
+        logger.error("Order %s could not be marked failed: %s", kwargs["order_id"], fail_exc)
+
+
+def _fail_order(order_id: str, student_id: str):
+    """Final failure: mark FAILED (unless already terminal) and give the stock back, once."""
+    status = _current_status(order_id)
+    while status is not None and status not in TERMINAL_STATUSES:
+        if _update_order_status(order_id, OrderStatus.FAILED, expected=status):
+            _notify_hub(order_id, OrderStatus.FAILED, student_id)
+            _queue_stock_restore(order_id)
+            return
+        status = _current_status(order_id)  # moved under us; try again from there
+
+
 @celery_app.task(
     name="process_order",
     bind=True,
@@ -65,29 +240,238 @@ def process_order(self, order_id: str, student_id: str, items: list, special_not
     """
     Full kitchen processing pipeline for a single order.
     Runs in a separate Celery worker container, completely isolated from FastAPI.
+
+    Resumable and idempotent: every attempt (a retry, a redelivery, or a
+    duplicate dispatch from the at-least-once outbox) starts from the
+    order's current status, and each step is a compare-and-set, so a step
+    already done is never written or notified twice. The order is only
+    marked FAILED once retries are exhausted.
+    """
+    try:
+        status = _current_status(order_id)
+        if status is None or status in TERMINAL_STATUSES:
+            logger.info("Order %s: %s, nothing to do", order_id, status or "unknown")
+            return
+
+        for old, new in PIPELINE_STEPS:
+            if status == old.name:
+                if (
+                    new == OrderStatus.IN_KITCHEN
+                    and settings.KITCHEN_BATCHING_ENABLED
+                    and _join_cooking_batches(order_id, student_id, items)
+                ):
+                    return  # its batches move it on from here
+                status = _advance(order_id, student_id, old, new)
+
+        if status != OrderStatus.IN_KITCHEN.name:
+            # Reverted or finished by someone else meanwhile: not ours to continue
+            logger.info("Order %s: now %s, pipeline stops here", order_id, status)
+            return
+
+        # Simulate kitchen prep time (3–7 seconds as per SRS). The order is
+        # finished by a continuation task once prep is over; the worker slot
+        # is free for other orders in the meantime. A duplicate continuation
+        # is harmless: finish_order is a compare-and-set too.
+        prep_time = random.uniform(settings.KITCHEN_MIN_PREP_SECONDS, settings.KITCHEN_MAX_PREP_SECONDS)
+        finish_order.apply_async(
+            kwargs={"order_id": order_id, "student_id": student_id, "prep_time": prep_time},
+            countdown=prep_time,
+        )
+
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            # No more retries → this order will never be cooked
+            logger.exception("Order %s processing failed for good", order_id)
+            _give_up(self, exc)
+            return
+        logger.warning("Order %s processing failed, retrying from its current state: %s", order_id, exc)
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(
+    name="finish_order",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=5,
+    acks_late=True,
+)
+def finish_order(self, order_id: str, student_id: str, prep_time: float):
+    """
+    State 3: Ready — the continuation of process_order, run once prep time
+    is over. Only moves an order that is still IN_KITCHEN, so a redelivered
+    or duplicate continuation is a no-op.
     """
     try:
-        # ── State 1: Stock Verified ──────────────────────────────────────────
-        _update_order_status(order_id, OrderStatus.STOCK_VERIFIED)
-        _notify_hub(order_id, OrderStatus.STOCK_VERIFIED, student_id)
-        logger.info("Order %s: stock verified", order_id)
+        if _advance(order_id, student_id, OrderStatus.IN_KITCHEN, OrderStatus.READY) == OrderStatus.READY.name:
+            logger.info("Order %s: ready for pickup after %.1fs", order_id, prep_time)
 
-        # ── State 2: In Kitchen ──────────────────────────────────────────────
-        _update_order_status(order_id, OrderStatus.IN_KITCHEN)
-        _notify_hub(order_id, OrderStatus.IN_KITCHEN, student_id)
-        logger.info("Order %s: in kitchen", order_id)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.exception("Order %s finishing failed for good", order_id)
+            _give_up(self, exc)
+            return
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(
+    name="start_cooking_batch",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=5,
+    acks_late=True,
+)
+def start_cooking_batch(self, batch_id: str):
+    """
+    A cooking batch is full or has waited KITCHEN_BATCH_MAX_WAIT_SECONDS:
+    close it, move its STOCK_VERIFIED orders to IN_KITCHEN in one statement
+    and one notification fan-out, and schedule finish_cooking_batch after
+    the prep time. Whichever of the two triggers comes second is a no-op.
+    """
+    try:
+        closed, members = close_batch(get_sync_redis(), batch_id)
+        if not closed and not self.request.retries:
+            return  # started by the other trigger
+        moved = _update_order_statuses(list(members), OrderStatus.IN_KITCHEN, expected=OrderStatus.STOCK_VERIFIED)
+        _notify_hub_many({o: members[o] for o in moved}, OrderStatus.IN_KITCHEN)
+        BATCH_ORDERS.observe(len(members))
 
-        # Simulate kitchen prep time (3–7 seconds as per SRS)
+        # One prep time for the whole batch: that is where the throughput comes from
         prep_time = random.uniform(settings.KITCHEN_MIN_PREP_SECONDS, settings.KITCHEN_MAX_PREP_SECONDS)
-        time.sleep(prep_time)
+        finish_cooking_batch.apply_async(kwargs={"batch_id": batch_id, "prep_time": prep_time}, countdown=prep_time)
+        logger.info("Cooking batch %s: %d order(s) in the kitchen", batch_id, len(moved))
+
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            # Its orders stay STOCK_VERIFIED; the stuck-order sweeper re-dispatches them
+            logger.exception("Cooking batch %s could not be started", batch_id)
+            mark_task_failed(self.request.id)
+            return
+        raise self.retry(exc=exc)
+
 
-        # ── State 3: Ready ───────────────────────────────────────────────────
-        _update_order_status(order_id, OrderStatus.READY)
-        _notify_hub(order_id, OrderStatus.READY, student_id)
-        logger.info("Order %s: ready for pickup after %.1fs", order_id, prep_time)
+@celery_app.task(
+    name="finish_cooking_batch",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=5,
+    acks_late=True,
+)
+def finish_cooking_batch(self, batch_id: str, prep_time: float):
+    """
+    A cooking batch is done: every member order with no other batch left to
+    wait for moves IN_KITCHEN → READY in one statement and one notification
+    fan-out. Repeats return the same orders, and the move is a
+    compare-and-set, so a redelivery or retry is harmless.
+    """
+    try:
+        done = finish_batch(get_sync_redis(), batch_id)
+        ready = _update_order_statuses(list(done), OrderStatus.READY, expected=OrderStatus.IN_KITCHEN)
+        _notify_hub_many({o: done[o] for o in ready}, OrderStatus.READY)
+        logger.info("Cooking batch %s: %d order(s) ready after %.1fs", batch_id, len(ready), prep_time)
 
     except Exception as exc:
-        logger.exception("Order %s processing failed", order_id)
-        _update_order_status(order_id, OrderStatus.FAILED)
-        _notify_hub(order_id, OrderStatus.FAILED, student_id)
+        if self.request.retries >= self.max_retries:
+            # Its orders stay IN_KITCHEN; the stuck-order sweeper re-dispatches them
+            logger.exception("Cooking batch %s could not be finished", batch_id)
+            mark_task_failed(self.request.id)
+            return
         raise self.retry(exc=exc)
+
+
+@celery_app.task(name="restore_failed_order_stock", ignore_result=True)
+def restore_failed_order_stock():
+    """
+    Periodic (beat): return stock for failed orders, STOCK_RESTORE_BATCH_SIZE
+    order ids per Stock Service call.
+
+    Ids are read with LRANGE and only trimmed after Stock Service accepted the
+    batch, so a crash or an unreachable Stock Service leaves them queued for
+    the next run; /stock/restore is idempotent, so re-sending is safe.
+    """
+    redis = get_sync_redis()
+    # Token lock: released only if still ours, so a flush that outlived the
+    # timeout cannot free the next flush's lock
+    lock = redis.lock(STOCK_RESTORE_LOCK, timeout=60, blocking=False)
+    if not lock.acquire():
+        return  # previous flush still running
+    try:
+        client = _get_http_client()
+        while True:
+            order_ids = redis.lrange(STOCK_RESTORE_QUEUE, 0, settings.STOCK_RESTORE_BATCH_SIZE - 1)
+            if not order_ids:
+                return
+            r = client.post(
+                f"{settings.STOCK_SERVICE_URL}/stock/restore", json={"order_ids": order_ids}, timeout=10.0,
+            )
+            r.raise_for_status()
+            redis.ltrim(STOCK_RESTORE_QUEUE, len(order_ids), -1)
+            logger.info("Restored stock for %d failed order(s)", len(r.json()["restored_order_ids"]))
+    except Exception as exc:
+        logger.warning("Stock restore flush failed, will retry next run: %s", exc)
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("Stock restore lock expired before the flush finished")
+
+
+@celery_app.task(name="reconcile_order_stats", ignore_result=True)
+def reconcile_order_stats():
+    """
+    Periodic (beat): correct the Redis status counters from the orders table
+    once the same drift from missed increments is seen on two runs in a row.
+    """
+    try:
+        with Session(sync_engine) as session:
+            corrections = reconcile_status_counts(get_sync_redis(), session)
+    except Exception as exc:
+        logger.warning("Order stats reconcile failed, will retry next run: %s", exc)
+        return
+    if corrections:
+        logger.warning("Order status counters drifted, corrected by %s", corrections)
+
+
+@celery_app.task(name="archive_terminal_orders", ignore_result=True)
+def archive_terminal_orders():
+    """
+    Periodic (beat): move READY/FAILED orders past KITCHEN_ARCHIVE_AFTER_HOURS
+    to the archive tables and take them off the hot-table status counters;
+    drop status history past KITCHEN_STATUS_HISTORY_RETENTION_DAYS.
+    """
+    try:
+        with Session(sync_engine) as session:
+            archived = _archive_batches(session)
+            purged = purge_status_history(session)
+    except Exception as exc:
+        logger.warning("Order archiving failed, will retry next run: %s", exc)
+        return
+    if purged:
+        logger.info("Purged %d status history row(s)", purged)
+    if not archived:
+        return
+    try:
+        pipe = get_sync_redis().pipeline(transaction=False)
+        stage_status_removals(pipe, archived)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Could not update counters after archiving: %s", exc)  # reconcile fixes it
+    logger.info("Archived %d terminal order(s): %s", sum(archived.values()), dict(archived))
+
+
+@celery_app.task(name="sweep_stuck_orders", ignore_result=True)
+def sweep_stuck_orders():
+    """
+    Periodic (beat): re-dispatch orders stuck in a non-terminal state for
+    longer than KITCHEN_STUCK_ORDER_AFTER_SECONDS (app/db/stuck_orders.py).
+    """
+    try:
+        with Session(sync_engine) as session:
+            requeued, given_up = requeue_stuck_orders(session)
+    except Exception as exc:
+        logger.warning("Stuck-order sweep failed, will retry next run: %s", exc)
+        return
+    if requeued:
+        logger.warning("Re-dispatched %d stuck order(s): %s", len(requeued), requeued[:20])
+    if given_up:
+        logger.error("%d order(s) still stuck after %d dispatches: %s",
+                     len(given_up), settings.KITCHEN_STUCK_MAX_DISPATCHES, given_up[:20])
@@ -0,0 +1,297 @@
+"""
+Kitchen Queue — Asyncio order worker on Redis Streams (KITCHEN_DISPATCH_BACKEND=stream)
+
+An alternative to the Celery kitchen-worker for the order pipeline:
+
+    python -m app.tasks.stream_worker
+
+One process and one event loop run up to KITCHEN_STREAM_CONCURRENCY orders
+at once, each a coroutine instead of a worker slot: prep time is an
+asyncio.sleep, and DB and Redis calls go through the API's async engine
+(app/db/database.py) and client. Every step is the same compare-and-set as
+process_order / finish_order, so an order resumes from its current status
+whichever worker (stream or Celery) picks it up.
+
+  read     XREADGROUP from kitchen:orders as consumer {host}-{pid}, only as
+           many entries as there are free pipeline slots
+  ack      XACK once the pipeline is over (READY, FAILED, or nothing to do)
+  retry    a failing pipeline is retried in place (3 times, 5 s apart, as
+           the Celery tasks); then it is dead-lettered and the order failed
+  claim    every KITCHEN_STREAM_CLAIM_INTERVAL_SECONDS, XAUTOCLAIM entries
+           another consumer left unacked for KITCHEN_STREAM_CLAIM_IDLE_SECONDS
+           (it crashed, or was killed before its drain finished)
+  drain    SIGTERM / SIGINT stop reading; in-flight orders get
+           KITCHEN_STREAM_DRAIN_SECONDS to finish, the rest are cancelled
+           unacked and claimed by another consumer later
+
+Cooking batches (KITCHEN_BATCHING_ENABLED) are Celery-only: this worker
+cooks every order on its own. The stuck-order sweeper and dead-letter
+replay keep working through the outbox and Celery respectively.
+
+Metrics (WORKER_METRICS_PORT):
+  kitchen_stream_in_flight              order pipelines running
+  kitchen_stream_orders_total{outcome}  entries acked: done / failed
+  kitchen_order_state_seconds{state}    as the Celery worker (app/db/status_history.py)
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import signal
+import socket
+
+import httpx
+from prometheus_client import Counter, Gauge, start_http_server
+from redis.exceptions import ResponseError
+from sqlalchemy import text
+
+from app.core.board_events import status_changed
+from app.core.config import get_settings
+from app.core.dead_letters import record_dead_letter
+from app.core.order_events import publish_order_changes
+from app.core.order_stream import ORDER_STREAM, ORDER_STREAM_GROUP
+from app.core.redis_client import close_redis, get_redis, get_sync_redis
+from app.db.database import AsyncSessionLocal, engine
+from app.db.status_history import observe_time_in_state, with_history
+from app.models.order import OrderStatus
+from app.tasks.kitchen_tasks import NOTIFICATION_CHANNEL, PIPELINE_STEPS, STOCK_RESTORE_QUEUE, TERMINAL_STATUSES
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Same retry policy as the Celery tasks (max_retries=3, default_retry_delay=5)
+MAX_ATTEMPTS = 4
+RETRY_DELAY_SECONDS = 5
+
+IN_FLIGHT = Gauge("kitchen_stream_in_flight", "Order pipelines running in this stream worker")
+ORDERS_DONE = Counter("kitchen_stream_orders_total", "Order stream entries acknowledged", ["outcome"])
+
+# Returns how long the order was in :expected (the locked prev row is its state before the UPDATE)
+_SET_STATUS_SQL = text(with_history(
+    "UPDATE orders o SET status = CAST(:status AS order_status), updated_at = NOW() "
+    "FROM (SELECT id, status, updated_at FROM orders WHERE id = :id FOR UPDATE) prev "
+    "WHERE o.id = prev.id AND prev.status::text = :expected "
+    "RETURNING o.id, prev.status::text AS from_status, o.status::text AS to_status, "
+    "prev.updated_at AS entered_at",
+    "seconds_in_state, seq",
+))
+
+
+async def _current_status(order_id: str) -> str | None:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            text("SELECT status::text FROM orders WHERE id = :id"), {"id": order_id}
+        )).scalar_one_or_none()
+
+
+async def _set_status(order_id: str, status: OrderStatus, expected: str) -> bool:
+    """Compare-and-set expected → status (DB labels); publishes board and counters once committed."""
+    async with AsyncSessionLocal() as db:
+        moved = (await db.execute(
+            _SET_STATUS_SQL, {"id": order_id, "status": status.name, "expected": expected},
+        )).first()
+        await db.commit()
+    if moved:
+        observe_time_in_state([(expected, moved[0])])
+        await publish_order_changes([status_changed(order_id, status.name, moved[1])], [(expected, status.name)])
+    return moved is not None
+
+
+class StreamWorker:
+    """Consumes kitchen:orders until stop is set, then drains."""
+
+    def __init__(self, redis, consumer: str):
+        self.redis = redis
+        self.consumer = consumer
+        self.stop = asyncio.Event()
+        self._running: dict[str, asyncio.Task] = {}  # entry id → pipeline
+        self._http = httpx.AsyncClient(timeout=3.0)
+
+    async def run(self):
+        await self._ensure_group()
+        claimer = asyncio.create_task(self._claim_loop())
+        logger.info("Stream worker %s consuming %s", self.consumer, ORDER_STREAM)
+        try:
+            while not self.stop.is_set():
+                free = settings.KITCHEN_STREAM_CONCURRENCY - len(self._running)
+                if free <= 0:
+                    await asyncio.wait(self._running.values(), timeout=1, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                try:
+                    response = await self.redis.xreadgroup(
+                        ORDER_STREAM_GROUP, self.consumer, {ORDER_STREAM: ">"},
+                        count=min(free, settings.KITCHEN_STREAM_READ_COUNT), block=1000,
+                    )
+                except Exception as exc:
+                    logger.warning("XREADGROUP failed: %s", exc)
+                    await asyncio.sleep(1)
+                    continue
+                for _, entries in response or []:
+                    for entry_id, fields in entries:
+                        self._start(entry_id, fields)
+        finally:
+            claimer.cancel()
+            await self._drain()
+            await self._http.aclose()
+
+    async def _ensure_group(self):
+        try:
+            await self.redis.xgroup_create(ORDER_STREAM, ORDER_STREAM_GROUP, id="0", mkstream=True)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):
+                raise
+
+    def _start(self, entry_id: str, fields: dict):
+        if entry_id in self._running:
+            return  # claimed back while still running here
+        task = asyncio.create_task(self._handle(entry_id, fields))
+        self._running[entry_id] = task
+        IN_FLIGHT.inc()
+
+        def _done(_):
+            self._running.pop(entry_id, None)
+            IN_FLIGHT.dec()
+        task.add_done_callback(_done)
+
+    async def _claim_loop(self):
+        """Take over entries other consumers left unacknowledged."""
+        idle_ms = int(settings.KITCHEN_STREAM_CLAIM_IDLE_SECONDS * 1000)
+        while not self.stop.is_set():
+            try:
+                start = "0-0"
+                while not self.stop.is_set():
+                    free = settings.KITCHEN_STREAM_CONCURRENCY - len(self._running)
+                    if free <= 0:
+                        break
+                    start, claimed, deleted = await self.redis.xautoclaim(
+                        ORDER_STREAM, ORDER_STREAM_GROUP, self.consumer, idle_ms,
+                        start_id=start, count=min(free, settings.KITCHEN_STREAM_READ_COUNT),
+                    )
+                    if deleted:  # trimmed from the stream; the stuck-order sweeper covers them
+                        await self.redis.xack(ORDER_STREAM, ORDER_STREAM_GROUP, *deleted)
+                    for entry_id, fields in claimed:
+                        if fields:
+                            logger.warning("Claimed order stream entry %s", entry_id)
+                            self._start(entry_id, fields)
+                    if start == "0-0":
+                        break
+            except Exception as exc:
+                logger.warning("XAUTOCLAIM failed: %s", exc)
+            try:
+                await asyncio.wait_for(self.stop.wait(), timeout=settings.KITCHEN_STREAM_CLAIM_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _drain(self):
+        if not self._running:
+            return
+        logger.info("Draining %d in-flight order(s)", len(self._running))
+        _, pending = await asyncio.wait(self._running.values(), timeout=settings.KITCHEN_STREAM_DRAIN_SECONDS)
+        for task in pending:
+            task.cancel()  # left unacked: another consumer claims it
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            logger.warning("%d order(s) not finished before shutdown, left for another consumer", len(pending))
+
+    async def _handle(self, entry_id: str, fields: dict):
+        kwargs = json.loads(fields["kwargs"])
+        outcome = "done"
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                await self._process(**kwargs)
+                break
+            except Exception as exc:
+                if attempt == MAX_ATTEMPTS - 1:
+                    logger.exception("Order %s processing failed for good", kwargs.get("order_id"))
+                    await self._give_up(kwargs, exc, attempt)
+                    outcome = "failed"
+                    break
+                logger.warning("Order %s processing failed, retrying from its current state: %s",
+                               kwargs.get("order_id"), exc)
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+        try:
+            await self.redis.xack(ORDER_STREAM, ORDER_STREAM_GROUP, entry_id)
+        except Exception as exc:
+            # Redelivered after the claim timeout; the pipeline is a no-op by then
+            logger.warning("Could not ack order stream entry %s: %s", entry_id, exc)
+        ORDERS_DONE.labels(outcome).inc()
+
+    async def _process(self, order_id: str, student_id: str, items: list, special_notes: str | None = None):
+        """process_order + finish_order, awaiting prep time instead of scheduling a continuation."""
+        status = await _current_status(order_id)
+        if status is None or status in TERMINAL_STATUSES:
+            logger.info("Order %s: %s, nothing to do", order_id, status or "unknown")
+            return
+
+        for old, new in PIPELINE_STEPS:
+            if status == old.name:
+                status = await self._advance(order_id, student_id, old, new)
+        if status != OrderStatus.IN_KITCHEN.name:
+            logger.info("Order %s: now %s, pipeline stops here", order_id, status)
+            return
+
+        prep_time = random.uniform(settings.KITCHEN_MIN_PREP_SECONDS, settings.KITCHEN_MAX_PREP_SECONDS)
+        await asyncio.sleep(prep_time)
+        if await self._advance(order_id, student_id, OrderStatus.IN_KITCHEN, OrderStatus.READY) == OrderStatus.READY.name:
+            logger.info("Order %s: ready for pickup after %.1fs", order_id, prep_time)
+
+    async def _advance(self, order_id: str, student_id: str, old: OrderStatus, new: OrderStatus) -> str | None:
+        """As kitchen_tasks._advance: move old → new and notify, else report where the order is."""
+        if await _set_status(order_id, new, expected=old.name):
+            await self._notify_hub(order_id, new, student_id)
+            logger.info("Order %s: %s", order_id, new.value)
+            return new.name
+        return await _current_status(order_id)
+
+    async def _give_up(self, kwargs: dict, exc: Exception, retries: int):
+        """Dead-letter as process_order (replayable through Celery), then fail the order once."""
+        await asyncio.to_thread(record_dead_letter, get_sync_redis(), "process_order", kwargs, exc, retries)
+        order_id, student_id = kwargs["order_id"], kwargs["student_id"]
+        try:
+            status = await _current_status(order_id)
+            while status is not None and status not in TERMINAL_STATUSES:
+                if await _set_status(order_id, OrderStatus.FAILED, expected=status):
+                    await self._notify_hub(order_id, OrderStatus.FAILED, student_id)
+                    await self.redis.rpush(STOCK_RESTORE_QUEUE, order_id)
+                    return
+                status = await _current_status(order_id)
+        except Exception as fail_exc:
+            logger.error("Order %s could not be marked failed: %s", order_id, fail_exc)
+
+    async def _notify_hub(self, order_id: str, status: str, student_id: str):
+        payload = {"order_id": order_id, "status": status, "student_id": student_id}
+        if settings.NOTIFY_VIA_REDIS:
+            try:
+                await self.redis.publish(NOTIFICATION_CHANNEL.format(order_id=order_id), json.dumps(payload))
+                return
+            except Exception as exc:
+                logger.warning("Redis publish failed, notifying hub over HTTP: %s", exc)
+        try:
+            await self._http.post(f"{settings.NOTIFICATION_HUB_URL}/notifications/publish", json=payload)
+        except Exception as exc:
+            # Notification failures MUST NOT affect order processing
+            logger.warning("Notification Hub unreachable: %s", exc)
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if settings.METRICS_ENABLED:
+        try:
+            start_http_server(settings.WORKER_METRICS_PORT)
+        except OSError as exc:
+            logger.warning("Worker metrics server not started on :%d: %s", settings.WORKER_METRICS_PORT, exc)
+
+    worker = StreamWorker(get_redis(), f"{socket.gethostname()}-{os.getpid()}")
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop.set)
+    try:
+        await worker.run()
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+"""
+Kitchen Queue — Capacity model tests (no DB needed)
+"""
+from app.core.capacity import CapacityModel
+
+MODEL = CapacityModel(
+    stations={"grill": 2, "fryer": 1},
+    item_stations={"burger": "grill", "fries": "fryer"},
+    item_prep_seconds={"burger": 6.0, "fries": 3.0},
+    default_prep_seconds=5.0,
+)
+
+
+def test_station_wait_is_backlog_over_slots():
+    assert MODEL.station_waits({"grill": 12.0}) == {"grill": 6.0, "fryer": 0.0}
+
+
+def test_idle_kitchen_eta_is_the_slowest_station_of_the_order():
+    waits = MODEL.station_waits({})
+    assert MODEL.order_eta(waits, [{"menu_item_id": "burger", "quantity": 1},
+                                   {"menu_item_id": "fries", "quantity": 1}]) == 6.0
+
+
+def test_eta_includes_queue_ahead_and_parallel_slots():
+    waits = MODEL.station_waits({"grill": 20.0})
+    # 10s wait, then 4 burgers on 2 slots = 12s
+    assert MODEL.order_eta(waits, [{"menu_item_id": "burger", "quantity": 4}]) == 22.0
+
+
+def test_unknown_items_use_the_default_station_and_prep_time():
+    waits = MODEL.station_waits({"grill": 4.0})
+    assert MODEL.order_eta(waits, [{"menu_item_id": "soup", "quantity": 1}]) == 7.0
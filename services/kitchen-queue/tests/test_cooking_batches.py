@@ -0,0 +1,65 @@
+"""
+Kitchen Queue — Cooking batch tests
+
+Orders with the same item share a batch until it is full; an order is only
+finished once every batch it joined is finished, and repeated joins, closes
+and finishes never count twice.
+
+KITCHEN_TEST_REDIS_URL selects the Redis (default: localhost:6379, db 15,
+which is flushed). Tests are skipped if it is unreachable.
+"""
+import os
+
+import pytest
+import redis as redis_lib
+
+from app.core.config import get_settings
+from app.core.cooking_batches import close_batch, finish_batch, join_batches
+
+KITCHEN_REDIS_URL = os.getenv("KITCHEN_TEST_REDIS_URL", "redis://localhost:6379/15")
+MAX_UNITS = get_settings().KITCHEN_BATCH_MAX_UNITS
+
+
+@pytest.fixture
+def redis():
+    client = redis_lib.Redis.from_url(KITCHEN_REDIS_URL, decode_responses=True)
+    try:
+        client.flushdb()
+    except redis_lib.RedisError:
+        pytest.skip("Redis not accessible from test environment")
+    yield client
+    client.flushdb()
+    client.close()
+
+
+def _item(menu_item_id: str, quantity: int = 1) -> dict:
+    return {"menu_item_id": menu_item_id, "quantity": quantity}
+
+
+def test_same_item_orders_share_a_batch_until_full(redis):
+    joined = [join_batches(redis, f"o{n}", "s", [_item("tea")]) for n in range(MAX_UNITS + 1)]
+
+    batch_id, opened, _ = joined[0][0]
+    assert opened
+    assert all(j[0][0] == batch_id for j in joined[:MAX_UNITS])
+    assert joined[MAX_UNITS - 1][0][2]          # the order that filled it
+    assert joined[MAX_UNITS][0][0] != batch_id  # next one opens a new batch
+    assert joined[MAX_UNITS][0][1]
+
+
+def test_order_is_done_once_all_its_batches_are(redis):
+    [(tea, _, _), (bun, _, _)] = join_batches(redis, "o1", "s1", [_item("tea"), _item("bun", 2)])
+    join_batches(redis, "o2", "s2", [_item("tea")])
+
+    closed, members = close_batch(redis, tea)
+    assert closed and members == {"o1": "s1", "o2": "s2"}
+    assert close_batch(redis, tea) == (False, members)
+
+    assert finish_batch(redis, tea) == {"o2": "s2"}
+    assert finish_batch(redis, tea) == {"o2": "s2"}  # repeat: same orders, not counted again
+    assert finish_batch(redis, bun) == {"o1": "s1"}
+
+
+def test_repeated_join_is_skipped(redis):
+    assert join_batches(redis, "o1", "s1", [_item("tea"), _item("tea", 2)])
+    assert join_batches(redis, "o1", "s1", [_item("tea")]) == []
@@ -0,0 +1,54 @@
+"""
+Kitchen Queue — Bulk export tests
+
+The export streams every order in the range, items included, in created_at
+order, and the CSV form carries the same rows behind a header line.
+"""
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.export import ORDER_EXPORT_COLUMNS, ORDER_EXPORT_SQL
+from app.core import export
+from conftest import ITEMS_PER_ORDER, ORDER_COUNT
+
+
+def test_csv_rows_line_up_with_the_header():
+    created = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+    rows = [("o-1", "s-1", "pending", None, created, created, False, [{"menu_item_id": "ITEM-0", "quantity": 1}])]
+
+    lines = list(csv.reader(export._encode(rows, ORDER_EXPORT_COLUMNS, "csv").splitlines()))
+
+    assert lines == [[
+        "o-1", "s-1", "pending", "", created.isoformat(), created.isoformat(), "False",
+        '[{"menu_item_id": "ITEM-0", "quantity": 1}]',
+    ]]
+
+
+async def _export(fmt, start, end) -> str:
+    chunks = [c async for c in export.stream_export(ORDER_EXPORT_SQL, {"start": start, "end": end}, ORDER_EXPORT_COLUMNS, fmt)]
+    return "".join(chunks)
+
+
+@pytest.mark.asyncio
+async def test_export_streams_the_range_with_items(engine, student_orders, monkeypatch):
+    student_id, order_ids = student_orders
+    monkeypatch.setattr(export, "engine", engine)
+    monkeypatch.setattr(export.settings, "EXPORT_FETCH_SIZE", 7)  # several chunks
+    now = datetime.now(timezone.utc)
+
+    lines = (await _export("ndjson", now - timedelta(minutes=5), now + timedelta(minutes=5))).splitlines()
+    rows = [r for r in map(json.loads, lines) if r["student_id"] == student_id]
+
+    assert {r["order_id"] for r in rows} == set(order_ids)
+    assert len(rows) == ORDER_COUNT
+    assert all(len(r["items"]) == ITEMS_PER_ORDER and r["status"] == "pending" for r in rows)
+    created = [r["created_at"] for r in map(json.loads, lines)]
+    assert created == sorted(created)
+
+    assert await _export("ndjson", now + timedelta(minutes=5), now + timedelta(minutes=10)) == ""
+    csv_text = await _export("csv", now - timedelta(minutes=5), now + timedelta(minutes=5))
+    assert csv_text.splitlines()[0] == ",".join(ORDER_EXPORT_COLUMNS)
+    assert sum(student_id in line for line in csv_text.splitlines()) == ORDER_COUNT
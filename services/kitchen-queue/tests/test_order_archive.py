@@ -0,0 +1,85 @@
+"""
+Kitchen Queue — Hot/cold archive tests
+
+Age some orders past KITCHEN_ARCHIVE_AFTER_HOURS, run the archiver, and
+check the student endpoints still see every order. Run from
+services/kitchen-queue:
+
+    python -m pytest tests -v
+"""
+import pytest
+import pytest_asyncio
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.kitchen import NEXT_CURSOR_HEADER, get_order, list_orders
+from app.db.archive import archive_terminal_orders
+from conftest import ORDER_COUNT, ITEMS_PER_ORDER
+
+ARCHIVED = 10
+
+
+@pytest_asyncio.fixture
+async def archived_orders(engine, student_orders):
+    """Archive the ARCHIVED oldest of the student's orders (as READY)."""
+    student_id, order_ids = student_orders
+    old = order_ids[:ARCHIVED]
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "UPDATE orders SET status = 'READY', "
+            "created_at = NOW() - INTERVAL '1000 hours', updated_at = NOW() - INTERVAL '1000 hours' "
+            "WHERE id = ANY(:ids)"
+        ), {"ids": old})
+    async with engine.connect() as conn:
+        archived = await conn.run_sync(lambda sync_conn: archive_terminal_orders(Session(bind=sync_conn)))
+    yield student_id, order_ids, archived
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM order_items_archive WHERE order_id = ANY(:ids)"), {"ids": order_ids})
+        await conn.execute(text("DELETE FROM orders_archive WHERE id = ANY(:ids)"), {"ids": order_ids})
+
+
+@pytest.mark.asyncio
+async def test_archiver_moves_orders_and_items(engine, archived_orders):
+    _, order_ids, archived = archived_orders
+    assert archived["ready"] >= ARCHIVED
+
+    async with engine.connect() as conn:
+        hot = (await conn.execute(text("SELECT COUNT(*) FROM orders WHERE id = ANY(:ids)"), {"ids": order_ids})).scalar()
+        cold = (await conn.execute(
+            text("SELECT COUNT(*) FROM orders_archive WHERE id = ANY(:ids)"), {"ids": order_ids},
+        )).scalar()
+        cold_items = (await conn.execute(
+            text("SELECT COUNT(*) FROM order_items_archive WHERE order_id = ANY(:ids)"), {"ids": order_ids},
+        )).scalar()
+    assert (hot, cold) == (ORDER_COUNT - ARCHIVED, ARCHIVED)
+    assert cold_items == ARCHIVED * ITEMS_PER_ORDER
+
+
+@pytest.mark.asyncio
+async def test_student_listing_pages_across_hot_and_archive(engine, archived_orders):
+    student_id, order_ids, _ = archived_orders
+    seen: list[dict] = []
+    cursor = None
+    async with AsyncSession(engine) as db:
+        while True:
+            response = Response()
+            page = await list_orders(response, student_id=student_id, limit=7, cursor=cursor, db=db)
+            seen.extend(page)
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+
+    assert sorted(o["order_id"] for o in seen) == sorted(order_ids)
+    assert all(len(o["items"]) == ITEMS_PER_ORDER for o in seen)
+    # The archived orders are the oldest, so they come last
+    assert {o["order_id"] for o in seen[-ARCHIVED:]} == set(order_ids[:ARCHIVED])
+
+
+@pytest.mark.asyncio
+async def test_get_order_falls_back_to_archive(engine, archived_orders):
+    _, order_ids, _ = archived_orders
+    async with AsyncSession(engine) as db:
+        order = await get_order(order_ids[0], db=db)
+    assert order["status"] == "ready"
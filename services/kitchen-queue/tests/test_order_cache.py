@@ -0,0 +1,86 @@
+"""
+Kitchen Queue — Order lookup cache tests
+
+Newer transitions overwrite the cached status, older ones and fills never
+do, and the entry's TTL follows the status it ends up with.
+
+KITCHEN_TEST_REDIS_URL selects the Redis (default: localhost:6379, db 15,
+which is flushed). Tests are skipped if it is unreachable.
+"""
+import os
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.board_events import order_inserted, status_changed
+from app.core.config import get_settings
+from app.core.order_cache import ORDER_CACHE_LOOKUPS, fill_order_cache, get_cached_order, stage_order_cache
+
+KITCHEN_REDIS_URL = os.getenv("KITCHEN_TEST_REDIS_URL", "redis://localhost:6379/15")
+settings = get_settings()
+
+
+@pytest_asyncio.fixture
+async def redis():
+    client = aioredis.from_url(KITCHEN_REDIS_URL, decode_responses=True)
+    try:
+        await client.flushdb()
+    except RedisError:
+        await client.aclose()
+        pytest.skip("Redis not accessible from test environment")
+    yield client
+    await client.flushdb()
+    await client.aclose()
+
+
+async def _publish(redis, events):
+    pipe = redis.pipeline(transaction=False)
+    stage_order_cache(pipe, events)
+    await pipe.execute()
+
+
+def _lookups(result: str) -> float:
+    return ORDER_CACHE_LOOKUPS.labels(result)._value.get()
+
+
+@pytest.mark.asyncio
+async def test_queued_order_is_a_hit_and_follows_transitions(redis):
+    await _publish(redis, [order_inserted({"order_id": "o1", "student_id": "s1", "status": "pending"})])
+    hits = _lookups("hit")
+
+    assert await get_cached_order(redis, "o1") == {"order_id": "o1", "status": "pending", "student_id": "s1"}
+    await _publish(redis, [status_changed("o1", "READY", 1)])
+    assert (await get_cached_order(redis, "o1"))["status"] == "ready"
+
+    assert _lookups("hit") - hits == 2
+    assert 0 < await redis.ttl("kitchen:order:o1") <= settings.KITCHEN_ORDER_CACHE_TERMINAL_TTL_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_fill_never_overwrites_a_newer_transition(redis):
+    misses = _lookups("miss")
+    assert await get_cached_order(redis, "o2") is None
+
+    # The fill read IN_KITCHEN, but READY was committed (and published) in between
+    await _publish(redis, [status_changed("o2", "READY", 2)])
+    assert await get_cached_order(redis, "o2") is None   # no student_id yet
+    await fill_order_cache(redis, "o2", "in_kitchen", "s2")
+
+    assert await get_cached_order(redis, "o2") == {"order_id": "o2", "status": "ready", "student_id": "s2"}
+    assert _lookups("miss") - misses == 2
+    assert await redis.ttl("kitchen:order:o2") <= settings.KITCHEN_ORDER_CACHE_TERMINAL_TTL_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_late_older_transition_is_ignored(redis):
+    # The worker's IN_KITCHEN (seq 3) is published before the API's earlier STOCK_VERIFIED (seq 2)
+    await _publish(redis, [status_changed("o3", "IN_KITCHEN", 3)])
+    await _publish(redis, [
+        status_changed("o3", "STOCK_VERIFIED", 2),
+        order_inserted({"order_id": "o3", "student_id": "s3", "status": "pending"}),
+    ])
+
+    assert await get_cached_order(redis, "o3") == {"order_id": "o3", "status": "in_kitchen", "student_id": "s3"}
+    assert 0 < await redis.ttl("kitchen:order:o3") <= settings.KITCHEN_ORDER_CACHE_TTL_SECONDS
@@ -0,0 +1,68 @@
+"""
+Kitchen Queue — Order listing query tests
+
+Call the listing endpoints in-process against a real kitchen-db and count
+the SQL statements they issue. Run from services/kitchen-queue:
+
+    python -m pytest tests -v
+"""
+import pytest
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.kitchen import NEXT_CURSOR_HEADER, list_all_orders, list_orders
+from app.core.config import get_settings
+from conftest import ORDER_COUNT, ITEMS_PER_ORDER, QueryCounter
+
+settings = get_settings()
+
+
+@pytest.mark.asyncio
+async def test_student_order_listing_uses_constant_queries(engine, student_orders):
+    student_id, _ = student_orders
+    async with AsyncSession(engine) as db:
+        with QueryCounter(engine) as counter:
+            orders = await list_orders(Response(), student_id=student_id, limit=settings.ORDER_PAGE_MAX_SIZE, cursor=None, db=db)
+
+    assert len(orders) == ORDER_COUNT
+    assert all(len(o["items"]) == ITEMS_PER_ORDER for o in orders)
+    # orders + their items, then the (empty) archive read
+    assert len(counter.statements) == 3, counter.statements
+
+
+@pytest.mark.asyncio
+async def test_max_size_page_loads_items_in_one_query(engine, full_page_orders):
+    student_id, _ = full_page_orders
+    response = Response()
+    async with AsyncSession(engine) as db:
+        with QueryCounter(engine) as counter:
+            orders = await list_orders(
+                response, student_id=student_id, limit=settings.ORDER_PAGE_MAX_SIZE, cursor=None, db=db,
+            )
+
+    assert len(orders) == settings.ORDER_PAGE_MAX_SIZE
+    assert NEXT_CURSOR_HEADER in response.headers
+    assert all(len(o["items"]) == 1 for o in orders)
+    # limit + 1 orders, their items in a single IN, then the (empty) archive read
+    assert len(counter.statements) == 3, counter.statements
+
+
+@pytest.mark.asyncio
+async def test_board_listing_uses_two_queries(engine, student_orders):
+    _, order_ids = student_orders
+    found: dict[str, dict] = {}
+    cursor = None
+    async with AsyncSession(engine) as db:
+        while True:
+            response = Response()
+            with QueryCounter(engine) as counter:
+                page = await list_all_orders(response, status=None, limit=settings.ORDER_PAGE_MAX_SIZE, cursor=cursor, db=db)
+            # the page, then all of its items
+            assert len(counter.statements) == 2, counter.statements
+            found.update((o["order_id"], o) for o in page if o["order_id"] in order_ids)
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if len(found) == ORDER_COUNT or cursor is None:
+                break
+
+    assert set(found) == set(order_ids)
+    assert all(len(o["items"]) == ITEMS_PER_ORDER for o in found.values())
@@ -0,0 +1,31 @@
+"""
+Kitchen Queue — Celery routing tests (no broker needed)
+
+Orders are routed to express / standard / bulk by estimated prep work, and
+smaller orders get a higher priority (lower number) within their queue.
+"""
+from app.core.celery_app import BULK_QUEUE, EXPRESS_QUEUE, STANDARD_QUEUE, celery_app
+
+
+def _route(task: str, **kwargs) -> dict:
+    options = celery_app.amqp.router.route({}, task, (), kwargs)
+    return {"queue": options["queue"].name, "priority": options.get("priority")}
+
+
+def _order(units: int) -> dict:
+    return {"items": [{"menu_item_id": "ROUTING-TEST-ITEM", "quantity": units}]}
+
+
+def test_orders_are_routed_by_size():
+    assert _route("process_order", **_order(1))["queue"] == EXPRESS_QUEUE
+    assert _route("process_order", **_order(4))["queue"] == STANDARD_QUEUE
+    assert _route("process_order", **_order(10))["queue"] == BULK_QUEUE
+
+
+def test_smaller_orders_run_first_within_a_queue():
+    assert _route("process_order", **_order(3))["priority"] < _route("process_order", **_order(5))["priority"]
+
+
+def test_continuations_and_periodic_jobs():
+    assert _route("finish_order") == {"queue": EXPRESS_QUEUE, "priority": 0}
+    assert _route("reconcile_order_stats")["queue"] == STANDARD_QUEUE
@@ -0,0 +1,69 @@
+"""
+Kitchen Queue — Order status counter reconcile tests
+
+A difference between the DB counts and the status hash is only corrected
+once two reconcile runs in a row see the same difference, so a transition
+whose increment is still in flight is never counted twice.
+
+KITCHEN_TEST_REDIS_URL selects the Redis (default: localhost:6379, db 15,
+which is flushed). Tests are skipped if it is unreachable.
+"""
+import os
+
+import pytest
+import redis as redis_lib
+
+from app.core.order_stats import STATUS_COUNTS_KEY, reconcile_status_counts, stage_status_transitions
+
+KITCHEN_REDIS_URL = os.getenv("KITCHEN_TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+@pytest.fixture
+def redis():
+    client = redis_lib.Redis.from_url(KITCHEN_REDIS_URL, decode_responses=True)
+    try:
+        client.flushdb()
+    except redis_lib.RedisError:
+        pytest.skip("Redis not accessible from test environment")
+    yield client
+    client.flushdb()
+    client.close()
+
+
+class _Counts:
+    """Stands in for the Session: the GROUP BY result is set by the test."""
+
+    def __init__(self, **counts):
+        self.counts = counts
+
+    def execute(self, _statement):
+        return [(status.upper(), count) for status, count in self.counts.items()]
+
+
+def _cached(redis) -> dict[str, int]:
+    return {k: int(v) for k, v in redis.hgetall(STATUS_COUNTS_KEY).items() if int(v)}
+
+
+def test_in_flight_transition_is_not_counted_twice(redis):
+    redis.hset(STATUS_COUNTS_KEY, mapping={"pending": 2})
+    # Committed in the DB, its HINCRBYs not yet published
+    db = _Counts(pending=1, stock_verified=1)
+
+    assert reconcile_status_counts(redis, db) == {}
+    pipe = redis.pipeline()
+    stage_status_transitions(pipe, [("pending", "stock_verified")])
+    pipe.execute()
+
+    assert reconcile_status_counts(redis, db) == {}
+    assert _cached(redis) == {"pending": 1, "stock_verified": 1}
+
+
+def test_drift_seen_twice_is_corrected(redis):
+    redis.hset(STATUS_COUNTS_KEY, mapping={"pending": 3, "ready": 1})
+    db = _Counts(pending=1, ready=1)
+
+    assert reconcile_status_counts(redis, db) == {}
+    assert _cached(redis) == {"pending": 3, "ready": 1}
+    assert reconcile_status_counts(redis, db) == {"pending": -2}
+    assert _cached(redis) == {"pending": 1, "ready": 1}
+    assert reconcile_status_counts(redis, db) == {}
@@ -0,0 +1,65 @@
+"""
+Kitchen Queue — Manual transition tests
+
+advance/revert must be a single conditional UPDATE: concurrent clicks from
+the same starting status move an order exactly one stage, and a bulk call
+moves every eligible order in one statement with a result per order.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.order_ops import transition_orders
+from conftest import QueryCounter
+
+
+async def _status(engine, order_id: str) -> str:
+    async with engine.connect() as conn:
+        return (await conn.execute(
+            text("SELECT status::text FROM orders WHERE id = :id"), {"id": order_id}
+        )).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_bulk_advance_is_one_statement_with_per_order_results(engine, student_orders):
+    _, order_ids = student_orders
+    async with AsyncSession(engine) as db:
+        with QueryCounter(engine) as counter:
+            results = await transition_orders(db, order_ids, "advance", expected_status="pending")
+
+    assert len(counter.statements) == 1, counter.statements
+    assert [r["order_id"] for r in results] == order_ids
+    assert all(r["ok"] and r["previous_status"] == "pending" and r["status"] == "stock_verified"
+               for r in results)
+
+
+@pytest.mark.asyncio
+async def test_bulk_reports_each_failure_reason(engine, student_orders):
+    _, order_ids = student_orders
+    async with AsyncSession(engine) as db:
+        await transition_orders(db, order_ids[:1], "advance")
+        results = await transition_orders(
+            db, [order_ids[0], order_ids[1], "NO-SUCH-ORDER"], "advance", expected_status="pending",
+        )
+        reverted = await transition_orders(db, [order_ids[2]], "revert")
+
+    assert [r.get("error") for r in results] == ["status_mismatch", None, "not_found"]
+    assert results[0]["status"] == "stock_verified"
+    assert reverted[0] == {"order_id": order_ids[2], "ok": False, "error": "invalid_transition", "status": "pending"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_advances_from_same_status_move_one_stage(engine, student_orders):
+    _, order_ids = student_orders
+    order_id = order_ids[0]
+
+    async def click():
+        async with AsyncSession(engine) as db:
+            [result] = await transition_orders(db, [order_id], "advance", expected_status="pending")
+            return result["ok"]
+
+    outcomes = await asyncio.gather(*(click() for _ in range(5)))
+    assert outcomes.count(True) == 1
+    assert await _status(engine, order_id) == "STOCK_VERIFIED"
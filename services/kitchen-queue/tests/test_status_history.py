@@ -0,0 +1,64 @@
+"""
+Kitchen Queue — Order status history tests
+
+Every transition appends one history row in the transition's own
+statement, and the stage percentiles are computed from those rows.
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.order_ops import transition_orders
+from app.db.status_history import stage_percentiles
+from conftest import ORDER_COUNT, QueryCounter
+
+
+@pytest_asyncio.fixture
+async def history_orders(engine, student_orders):
+    """student_orders, with their history rows removed afterwards."""
+    yield student_orders
+    _, order_ids = student_orders
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM order_status_history WHERE order_id = ANY(:ids)"), {"ids": order_ids})
+
+
+async def _history(engine, order_ids) -> list[tuple]:
+    async with engine.connect() as conn:
+        return (await conn.execute(
+            text(
+                "SELECT order_id, from_status, to_status, seconds_in_state FROM order_status_history "
+                "WHERE order_id = ANY(:ids) ORDER BY id"
+            ),
+            {"ids": order_ids},
+        )).fetchall()
+
+
+@pytest.mark.asyncio
+async def test_each_transition_is_recorded_in_the_same_statement(engine, history_orders):
+    _, order_ids = history_orders
+    async with AsyncSession(engine) as db:
+        with QueryCounter(engine) as counter:
+            await transition_orders(db, order_ids, "advance")
+        await transition_orders(db, order_ids[:1], "revert")
+
+    assert len(counter.statements) == 1, counter.statements
+    rows = await _history(engine, order_ids)
+    assert len(rows) == ORDER_COUNT + 1
+    assert {(r[1], r[2]) for r in rows[:ORDER_COUNT]} == {("PENDING", "STOCK_VERIFIED")}
+    assert rows[-1][:3] == (order_ids[0], "STOCK_VERIFIED", "PENDING")
+    assert all(r[3] is not None and r[3] >= 0 for r in rows)
+
+
+@pytest.mark.asyncio
+async def test_stage_percentiles_cover_forward_moves_only(engine, history_orders):
+    _, order_ids = history_orders
+    async with AsyncSession(engine) as db:
+        before = await stage_percentiles(db, 5)
+        await transition_orders(db, order_ids, "advance")
+        await transition_orders(db, order_ids, "revert")  # not a stage
+        after = await stage_percentiles(db, 5)
+
+    assert after["pending"]["count"] - before["pending"]["count"] == ORDER_COUNT
+    assert after["stock_verified"]["count"] == before["stock_verified"]["count"]
+    assert after["pending"]["p50"] <= after["pending"]["p95"] <= after["pending"]["p99"]
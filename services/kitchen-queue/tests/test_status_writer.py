@@ -0,0 +1,61 @@
+"""
+Kitchen Queue — Coalesced status write tests
+
+Transitions submitted from concurrent worker threads must land in fewer
+statements than transitions, each still applied exactly as requested.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.status_writer import StatusWriter
+from conftest import KITCHEN_DB_URL, ORDER_COUNT, QueryCounter
+
+
+@pytest.fixture
+def sync_engine(engine):
+    """Blocking engine on the same DB, as the Celery worker uses (skips with engine)."""
+    sync = create_engine(KITCHEN_DB_URL.replace("+asyncpg", ""))
+    yield sync
+    sync.dispose()
+
+
+def _statuses(sync_engine, order_ids) -> dict[str, str]:
+    with sync_engine.connect() as conn:
+        return dict(conn.execute(
+            text("SELECT id, status::text FROM orders WHERE id = ANY(:ids)"), {"ids": order_ids}
+        ).fetchall())
+
+
+def test_concurrent_writes_share_statements(sync_engine, student_orders):
+    _, order_ids = student_orders
+    writer = StatusWriter(sync_engine)
+    with QueryCounter(sync_engine) as counter, ThreadPoolExecutor(ORDER_COUNT) as pool:
+        moved = list(pool.map(lambda i: writer.write(i, "stock_verified", expected="pending"), order_ids))
+
+    assert all(moved)
+    assert set(_statuses(sync_engine, order_ids).values()) == {"STOCK_VERIFIED"}
+    updates = [s for s in counter.statements if "UPDATE orders o SET status" in s]
+    assert 1 <= len(updates) < ORDER_COUNT
+
+
+def test_expected_status_mismatch_is_not_written(sync_engine, student_orders):
+    _, order_ids = student_orders
+    writer = StatusWriter(sync_engine)
+
+    assert writer.write(order_ids[0], "ready", expected="in_kitchen") is False
+    assert writer.write(order_ids[0], "failed") is True
+    assert _statuses(sync_engine, order_ids[:1]) == {order_ids[0]: "FAILED"}
+
+
+def test_write_many_is_one_statement(sync_engine, student_orders):
+    _, order_ids = student_orders
+    writer = StatusWriter(sync_engine)
+    writer.write(order_ids[0], "failed", expected="pending")
+    with QueryCounter(sync_engine) as counter:
+        moved = writer.write_many(order_ids, "stock_verified", expected="pending")
+
+    assert moved == order_ids[1:]
+    updates = [s for s in counter.statements if "UPDATE orders o SET status" in s]
+    assert len(updates) == 1
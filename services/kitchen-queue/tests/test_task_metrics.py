@@ -0,0 +1,69 @@
+"""
+Kitchen Queue — Worker task telemetry tests (no broker needed)
+
+With no result backend, task outcomes are only visible in the worker
+exporter, so every run must be timed under the right outcome.
+"""
+from types import SimpleNamespace
+
+from celery.signals import task_failure, task_postrun, task_prerun, task_retry
+from prometheus_client import REGISTRY
+
+from app.core import task_metrics  # noqa: F401  (connects the task signals)
+from app.core.celery_app import celery_app
+
+class _Task:
+    name = "metrics_test_task"
+
+
+TASK = _Task()
+
+
+def _runs(outcome: str) -> float:
+    return REGISTRY.get_sample_value(
+        "kitchen_task_duration_seconds_count", {"task": TASK.name, "outcome": outcome},
+    ) or 0.0
+
+
+def _run(run_id: str, signal=None, **signal_kwargs):
+    task_prerun.send(sender=TASK, task_id=run_id, task=TASK)
+    if signal is not None:
+        signal.send(sender=TASK, **signal_kwargs)
+    task_postrun.send(sender=TASK, task_id=run_id, task=TASK)
+
+
+def test_runs_are_counted_by_outcome():
+    before = {o: _runs(o) for o in ("success", "retry", "failure")}
+
+    _run("t-ok")
+    _run("t-retry", task_retry, request=SimpleNamespace(id="t-retry"))
+    _run("t-fail", task_failure, task_id="t-fail")
+
+    assert {o: _runs(o) - n for o, n in before.items()} == {"success": 1, "retry": 1, "failure": 1}
+
+
+def test_results_are_not_stored():
+    assert celery_app.conf.task_ignore_result
+    assert not celery_app.conf.result_backend
+
+
+def test_exhausted_task_is_counted_as_failure(monkeypatch):
+    """process_order dead-letters and returns on its last attempt; that is still a failed run."""
+    from app.tasks import kitchen_tasks
+
+    def db_down(order_id):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(kitchen_tasks, "_current_status", db_down)
+    monkeypatch.setattr(kitchen_tasks, "get_sync_redis", lambda: None)
+    monkeypatch.setattr(kitchen_tasks, "record_dead_letter", lambda *args: None)
+    monkeypatch.setattr(kitchen_tasks, "_fail_order", lambda *args: None)
+    labels = {"task": "process_order", "outcome": "failure"}
+    before = REGISTRY.get_sample_value("kitchen_task_duration_seconds_count", labels) or 0.0
+
+    kitchen_tasks.process_order.apply(
+        kwargs={"order_id": "o-exhausted", "student_id": "s-1", "items": []},
+        retries=kitchen_tasks.process_order.max_retries,
+    )
+
+    assert REGISTRY.get_sample_value("kitchen_task_duration_seconds_count", labels) == before + 1
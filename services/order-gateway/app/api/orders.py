@@ -3,24 +3,62 @@ Order Gateway — Orders API
 
 Flow:
   1. JWT validated by middleware (request.state.user set)
-  2. Check Redis cache for stock availability (High-Speed Cache Stock Check)
-  3. Forward to Stock Service for deduction (idempotency key forwarded)
-  4. Publish to Kitchen Queue
-  5. Return acknowledgment in < 2s
+  2. Check stock availability (in-process stock:events cache, Redis fallback)
+  3. Reserve stock in Stock Service (TTL hold, idempotency key forwarded)
+  4. Publish to Kitchen Queue — on failure the hold is released
+  5. Return acknowledgment in < 2s; the hold is confirmed in the background
 """
+import asyncio
+import logging
 import uuid
 import httpx
-from fastapi import APIRouter, Request, HTTPException, status, Depends
+from fastapi import APIRouter, Request, Response, HTTPException, status, Depends
 
 from app.core.config import get_settings
 from app.core.redis_client import get_redis
+from app.core.stock_stream import stock_cache
 from app.schemas.order import OrderRequest, OrderResponse
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 STOCK_CACHE_KEY = "stock:{menu_item_id}"
 
+# Strong refs to fire-and-forget confirm tasks (asyncio only keeps weak ones).
+# Tasks are used instead of BackgroundTasks because the idempotency middleware
+# buffers the body, which would make background work delay the response.
+_pending_confirms: set[asyncio.Task] = set()
+
+
+async def _release_reservation(order_id: str):
+    """Give held stock back after the order could not be queued."""
+    try:
+        async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
+            await client.post(f"{settings.STOCK_SERVICE_URL}/stock/reservations/{order_id}/release")
+    except httpx.RequestError as exc:
+        # The hold still expires on its own after its TTL
+        logger.warning("Could not release reservation for order %s: %s", order_id, exc)
+
+
+async def _confirm_reservation(order_id: str):
+    """
+    Phase 2 of the stock reservation, run after the response is sent.
+    Retried a few times; the hold's TTL leaves plenty of room.
+    """
+    for attempt in range(1, settings.RESERVATION_CONFIRM_ATTEMPTS + 1):
+        try:
+            async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
+                r = await client.post(f"{settings.STOCK_SERVICE_URL}/stock/reservations/{order_id}/confirm")
+            if r.status_code < 500:
+                if not r.is_success:
+                    logger.error("Reservation confirm rejected for order %s: %s", order_id, r.text)
+                return
+        except httpx.RequestError as exc:
+            logger.warning("Reservation confirm attempt %d for order %s failed: %s", attempt, order_id, exc)
+        await asyncio.sleep(0.5 * attempt)
+    logger.error("Reservation for order %s was not confirmed; it will expire", order_id)
+
 
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_order(payload: OrderRequest, request: Request):
@@ -33,8 +71,9 @@ async def create_order(payload: OrderRequest, request: Request):
 
     # ── Step 1: High-Speed Cache Stock Check ───────────────────────────────────
     for item in payload.items:
-        cache_key = f"stock:{item.menu_item_id}"
-        cached_stock = await redis.get(cache_key)
+        cached_stock = stock_cache.get(item.menu_item_id)
+        if cached_stock is None:
+            cached_stock = await redis.get(STOCK_CACHE_KEY.format(menu_item_id=item.menu_item_id))
         if cached_stock is not None:
             try:
                 stock = int(cached_stock)
@@ -46,14 +85,14 @@ async def create_order(payload: OrderRequest, request: Request):
                     detail=f"Menu item '{item.menu_item_id}' is out of stock (cache hit). Order rejected.",
                 )
 
-    # ── Step 2: Call Stock Service to deduct inventory ────────────────────────
+    # ── Step 2: Reserve inventory in Stock Service (TTL hold) ─────────────────
     order_id = str(uuid.uuid4())
     idempotency_key = request.headers.get("Idempotency-Key", order_id)
 
     try:
         async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
             stock_response = await client.post(
-                f"{settings.STOCK_SERVICE_URL}/stock/deduct",
+                f"{settings.STOCK_SERVICE_URL}/stock/reserve",
                 json={
                     "order_id": order_id,
                     "student_id": user.get("student_id"),
@@ -77,7 +116,7 @@ async def create_order(payload: OrderRequest, request: Request):
     if not stock_response.is_success:
         raise HTTPException(
             status_code=stock_response.status_code,
-            detail=stock_response.json().get("detail", "Stock deduction failed."),
+            detail=stock_response.json().get("detail", "Stock reservation failed."),
         )
 
     # ── Step 3: Publish to Kitchen Queue ──────────────────────────────────────
@@ -92,41 +131,48 @@ async def create_order(payload: OrderRequest, request: Request):
                     "special_notes": payload.special_notes,
                 },
             )
-    except (httpx.TimeoutException, httpx.RequestError):
-        # Kitchen queue failure → non-critical, order still accepted
-        pass
+        kitchen_response.raise_for_status()
+    except (httpx.TimeoutException, httpx.RequestError, httpx.HTTPStatusError):
+        # The kitchen never saw this order → hand the held stock back
+        await _release_reservation(order_id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Kitchen Queue could not accept the order. No stock was taken; please retry.",
+        )
 
-    # Update Redis stock cache estimate
-    for item in payload.items:
-        try:
-            cache_key = f"stock:{item.menu_item_id}"
-            current = await redis.get(cache_key)
-            if current is not None:
-                new_val = max(0, int(current) - item.quantity)
-                await redis.setex(cache_key, settings.STOCK_CACHE_TTL_SECONDS, new_val)
-        except Exception:
-            pass
+    # ── Step 4: Confirm the hold off the request path ─────────────────────────
+    task = asyncio.create_task(_confirm_reservation(order_id))
+    _pending_confirms.add(task)
+    task.add_done_callback(_pending_confirms.discard)
 
     return OrderResponse(
         order_id=order_id,
         status="queued",
         message="Order accepted and queued for kitchen processing.",
-        estimated_wait_seconds=7,
+        # From Kitchen Queue's capacity model (queue depth + work in progress)
+        estimated_wait_seconds=kitchen_response.json().get("estimated_wait_seconds"),
     )
 
 
 @router.get("")
-async def list_orders(request: Request):
-    """List all orders for the authenticated student."""
+async def list_orders(request: Request, response: Response, limit: int | None = None, cursor: str | None = None):
+    """
+    List the authenticated student's orders, newest first. Paginated by
+    Kitchen Queue: pass the X-Next-Cursor header back as ?cursor=.
+    """
     user = request.state.user
     student_id = user.get("student_id")
+    params = {"student_id": student_id}
+    if limit is not None:
+        params["limit"] = limit
+    if cursor:
+        params["cursor"] = cursor
     try:
         async with httpx.AsyncClient(timeout=settings.HTTP_TIMEOUT_SECONDS) as client:
-            r = await client.get(
-                f"{settings.KITCHEN_QUEUE_URL}/kitchen/orders",
-                params={"student_id": student_id},
-            )
+            r = await client.get(f"{settings.KITCHEN_QUEUE_URL}/kitchen/orders", params=params)
             if r.is_success:
+                if "X-Next-Cursor" in r.headers:
+                    response.headers["X-Next-Cursor"] = r.headers["X-Next-Cursor"]
                 return r.json()
             raise HTTPException(status_code=r.status_code, detail="Failed to fetch orders.")
     except httpx.RequestError as exc:
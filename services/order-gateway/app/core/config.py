@@ -28,7 +28,8 @@ class Settings(BaseSettings):
             return f"redis://:{self.REDIS_PASSWORD}@{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
 
-    STOCK_CACHE_TTL_SECONDS: int = 10
+    STOCK_STREAM_READ_COUNT: int = 500
+    STOCK_STREAM_BLOCK_MS: int = 5000
     IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
 
     STOCK_SERVICE_URL: str = "http://stock-service:8003"
@@ -36,6 +37,7 @@ class Settings(BaseSettings):
     NOTIFICATION_HUB_URL: str = "http://notification-hub:8005"
 
     HTTP_TIMEOUT_SECONDS: float = 5.0
+    RESERVATION_CONFIRM_ATTEMPTS: int = 3
     HEALTH_CHECK_TIMEOUT: float = 5.0
     METRICS_ENABLED: bool = True
 
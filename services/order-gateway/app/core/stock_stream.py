@@ -0,0 +1,78 @@
+"""
+Order Gateway — In-process stock cache fed by the stock:events stream
+
+Stock Service appends every inventory change (item, new stock, version) to
+the Redis Stream ``stock:events``. This module tails that stream and keeps a
+local dict of the latest known stock per item, so the pre-order stock check
+is a memory lookup instead of a Redis round trip, with no TTL to expire.
+
+Events carry inventory.version_id; an event whose version is not newer than
+the one already held is discarded, so duplicates and out-of-order delivery
+never roll the cache back. Items the gateway has not seen an event for yet
+fall back to the ``stock:{menu_item_id}`` key that Stock Service maintains.
+"""
+import asyncio
+import logging
+
+import redis.asyncio as aioredis
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+STOCK_EVENTS_STREAM = "stock:events"
+
+
+class StockStreamCache:
+    """Latest (current_stock, version_id) per menu item, applied in version order."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[int, int]] = {}
+        self._last_id = "$"
+
+    def get(self, menu_item_id: str) -> int | None:
+        entry = self._entries.get(menu_item_id)
+        return entry[0] if entry else None
+
+    def apply(self, menu_item_id: str, current_stock: int, version_id: int) -> bool:
+        """Apply one change; returns False if it was stale and dropped."""
+        known = self._entries.get(menu_item_id)
+        if known is not None and version_id <= known[1]:
+            return False
+        self._entries[menu_item_id] = (current_stock, version_id)
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self._last_id = "$"
+
+    async def run(self, redis: aioredis.Redis, stop: asyncio.Event):
+        """Tail the stream until stop is set."""
+        while not stop.is_set():
+            try:
+                response = await redis.xread(
+                    {STOCK_EVENTS_STREAM: self._last_id},
+                    count=settings.STOCK_STREAM_READ_COUNT,
+                    block=settings.STOCK_STREAM_BLOCK_MS,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # We may have missed events: forget everything and fall back
+                # to the Redis keys until the stream is readable again.
+                logger.warning("stock:events read failed, local stock cache cleared: %s", exc)
+                self.clear()
+                await asyncio.sleep(1.0)
+                continue
+
+            for _stream, entries in response or []:
+                for entry_id, fields in entries:
+                    self._last_id = entry_id
+                    try:
+                        self.apply(fields["menu_item_id"], int(fields["current_stock"]), int(fields["version_id"]))
+                    except (KeyError, ValueError):
+                        logger.warning("Malformed stock event %s: %s", entry_id, fields)
+
+
+stock_cache = StockStreamCache()
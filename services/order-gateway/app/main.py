@@ -1,13 +1,15 @@
 """
 Order Gateway — FastAPI application entrypoint
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.core.config import get_settings
-from app.core.redis_client import close_redis
+from app.core.redis_client import close_redis, get_redis
+from app.core.stock_stream import stock_cache
 from app.middleware.auth import JWTAuthMiddleware
 from app.middleware.idempotency import IdempotencyMiddleware
 from app.api import orders, health
@@ -17,7 +19,12 @@ settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    stop = asyncio.Event()
+    stock_follower = asyncio.create_task(stock_cache.run(get_redis(), stop))
     yield
+    stop.set()
+    stock_follower.cancel()
+    await asyncio.gather(stock_follower, return_exceptions=True)
     await close_redis()
 
 
@@ -36,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Order matters: Idempotency runs before Auth so replays skip validation
@@ -0,0 +1,42 @@
+"""
+Stock Service — Bulk deduction export
+
+GET /stock/export/deductions?start=...&end=...&format=ndjson|csv
+
+Every stock_deduction_log row created in [start, end), oldest first,
+streamed in constant memory (app/core/export.py). The range is on the
+partition key, so only the daily partitions it overlaps are scanned; rows
+already archived and dropped (STOCK_LOG_RETENTION_DAYS) are in the gzip
+NDJSON files instead.
+"""
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from app.core.export import MEDIA_TYPES, ExportFormat, stream_export
+
+router = APIRouter(prefix="/stock/export", tags=["stock"])
+
+DEDUCTION_EXPORT_COLUMNS = ["id", "order_id", "menu_item_id", "quantity_deducted", "student_id", "created_at"]
+
+DEDUCTION_EXPORT_SQL = text(
+    f"SELECT {', '.join(DEDUCTION_EXPORT_COLUMNS)} FROM stock_deduction_log "
+    "WHERE created_at >= :start AND created_at < :end ORDER BY created_at, id"
+)
+
+
+@router.get("/deductions")
+async def export_deductions(
+    start: datetime = Query(..., description="Created at or after (ISO-8601)"),
+    end: datetime = Query(..., description="Created before (ISO-8601)"),
+    format: ExportFormat = Query("ndjson"),
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start.")
+    return StreamingResponse(
+        stream_export(DEDUCTION_EXPORT_SQL, {"start": start, "end": end}, DEDUCTION_EXPORT_COLUMNS, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="deductions.{format}"'},
+    )
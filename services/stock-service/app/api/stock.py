@@ -9,9 +9,14 @@ from sqlalchemy import select
 from pydantic import BaseModel, Field
 
 from app.db.database import get_db
-from app.db.stock_ops import deduct_inventory
+from app.db.stock_ops import deduct_inventory, restock_inventory, reset_inventory, restore_orders
+from app.db.fast_ops import deduct_order_fast
+from app.db.reservation_ops import (
+    ReservationStateError, reserve_items, confirm_reservation, release_reservation,
+)
 from app.models.inventory import Inventory, MenuItem
 from app.core.redis_client import get_redis
+from app.core.stock_cache import apply_stock_changes
 from app.core.config import get_settings
 
 settings = get_settings()
@@ -30,6 +35,21 @@ class DeductRequest(BaseModel):
     items: list[DeductItem]
 
 
+class ReserveRequest(BaseModel):
+    order_id: str
+    student_id: str
+    items: list[DeductItem] = Field(..., min_length=1)
+    ttl_seconds: int | None = Field(None, ge=1, le=settings.RESERVATION_MAX_TTL_SECONDS)
+
+
+class RestoreRequest(BaseModel):
+    order_ids: list[str] = Field(..., min_length=1, max_length=settings.RESTORE_MAX_ORDERS_PER_REQUEST)
+
+
+class RestockRequest(BaseModel):
+    quantity: int = Field(..., ge=1)
+
+
 class StockItem(BaseModel):
     menu_item_id: str
     current_stock: int
@@ -41,10 +61,16 @@ async def deduct_stock(payload: DeductRequest, db: AsyncSession = Depends(get_db
     """
     Deduct stock for all items in an order.
     Uses optimistic locking with exponential backoff retry.
-    Updates Redis cache after successful deduction.
+    Publishes each new stock level to the Redis cache and change stream.
+
+    With STOCK_FAST_PATH_ENABLED the order is deducted all-or-nothing through
+    prepared asyncpg statements instead (see app/db/fast_ops.py).
     """
+    if settings.STOCK_FAST_PATH_ENABLED:
+        return await _deduct_stock_fast(payload)
+
     results = []
-    redis = get_redis()
+    changes = []
 
     for item in payload.items:
         try:
@@ -55,19 +81,173 @@ async def deduct_stock(payload: DeductRequest, db: AsyncSession = Depends(get_db
                 menu_item_id=item.menu_item_id,
                 quantity=item.quantity,
             )
-            # Keep Redis cache in sync
-            cache_key = f"stock:{item.menu_item_id}"
-            await redis.setex(cache_key, settings.STOCK_CACHE_TTL_SECONDS, inv.current_stock)
             results.append({"menu_item_id": item.menu_item_id, "remaining_stock": inv.current_stock})
+            changes.append({"menu_item_id": item.menu_item_id, "remaining_stock": inv.current_stock,
+                            "version_id": inv.version_id})
         except ValueError as e:
+            await apply_stock_changes(get_redis(), changes, reason="deduct")
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
         except Exception as e:
             logger.exception("Stock deduction failed for %s", item.menu_item_id)
+            await apply_stock_changes(get_redis(), changes, reason="deduct")
             raise HTTPException(status_code=500, detail=str(e))
 
+    await apply_stock_changes(get_redis(), changes, reason="deduct")
     return {"order_id": payload.order_id, "deducted_items": results, "status": "success"}
 
 
+async def _deduct_stock_fast(payload: DeductRequest) -> dict:
+    try:
+        rows = await deduct_order_fast(
+            order_id=payload.order_id,
+            student_id=payload.student_id,
+            items=[(i.menu_item_id, i.quantity) for i in payload.items],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.exception("Stock deduction failed for order %s", payload.order_id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    await apply_stock_changes(
+        get_redis(),
+        [{"menu_item_id": m, "remaining_stock": stock, "version_id": version} for m, stock, version in rows],
+        reason="deduct",
+    )
+    return {
+        "order_id": payload.order_id,
+        "deducted_items": [{"menu_item_id": m, "remaining_stock": stock} for m, stock, _ in rows],
+        "status": "success",
+    }
+
+
+@router.post("/reserve", status_code=status.HTTP_200_OK)
+async def reserve_stock(payload: ReserveRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Phase 1: hold stock for all items of an order (all-or-nothing) with a TTL.
+    The hold must be confirmed or released before it expires; otherwise the
+    background sweeper returns the stock. Idempotent per order_id.
+    """
+    ttl = payload.ttl_seconds or settings.RESERVATION_DEFAULT_TTL_SECONDS
+    try:
+        held = await reserve_items(
+            db=db,
+            order_id=payload.order_id,
+            student_id=payload.student_id,
+            items=[(i.menu_item_id, i.quantity) for i in payload.items],
+            ttl_seconds=ttl,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.exception("Stock reservation failed for order %s", payload.order_id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Replays return remaining_stock=None and must not count the hold twice
+    fresh = [h for h in held if h["remaining_stock"] is not None]
+    await apply_stock_changes(get_redis(), fresh, reason="reserve", held_sign=1)
+
+    return {
+        "order_id": payload.order_id,
+        "reserved_items": [
+            {"menu_item_id": h["menu_item_id"], "quantity": h["quantity"],
+             "status": h["status"].lower(), "remaining_stock": h["remaining_stock"]}
+            for h in held
+        ],
+        "expires_at": held[0]["expires_at"].isoformat() if held else None,
+        "status": "reserved",
+    }
+
+
+@router.post("/reservations/{order_id}/confirm", status_code=status.HTTP_200_OK)
+async def confirm_stock_reservation(order_id: str, db: AsyncSession = Depends(get_db)):
+    """Phase 2: make an order's held stock a permanent deduction. Idempotent."""
+    try:
+        confirmed = await confirm_reservation(db, order_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ReservationStateError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    await apply_stock_changes(get_redis(), confirmed, reason="confirm", held_sign=-1)
+    return {"order_id": order_id, "confirmed_items": confirmed, "status": "confirmed"}
+
+
+@router.post("/reservations/{order_id}/release", status_code=status.HTTP_200_OK)
+async def release_stock_reservation(order_id: str, db: AsyncSession = Depends(get_db)):
+    """Cancel an order's held stock and return it to inventory. Idempotent."""
+    try:
+        released = await release_reservation(db, order_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ReservationStateError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    await apply_stock_changes(get_redis(), released, reason="release", held_sign=-1)
+    return {
+        "order_id": order_id,
+        "released_items": [
+            {"menu_item_id": r["menu_item_id"], "quantity": r["quantity"], "remaining_stock": r["remaining_stock"]}
+            for r in released
+        ],
+        "status": "released",
+    }
+
+
+@router.post("/restore", status_code=status.HTTP_200_OK)
+async def restore_stock(payload: RestoreRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Compensation for failed orders: reverse every deduction recorded in
+    stock_deduction_log for the given orders (and release any outstanding
+    holds) in one transaction. Idempotent — orders already restored are
+    reported in skipped_order_ids and not restored twice.
+    """
+    order_ids = list(dict.fromkeys(payload.order_ids))
+    restored_ids, changes, released_holds = await restore_orders(db, order_ids)
+
+    redis = get_redis()
+    await apply_stock_changes(redis, changes, reason="restore")
+    await apply_stock_changes(redis, released_holds, reason="restore", held_sign=-1)
+
+    restored = set(restored_ids)
+    return {
+        "restored_order_ids": restored_ids,
+        "skipped_order_ids": [o for o in order_ids if o not in restored],
+        "restored_items": [
+            {"menu_item_id": c["menu_item_id"], "quantity": c["quantity"], "remaining_stock": c["remaining_stock"]}
+            for c in changes
+        ],
+        "status": "success",
+    }
+
+
+@router.post("/reset", response_model=list[StockItem])
+async def reset_stock(db: AsyncSession = Depends(get_db)):
+    """Restore every item's current_stock to its initial_stock."""
+    rows = await reset_inventory(db)
+    await apply_stock_changes(
+        get_redis(),
+        [{"menu_item_id": m, "remaining_stock": stock, "version_id": version} for m, stock, version in rows],
+        reason="reset",
+    )
+    return [StockItem(menu_item_id=m, current_stock=stock, version_id=version) for m, stock, version in rows]
+
+
+@router.post("/{menu_item_id}/restock", response_model=StockItem)
+async def restock(menu_item_id: str, payload: RestockRequest, db: AsyncSession = Depends(get_db)):
+    """Add units to an item's current stock."""
+    row = await restock_inventory(db, menu_item_id, payload.quantity)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Menu item not found in inventory.")
+    stock, version = row
+    await apply_stock_changes(
+        get_redis(),
+        [{"menu_item_id": menu_item_id, "remaining_stock": stock, "version_id": version}],
+        reason="restock",
+    )
+    return StockItem(menu_item_id=menu_item_id, current_stock=stock, version_id=version)
+
+
 @router.get("/{menu_item_id}", response_model=StockItem)
 async def get_stock(menu_item_id: str, db: AsyncSession = Depends(get_db)):
     """Get current stock for a menu item. Also warms Redis cache."""
@@ -76,9 +256,12 @@ async def get_stock(menu_item_id: str, db: AsyncSession = Depends(get_db)):
     if inv is None:
         raise HTTPException(status_code=404, detail="Menu item not found in inventory.")
 
-    # Warm cache
-    redis = get_redis()
-    await redis.setex(f"stock:{menu_item_id}", settings.STOCK_CACHE_TTL_SECONDS, inv.current_stock)
+    # Warm cache (no-op if the cache already holds this version or newer)
+    await apply_stock_changes(
+        get_redis(),
+        [{"menu_item_id": inv.menu_item_id, "remaining_stock": inv.current_stock, "version_id": inv.version_id}],
+        reason="read",
+    )
 
     return StockItem(menu_item_id=inv.menu_item_id, current_stock=inv.current_stock, version_id=inv.version_id)
 
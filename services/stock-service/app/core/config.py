@@ -54,8 +54,29 @@ class Settings(BaseSettings):
     OPT_LOCK_MAX_DELAY_MS: int = 1000     # max backoff cap in ms
     OPT_LOCK_JITTER_MS: int = 50          # random jitter range in ms
 
-    # ── Redis Stock Cache ──────────────────────────────────────
-    STOCK_CACHE_TTL_SECONDS: int = 10
+    # ── Deduction fast path ────────────────────────────────────
+    STOCK_FAST_PATH_ENABLED: bool = False   # /stock/deduct via prepared asyncpg statements (app/db/fast_ops.py)
+
+    # ── Redis Stock Cache / Change Stream ──────────────────────
+    STOCK_EVENT_STREAM_MAXLEN: int = 100000   # approximate trim length of stock:events
+
+    # ── Two-Phase Reservations ─────────────────────────────────
+    RESERVATION_DEFAULT_TTL_SECONDS: int = 120
+    RESERVATION_MAX_TTL_SECONDS: int = 900
+    RESERVATION_SWEEP_INTERVAL_SECONDS: float = 2.0
+    RESERVATION_SWEEP_BATCH_SIZE: int = 500
+
+    # ── Compensation ───────────────────────────────────────────
+    RESTORE_MAX_ORDERS_PER_REQUEST: int = 500
+
+    # ── stock_deduction_log partitioning / retention ───────────
+    STOCK_LOG_PARTITION_PREMAKE_DAYS: int = 7       # daily partitions created ahead of time
+    STOCK_LOG_RETENTION_DAYS: int = 30              # partitions older than this are archived + dropped (0 = keep forever)
+    STOCK_LOG_ARCHIVE_DIR: str = "/app/archive"     # gzip NDJSON exports land here
+    STOCK_LOG_MAINTENANCE_INTERVAL_SECONDS: int = 3600
+
+    # ── Bulk exports (app/api/export.py) ──────────────────────
+    EXPORT_FETCH_SIZE: int = 1000    # rows per server-side cursor fetch / streamed chunk
 
     # ── Observability ─────────────────────────────────────────
     METRICS_ENABLED: bool = True
@@ -0,0 +1,49 @@
+"""
+Stock Service — Streaming deduction export (NDJSON / CSV) for GET /stock/export/deductions
+
+stock_deduction_log rows come off a server-side cursor EXPORT_FETCH_SIZE at
+a time and each chunk is encoded and sent before the next is fetched, so
+memory stays flat however many days the range spans.
+"""
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import TextClause
+
+from app.core.config import get_settings
+from app.db.database import engine
+
+settings = get_settings()
+
+ExportFormat = Literal["ndjson", "csv"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _value(v):
+    return v.isoformat() if isinstance(v, datetime) else v
+
+
+def _encode(rows, columns: list[str], fmt: ExportFormat) -> str:
+    if fmt == "ndjson":
+        return "".join(json.dumps({c: _value(v) for c, v in zip(columns, row)}) + "\n" for row in rows)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(json.dumps(v) if isinstance(v, (list, dict)) else _value(v) for v in row)
+    return buf.getvalue()
+
+
+async def stream_export(query: TextClause, params: dict, columns: list[str], fmt: ExportFormat) -> AsyncIterator[str]:
+    """Encoded chunks of the query's rows; CSV starts with a header line."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        csv.writer(buf).writerow(columns)
+        yield buf.getvalue()
+    async with engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=settings.EXPORT_FETCH_SIZE), params)
+        async for chunk in result.partitions(settings.EXPORT_FETCH_SIZE):
+            yield _encode(chunk, columns, fmt)
@@ -0,0 +1,30 @@
+"""
+Stock Service — Periodic stock_deduction_log partition maintenance
+
+Runs inside every API worker process (started from the FastAPI lifespan);
+the advisory lock in run_partition_maintenance makes sure only one of them
+does the work on each pass.
+"""
+import asyncio
+import logging
+
+from app.core.config import get_settings
+from app.db.partitions import run_partition_maintenance
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+async def run_log_maintenance(stop: asyncio.Event):
+    """Maintain partitions every STOCK_LOG_MAINTENANCE_INTERVAL_SECONDS until stop is set."""
+    while not stop.is_set():
+        try:
+            archived = await run_partition_maintenance()
+            if archived:
+                logger.info("Archived and dropped %d deduction log partition(s)", len(archived))
+        except Exception:
+            logger.exception("Deduction log partition maintenance failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.STOCK_LOG_MAINTENANCE_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,40 @@
+"""
+Stock Service — Background sweeper for expired reservations
+
+Runs inside every API worker process (started from the FastAPI lifespan).
+Each pass expires at most RESERVATION_SWEEP_BATCH_SIZE holds in a single
+transaction; a full batch means there is more backlog, so the next pass
+starts immediately instead of waiting for the interval.
+"""
+import asyncio
+import logging
+
+from app.core.config import get_settings
+from app.core.redis_client import get_redis
+from app.core.stock_cache import apply_stock_changes
+from app.db.database import AsyncSessionLocal
+from app.db.reservation_ops import expire_reservations
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+async def run_reservation_sweeper(stop: asyncio.Event):
+    """Sweep expired holds until stop is set."""
+    while not stop.is_set():
+        expired = 0
+        try:
+            async with AsyncSessionLocal() as db:
+                expired, restored = await expire_reservations(db, settings.RESERVATION_SWEEP_BATCH_SIZE)
+            if restored:
+                await apply_stock_changes(get_redis(), restored, reason="expire", held_sign=-1)
+                logger.info("Expired %d reservation(s), stock returned for %d item(s)", expired, len(restored))
+        except Exception:
+            logger.exception("Reservation sweep failed")
+
+        if expired >= settings.RESERVATION_SWEEP_BATCH_SIZE:
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.RESERVATION_SWEEP_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,84 @@
+"""
+Stock Service — Redis stock cache and change-event stream
+
+  stock:{menu_item_id}          → units available to order (current_stock)
+  stock:version:{menu_item_id}  → inventory.version_id the cached value belongs to
+  stock:held:{menu_item_id}     → units currently held by unconfirmed reservations
+  stock:events                  → Redis Stream of every stock change
+
+Every inventory write (deduction, reservation, release/expiry, restock,
+reset) goes through apply_stock_changes. A Lua script updates the cached
+value only if the change carries a newer version_id than the one cached,
+and appends the change to the stream in the same atomic step, so the cache
+never moves backwards and needs no TTL. Other services follow the stream to
+keep their own caches exactly current and use version_id to drop events
+that arrive out of order.
+"""
+import redis.asyncio as aioredis
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+STOCK_CACHE_KEY = "stock:{menu_item_id}"
+STOCK_VERSION_KEY = "stock:version:{menu_item_id}"
+STOCK_HELD_KEY = "stock:held:{menu_item_id}"
+STOCK_EVENTS_STREAM = "stock:events"
+
+# KEYS: cache key, version key, stream
+# ARGV: menu_item_id, current_stock, version_id, reason, stream maxlen
+_PUBLISH_IF_NEWER = """
+local cached = tonumber(redis.call('GET', KEYS[2]) or '0')
+local version = tonumber(ARGV[3])
+if version <= cached then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2])
+redis.call('SET', KEYS[2], ARGV[3])
+redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[5], '*',
+           'menu_item_id', ARGV[1], 'current_stock', ARGV[2],
+           'version_id', ARGV[3], 'reason', ARGV[4])
+return 1
+"""
+_publish_script = None
+
+
+async def apply_stock_changes(
+    redis: aioredis.Redis,
+    changes: list[dict],
+    reason: str,
+    held_sign: int = 0,
+):
+    """
+    Push stock changes to the cache and the change stream.
+
+    Each change is a dict with menu_item_id and optionally remaining_stock +
+    version_id (new available count and the inventory version it belongs to)
+    and quantity (applied to the held counter with held_sign: +1 on reserve,
+    -1 on confirm/release/expire, 0 to leave it).
+    """
+    global _publish_script
+    if not changes:
+        return
+    if _publish_script is None:
+        _publish_script = redis.register_script(_PUBLISH_IF_NEWER)
+    script = _publish_script
+    pipe = redis.pipeline(transaction=False)
+    for change in changes:
+        menu_item_id = change["menu_item_id"]
+        if change.get("remaining_stock") is not None and change.get("version_id") is not None:
+            await script(
+                keys=[
+                    STOCK_CACHE_KEY.format(menu_item_id=menu_item_id),
+                    STOCK_VERSION_KEY.format(menu_item_id=menu_item_id),
+                    STOCK_EVENTS_STREAM,
+                ],
+                args=[
+                    menu_item_id, change["remaining_stock"], change["version_id"],
+                    reason, settings.STOCK_EVENT_STREAM_MAXLEN,
+                ],
+                client=pipe,
+            )
+        if held_sign and change.get("quantity"):
+            pipe.incrby(STOCK_HELD_KEY.format(menu_item_id=menu_item_id), held_sign * change["quantity"])
+    await pipe.execute()
@@ -0,0 +1,111 @@
+"""
+Stock Service — Raw asyncpg fast path for order deduction
+
+Optional replacement for the per-item ORM path (stock_ops.deduct_inventory),
+switched on with STOCK_FAST_PATH_ENABLED. The whole order is deducted on one
+pooled connection in one transaction using prepared statements:
+
+  - conditional UPDATE ... WHERE current_stock >= $2 RETURNING   (per item)
+  - INSERT ... SELECT FROM unnest(...)                            (all log rows)
+  - SELECT current_stock                                          (only to word a failure)
+
+Statements are prepared once per asyncpg connection and cached against it,
+so a warm pooled connection only binds and executes. No ORM objects or
+SQLAlchemy Result wrappers are built; callers get plain tuples back.
+
+Unlike the ORM path the order is all-or-nothing: if any item is short,
+nothing is deducted.
+"""
+import uuid
+import logging
+import weakref
+
+import asyncpg
+
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+DEDUCT_SQL = (
+    "UPDATE inventory SET current_stock = current_stock - $2, "
+    "version_id = version_id + 1, updated_at = NOW() "
+    "WHERE menu_item_id = $1 AND current_stock >= $2 "
+    "RETURNING current_stock, version_id"
+)
+INSERT_LOG_SQL = (
+    "INSERT INTO stock_deduction_log (id, order_id, menu_item_id, quantity_deducted, student_id) "
+    "SELECT r.id, $2::text, r.menu_item_id, r.qty, $3::text "
+    "FROM unnest($1::text[], $4::text[], $5::int[]) AS r(id, menu_item_id, qty)"
+)
+AVAILABLE_SQL = "SELECT current_stock FROM inventory WHERE menu_item_id = $1"
+
+# asyncpg connection → {sql: PreparedStatement}; entries vanish with the connection
+_statements: "weakref.WeakKeyDictionary[asyncpg.Connection, dict]" = weakref.WeakKeyDictionary()
+
+
+async def _prepared(conn: asyncpg.Connection, sql: str):
+    cache = _statements.get(conn)
+    if cache is None:
+        cache = _statements[conn] = {}
+    stmt = cache.get(sql)
+    if stmt is None:
+        stmt = cache[sql] = await conn.prepare(sql)
+    return stmt
+
+
+async def _deduct(
+    conn: asyncpg.Connection,
+    order_id: str,
+    student_id: str,
+    totals: dict[str, int],
+) -> list[tuple[str, int, int]]:
+    deduct = await _prepared(conn, DEDUCT_SQL)
+    results = []
+    async with conn.transaction():
+        for menu_item_id, quantity in totals.items():
+            row = await deduct.fetchrow(menu_item_id, quantity)
+            if row is None:
+                available = await (await _prepared(conn, AVAILABLE_SQL)).fetchval(menu_item_id)
+                if available is None:
+                    raise ValueError(f"Menu item '{menu_item_id}' not found in inventory.")
+                raise ValueError(
+                    f"Insufficient stock for '{menu_item_id}': "
+                    f"requested={quantity}, available={available}"
+                )
+            results.append((menu_item_id, row[0], row[1]))
+
+        await (await _prepared(conn, INSERT_LOG_SQL)).fetchval(
+            [str(uuid.uuid4()) for _ in totals], order_id, student_id,
+            list(totals), list(totals.values()),
+        )
+    return results
+
+
+async def deduct_order_fast(
+    order_id: str,
+    student_id: str,
+    items: list[tuple[str, int]],
+) -> list[tuple[str, int, int]]:
+    """
+    Deduct every (menu_item_id, quantity) of an order in one transaction.
+
+    Quantities for the same item are summed, and rows are updated in
+    menu_item_id order so two multi-item orders can never lock the same rows
+    in opposite orders and deadlock.
+
+    Returns (menu_item_id, remaining_stock, version_id) per item.
+    Raises ValueError for an unknown item or insufficient stock.
+    """
+    totals: dict[str, int] = {}
+    for menu_item_id, quantity in sorted(items):
+        totals[menu_item_id] = totals.get(menu_item_id, 0) + quantity
+
+    async with engine.connect() as sa_conn:
+        conn = (await sa_conn.get_raw_connection()).driver_connection
+        try:
+            return await _deduct(conn, order_id, student_id, totals)
+        except asyncpg.InvalidCachedStatementError:
+            # Schema changed under a cached plan (e.g. a column type): re-prepare once
+            logger.warning("Prepared deduction statements invalidated, re-preparing")
+            _statements.pop(conn, None)
+            return await _deduct(conn, order_id, student_id, totals)
@@ -0,0 +1,308 @@
+"""
+Stock Service — stock_deduction_log partition management
+
+The log is range-partitioned by created_at into one partition per UTC day
+(bounds are explicit UTC timestamps, so the session TimeZone does not
+matter), plus an overflow partition for everything past the pre-made days:
+
+    stock_deduction_log_p20260301  FOR VALUES FROM ('2026-03-01 00:00+00') TO ('2026-03-02 00:00+00')
+    stock_deduction_log_overflow   FOR VALUES FROM ('2026-03-09 00:00+00') TO (MAXVALUE)
+
+The overflow is a MAXVALUE range rather than a DEFAULT partition because
+Postgres refuses DETACH PARTITION CONCURRENTLY on a table that has one.
+
+  - prepare_deduction_log()    — startup: converts a legacy unpartitioned
+                                  table, creates the schema and the partitions
+                                  for today + STOCK_LOG_PARTITION_PREMAKE_DAYS
+  - ensure_partitions()        — creates any missing upcoming partitions and
+                                  moves the overflow partition past them
+  - archive_old_partitions()   — exports partitions past STOCK_LOG_RETENTION_DAYS
+                                  to gzip NDJSON, then detaches and drops them
+
+Partitions are detached CONCURRENTLY (outside a transaction), so the parent
+is never ACCESS EXCLUSIVE locked while deductions are being logged. All DDL
+runs under a Postgres advisory lock so the four uvicorn workers (and the
+periodic maintenance in each of them) never race each other.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+from app.db.database import Base, engine
+from app.models.inventory import StockDeductionLog
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = StockDeductionLog.__tablename__
+LEGACY_TABLE = "stock_deduction_log_unpartitioned"
+PARTITION_PREFIX = f"{PARENT_TABLE}_p"
+OVERFLOW_PARTITION = f"{PARENT_TABLE}_overflow"
+PARTITION_LOCK_KEY = 802_901  # arbitrary, unique to this job
+ARCHIVE_FETCH_SIZE = 5000
+
+
+def _partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def _partition_day(name: str) -> date | None:
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+async def _is_partitioned(conn: AsyncConnection) -> bool:
+    return bool((await conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :name)"
+    ), {"name": PARENT_TABLE})).scalar())
+
+
+async def _table_exists(conn: AsyncConnection, name: str) -> bool:
+    return (await conn.execute(text("SELECT to_regclass(:name)"), {"name": name})).scalar() is not None
+
+
+def _day_start(day: date) -> str:
+    """Midnight UTC of day as a timestamptz literal (a partition bound)."""
+    return f"'{day.isoformat()} 00:00+00'"
+
+
+def _premake_range() -> tuple[date, date]:
+    """Today and the last day that should already have its partition."""
+    today = datetime.now(timezone.utc).date()
+    return today, today + timedelta(days=settings.STOCK_LOG_PARTITION_PREMAKE_DAYS)
+
+
+async def _create_partitions(conn: AsyncConnection, first_day: date, last_day: date):
+    day = first_day
+    while day <= last_day:
+        await conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(day)} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ({_day_start(day)}) TO ({_day_start(day + timedelta(days=1))})"
+        ))
+        day += timedelta(days=1)
+
+
+async def _detach_pending(conn: AsyncConnection, name: str) -> bool | None:
+    """Whether partition name is mid-way through a concurrent detach; None if not attached."""
+    return (await conn.execute(text(
+        "SELECT i.inhdetachpending FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE c.relname = :name"
+    ), {"name": name})).scalar()
+
+
+async def _detach_partition(name: str):
+    """
+    DETACH PARTITION ... CONCURRENTLY, which cannot run inside a transaction:
+    the parent only takes SHARE UPDATE EXCLUSIVE, so inserts carry on. A
+    detach interrupted half-way (crash between its two transactions) is
+    completed with FINALIZE.
+    """
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        pending = await _detach_pending(conn, name)
+        if pending is None:
+            return
+        mode = "FINALIZE" if pending else "CONCURRENTLY"
+        await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} {mode}"))
+
+
+async def ensure_partitions():
+    """
+    Create partitions for today through the pre-make horizon (idempotent).
+
+    The overflow partition starts the day after the newest daily partition,
+    so new days are added by detaching it, creating them, moving any rows it
+    took for those days into them and re-attaching it after the new
+    horizon. Caller holds the partition lock.
+    """
+    today, horizon = _premake_range()
+    async with engine.connect() as conn:
+        partitions = await _list_partitions(conn)
+        overflow_pending = await _detach_pending(conn, OVERFLOW_PARTITION)
+    newest = max((d for p in partitions if (d := _partition_day(p)) is not None), default=None)
+    if overflow_pending is False and newest is not None and newest >= horizon:
+        return
+
+    await _detach_partition(OVERFLOW_PARTITION)
+    # After a stalled maintenance the gap since the newest partition is filled too
+    first = min(today, newest + timedelta(days=1)) if newest is not None else today
+    overflow_start = _day_start(horizon + timedelta(days=1))
+    async with engine.begin() as conn:
+        await _create_partitions(conn, first, horizon)
+        if await _table_exists(conn, OVERFLOW_PARTITION):
+            await conn.execute(text(
+                f"WITH moved AS (DELETE FROM {OVERFLOW_PARTITION} WHERE created_at < {overflow_start} RETURNING *) "
+                f"INSERT INTO {PARENT_TABLE} SELECT * FROM moved"
+            ))
+            await conn.execute(text(
+                f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {OVERFLOW_PARTITION} "
+                f"FOR VALUES FROM ({overflow_start}) TO (MAXVALUE)"
+            ))
+        else:
+            await conn.execute(text(
+                f"CREATE TABLE {OVERFLOW_PARTITION} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ({overflow_start}) TO (MAXVALUE)"
+            ))
+
+
+async def prepare_deduction_log():
+    """
+    Startup: create the schema and make sure stock_deduction_log is a
+    partitioned table with partitions ready to take inserts.
+
+    A database created before partitioning has a plain stock_deduction_log;
+    it is renamed out of the way, its rows copied into the partitioned table
+    and then dropped — once, by whichever worker gets the lock first.
+    """
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+        migrate = await _table_exists(conn, PARENT_TABLE) and not await _is_partitioned(conn)
+        if migrate:
+            logger.warning("Converting %s to a partitioned table", PARENT_TABLE)
+            await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}"))
+            await conn.execute(text(
+                f"ALTER TABLE {LEGACY_TABLE} RENAME CONSTRAINT {PARENT_TABLE}_pkey TO {LEGACY_TABLE}_pkey"
+            ))
+            await conn.execute(text(
+                f"ALTER INDEX IF EXISTS ix_{PARENT_TABLE}_order_id RENAME TO ix_{LEGACY_TABLE}_order_id"
+            ))
+
+        await conn.run_sync(Base.metadata.create_all)
+
+        if not await _list_partitions(conn):
+            # A new partitioned table (fresh, or just converted): lay out the
+            # days up to the horizon and the overflow after them
+            today, horizon = _premake_range()
+            first = today
+            if migrate:
+                oldest = (await conn.execute(text(f"SELECT MIN(created_at) FROM {LEGACY_TABLE}"))).scalar()
+                if oldest is not None:
+                    first = min(first, oldest.astimezone(timezone.utc).date())
+            await _create_partitions(conn, first, horizon)
+            await conn.execute(text(
+                f"CREATE TABLE {OVERFLOW_PARTITION} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ({_day_start(horizon + timedelta(days=1))}) TO (MAXVALUE)"
+            ))
+
+        if migrate:
+            await conn.execute(text(
+                f"INSERT INTO {PARENT_TABLE} (id, order_id, menu_item_id, quantity_deducted, student_id, created_at) "
+                f"SELECT id, order_id, menu_item_id, quantity_deducted, student_id, COALESCE(created_at, NOW()) "
+                f"FROM {LEGACY_TABLE}"
+            ))
+            await conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+
+    # An existing table may be days behind (service was down): catch up
+    async with _partition_lock(wait=True):
+        await ensure_partitions()
+
+
+async def _list_partitions(conn: AsyncConnection) -> list[str]:
+    return list((await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent ORDER BY c.relname"
+    ), {"parent": PARENT_TABLE})).scalars().all())
+
+
+async def _export_partition(name: str) -> str:
+    """Stream one partition to {ARCHIVE_DIR}/{name}.ndjson.gz; returns the path."""
+    os.makedirs(settings.STOCK_LOG_ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(settings.STOCK_LOG_ARCHIVE_DIR, f"{name}.ndjson.gz")
+    tmp_path = f"{path}.part"
+
+    rows = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as out:
+        async with engine.connect() as conn:
+            result = await conn.stream(
+                text(
+                    f"SELECT id, order_id, menu_item_id, quantity_deducted, student_id, created_at "
+                    f"FROM {name} ORDER BY created_at"
+                ).execution_options(yield_per=ARCHIVE_FETCH_SIZE)
+            )
+            async for chunk in result.partitions(ARCHIVE_FETCH_SIZE):
+                lines = "".join(
+                    json.dumps({
+                        "id": r.id, "order_id": r.order_id, "menu_item_id": r.menu_item_id,
+                        "quantity_deducted": r.quantity_deducted, "student_id": r.student_id,
+                        "created_at": r.created_at.isoformat(),
+                    }) + "\n"
+                    for r in chunk
+                )
+                await asyncio.to_thread(out.write, lines)
+                rows += len(chunk)
+
+    os.replace(tmp_path, path)
+    logger.info("Archived %d row(s) of %s to %s", rows, name, path)
+    return path
+
+
+async def archive_old_partitions() -> list[str]:
+    """
+    Export and drop every partition whose whole day is older than the
+    retention window. A partition is only dropped after its archive file is
+    complete, so a crash mid-export just repeats the export next time.
+    """
+    if settings.STOCK_LOG_RETENTION_DAYS <= 0:
+        return []
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=settings.STOCK_LOG_RETENTION_DAYS)
+
+    async with engine.connect() as conn:
+        partitions = await _list_partitions(conn)
+    expired = [p for p in partitions if (day := _partition_day(p)) is not None and day < cutoff]
+
+    archived = []
+    for name in expired:
+        await _export_partition(name)
+        await _detach_partition(name)
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        archived.append(name)
+    return archived
+
+
+@asynccontextmanager
+async def _partition_lock(wait: bool):
+    """
+    Session-level advisory lock for DDL that spans several transactions
+    (concurrent detaches cannot run inside one). Yields whether it was taken:
+    with wait=False it is skipped if another worker holds it.
+    """
+    async with engine.connect() as lock_conn:
+        if wait:
+            await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+        elif not (await lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": PARTITION_LOCK_KEY}
+        )).scalar():
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PARTITION_LOCK_KEY})
+            await lock_conn.commit()
+
+
+async def run_partition_maintenance() -> list[str]:
+    """
+    One maintenance pass: pre-create upcoming partitions, then archive
+    expired ones. Skipped (returns []) if another worker holds the lock.
+    """
+    async with _partition_lock(wait=False) as got_lock:
+        if not got_lock:
+            return []
+        await ensure_partitions()
+        return await archive_old_partitions()
@@ -0,0 +1,222 @@
+"""
+Stock Service — Two-phase stock reservations (reserve → confirm | release/expire)
+
+A reservation takes stock out of inventory.current_stock immediately, so the
+"available" number seen by the gateway cache never counts held units, but the
+deduction is only made permanent (stock_deduction_log) on confirm. Holds that
+are neither confirmed nor released within their TTL are expired in batches by
+the background sweeper and their quantity is returned.
+"""
+import uuid
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+
+from app.models.inventory import StockReservation, StockDeductionLog, ReservationStatus
+from app.db.stock_ops import return_stock
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ReservationStateError(Exception):
+    """Raised when a reservation cannot move to the requested state
+    (unknown order, already released/expired, or already confirmed)."""
+    pass
+
+
+async def reserve_items(
+    db: AsyncSession,
+    order_id: str,
+    student_id: str,
+    items: list[tuple[str, int]],
+    ttl_seconds: int,
+) -> list[dict]:
+    """
+    Hold stock for every (menu_item_id, quantity) of an order, all-or-nothing.
+
+    Each item is taken with a single conditional UPDATE
+    (``WHERE current_stock >= :qty``), so concurrent reservations cannot
+    oversell and no read-then-write retry loop is needed. version_id is still
+    bumped so optimistic /deduct callers notice the change.
+
+    Idempotent per order: if holds already exist for order_id they are
+    returned unchanged. That includes a concurrent reservation for the same
+    order winning the race: ours hits the (order_id, menu_item_id) unique
+    constraint on commit, is rolled back and the winner's holds are returned.
+    A menu item listed more than once is held once, for the summed quantity.
+    """
+    existing = await _existing_holds(db, order_id)
+    if existing:
+        return existing
+
+    quantities: dict[str, int] = {}
+    for menu_item_id, quantity in items:
+        quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+    held: list[dict] = []
+    for menu_item_id, quantity in quantities.items():
+        row = (await db.execute(
+            text(
+                "UPDATE inventory SET current_stock = current_stock - :qty, "
+                "version_id = version_id + 1, updated_at = NOW() "
+                "WHERE menu_item_id = :menu_item_id AND current_stock >= :qty "
+                "RETURNING current_stock, version_id"
+            ),
+            {"qty": quantity, "menu_item_id": menu_item_id},
+        )).fetchone()
+
+        if row is None:
+            await db.rollback()
+            available = (await db.execute(
+                text("SELECT current_stock FROM inventory WHERE menu_item_id = :menu_item_id"),
+                {"menu_item_id": menu_item_id},
+            )).scalar_one_or_none()
+            if available is None:
+                raise ValueError(f"Menu item '{menu_item_id}' not found in inventory.")
+            raise ValueError(
+                f"Insufficient stock for '{menu_item_id}': "
+                f"requested={quantity}, available={available}"
+            )
+
+        db.add(StockReservation(
+            id=str(uuid.uuid4()),
+            order_id=order_id,
+            menu_item_id=menu_item_id,
+            quantity=quantity,
+            student_id=student_id,
+            status=ReservationStatus.HELD.value,
+            expires_at=expires_at,
+        ))
+        held.append({
+            "menu_item_id": menu_item_id, "quantity": quantity,
+            "status": ReservationStatus.HELD.value, "expires_at": expires_at,
+            "remaining_stock": row[0], "version_id": row[1],
+        })
+
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()  # also returns the stock taken above
+        existing = await _existing_holds(db, order_id)
+        if not existing:
+            raise
+        logger.info("Concurrent reservation for order %s won the race; returning its holds", order_id)
+        return existing
+    return held
+
+
+async def _existing_holds(db: AsyncSession, order_id: str) -> list[dict]:
+    """The order's holds in reserve_items' shape (remaining_stock=None marks a replay)."""
+    existing = (await db.execute(
+        select(StockReservation).where(StockReservation.order_id == order_id)
+    )).scalars().all()
+    return [
+        {"menu_item_id": r.menu_item_id, "quantity": r.quantity,
+         "status": r.status, "expires_at": r.expires_at, "remaining_stock": None}
+        for r in existing
+    ]
+
+
+async def confirm_reservation(db: AsyncSession, order_id: str) -> list[dict]:
+    """
+    Turn all live holds of an order into permanent deductions.
+    Confirming an already-confirmed order is a no-op that returns [].
+    """
+    rows = (await db.execute(
+        text(
+            "UPDATE stock_reservations SET status = :confirmed "
+            "WHERE order_id = :order_id AND status = :held AND expires_at > NOW() "
+            "RETURNING menu_item_id, quantity, student_id"
+        ),
+        {"order_id": order_id, "confirmed": ReservationStatus.CONFIRMED.value,
+         "held": ReservationStatus.HELD.value},
+    )).fetchall()
+
+    if not rows:
+        await _raise_unless_status(db, order_id, ReservationStatus.CONFIRMED)
+        return []
+
+    for menu_item_id, quantity, student_id in rows:
+        db.add(StockDeductionLog(
+            id=str(uuid.uuid4()),
+            order_id=order_id,
+            menu_item_id=menu_item_id,
+            quantity_deducted=quantity,
+            student_id=student_id,
+        ))
+    await db.commit()
+    return [{"menu_item_id": m, "quantity": q} for m, q, _ in rows]
+
+
+async def release_reservation(db: AsyncSession, order_id: str) -> list[dict]:
+    """
+    Cancel all live holds of an order and return their stock.
+    Releasing an already-released order is a no-op that returns [].
+    """
+    rows = (await db.execute(
+        text(
+            "UPDATE stock_reservations SET status = :released "
+            "WHERE order_id = :order_id AND status = :held "
+            "RETURNING menu_item_id, quantity"
+        ),
+        {"order_id": order_id, "released": ReservationStatus.RELEASED.value,
+         "held": ReservationStatus.HELD.value},
+    )).fetchall()
+
+    if not rows:
+        await _raise_unless_status(db, order_id, ReservationStatus.RELEASED, ReservationStatus.EXPIRED)
+        return []
+
+    restored = await return_stock(db, rows)
+    await db.commit()
+    return restored
+
+
+async def expire_reservations(db: AsyncSession, batch_size: int) -> tuple[int, list[dict]]:
+    """
+    Expire up to batch_size overdue holds and return their stock in one
+    transaction. SKIP LOCKED lets every API worker run the sweeper safely.
+
+    Returns (number of holds expired, per-item stock changes).
+    """
+    rows = (await db.execute(
+        text(
+            "UPDATE stock_reservations SET status = :expired "
+            "WHERE id IN ("
+            "  SELECT id FROM stock_reservations "
+            "  WHERE status = :held AND expires_at <= NOW() "
+            "  ORDER BY expires_at LIMIT :batch FOR UPDATE SKIP LOCKED"
+            ") RETURNING menu_item_id, quantity"
+        ),
+        {"expired": ReservationStatus.EXPIRED.value, "held": ReservationStatus.HELD.value,
+         "batch": batch_size},
+    )).fetchall()
+
+    if not rows:
+        return 0, []
+
+    restored = await return_stock(db, rows)
+    await db.commit()
+    return len(rows), restored
+
+
+async def _raise_unless_status(db: AsyncSession, order_id: str, *accepted: ReservationStatus):
+    """Nothing was updated: decide whether that is an idempotent replay or an error."""
+    statuses = set((await db.execute(
+        select(StockReservation.status).where(StockReservation.order_id == order_id)
+    )).scalars().all())
+    await db.rollback()
+
+    if not statuses:
+        raise LookupError(f"No reservation found for order '{order_id}'.")
+    if statuses <= {s.value for s in accepted}:
+        return
+    raise ReservationStateError(
+        f"Reservation for order '{order_id}' is not in a valid state "
+        f"(status: {', '.join(sorted(statuses)).lower()}; held reservations past their TTL count as expired)."
+    )
@@ -3,11 +3,12 @@ Stock Service — Stock deduction logic with optimistic locking
 """
 import uuid
 import logging
+from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, text
 from app.core.optimistic_lock import StaleDataError
 
-from app.models.inventory import Inventory, StockDeductionLog
+from app.models.inventory import Inventory, StockDeductionLog, ReservationStatus
 from app.core.optimistic_lock import with_optimistic_retry
 from app.core.config import get_settings
 
@@ -86,3 +87,114 @@ async def deduct_inventory(
     inv.current_stock = new_stock
     inv.version_id = new_version
     return inv
+
+
+async def restock_inventory(db: AsyncSession, menu_item_id: str, quantity: int) -> tuple[int, int] | None:
+    """Add quantity to current_stock. Returns (current_stock, version_id), or None if unknown."""
+    row = (await db.execute(
+        text(
+            "UPDATE inventory SET current_stock = current_stock + :qty, "
+            "version_id = version_id + 1, updated_at = NOW() "
+            "WHERE menu_item_id = :menu_item_id "
+            "RETURNING current_stock, version_id"
+        ),
+        {"qty": quantity, "menu_item_id": menu_item_id},
+    )).fetchone()
+    await db.commit()
+    return (row[0], row[1]) if row else None
+
+
+async def reset_inventory(db: AsyncSession) -> list[tuple[str, int, int]]:
+    """
+    Restore current_stock to initial_stock for every item.
+
+    version_id keeps increasing (rather than going back to 1) so stream
+    consumers never mistake post-reset events for stale ones.
+    """
+    rows = (await db.execute(
+        text(
+            "UPDATE inventory SET current_stock = initial_stock, "
+            "version_id = version_id + 1, updated_at = NOW() "
+            "RETURNING menu_item_id, current_stock, version_id"
+        )
+    )).fetchall()
+    await db.commit()
+    return [(m, stock, version) for m, stock, version in rows]
+
+
+async def return_stock(db: AsyncSession, rows) -> list[dict]:
+    """
+    Add (menu_item_id, quantity) pairs back to inventory with one
+    UPDATE ... FROM unnest(). Quantities for the same item are summed first,
+    since UPDATE ... FROM applies at most one source row per target row.
+    Does not commit.
+    """
+    totals: dict[str, int] = defaultdict(int)
+    for menu_item_id, quantity in rows:
+        totals[menu_item_id] += quantity
+    if not totals:
+        return []
+
+    result = await db.execute(
+        text(
+            "UPDATE inventory AS inv SET current_stock = inv.current_stock + r.qty, "
+            "version_id = inv.version_id + 1, updated_at = NOW() "
+            "FROM unnest(CAST(:item_ids AS text[]), CAST(:qtys AS int[])) AS r(menu_item_id, qty) "
+            "WHERE inv.menu_item_id = r.menu_item_id "
+            "RETURNING inv.menu_item_id, inv.current_stock, inv.version_id"
+        ),
+        {"item_ids": list(totals), "qtys": list(totals.values())},
+    )
+    return [
+        {"menu_item_id": m, "quantity": totals[m], "remaining_stock": stock, "version_id": version}
+        for m, stock, version in result.fetchall()
+    ]
+
+
+async def restore_orders(db: AsyncSession, order_ids: list[str]) -> tuple[list[str], list[dict], list[dict]]:
+    """
+    Compensate failed orders: give back everything stock_deduction_log
+    recorded for them, plus any reservation holds still outstanding, in one
+    transaction.
+
+    Idempotent — an order is claimed in stock_restorations before its
+    deductions are reversed, and ON CONFLICT DO NOTHING skips orders that were
+    already restored. Orders with no deductions are not claimed, so a restore
+    that races ahead of the deduction can be repeated later.
+
+    Returns (restored order ids, inventory changes, released holds).
+    """
+    restored_ids = list((await db.execute(
+        text(
+            "INSERT INTO stock_restorations (order_id) "
+            "SELECT DISTINCT order_id FROM stock_deduction_log "
+            "WHERE order_id = ANY(CAST(:order_ids AS text[])) "
+            "ON CONFLICT (order_id) DO NOTHING "
+            "RETURNING order_id"
+        ),
+        {"order_ids": order_ids},
+    )).scalars().all())
+
+    deducted = []
+    if restored_ids:
+        deducted = (await db.execute(
+            text(
+                "SELECT menu_item_id, SUM(quantity_deducted)::int FROM stock_deduction_log "
+                "WHERE order_id = ANY(CAST(:order_ids AS text[])) GROUP BY menu_item_id"
+            ),
+            {"order_ids": restored_ids},
+        )).fetchall()
+
+    held = (await db.execute(
+        text(
+            "UPDATE stock_reservations SET status = :released "
+            "WHERE order_id = ANY(CAST(:order_ids AS text[])) AND status = :held "
+            "RETURNING menu_item_id, quantity"
+        ),
+        {"order_ids": order_ids, "released": ReservationStatus.RELEASED.value,
+         "held": ReservationStatus.HELD.value},
+    )).fetchall()
+
+    changes = await return_stock(db, [*deducted, *held])
+    await db.commit()
+    return restored_ids, changes, [{"menu_item_id": m, "quantity": q} for m, q in held]
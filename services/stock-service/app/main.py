@@ -1,6 +1,7 @@
 """
 Stock Service — FastAPI entrypoint
 """
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,17 +9,28 @@ from prometheus_fastapi_instrumentator import Instrumentator
 
 from app.core.config import get_settings
 from app.core.redis_client import close_redis
-from app.db.database import engine, Base
-from app.api import stock, health
+from app.core.reservation_sweeper import run_reservation_sweeper
+from app.core.log_maintenance import run_log_maintenance
+from app.db.database import engine
+from app.db.partitions import prepare_deduction_log
+from app.api import stock, export, health
 
 settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # create_all + partitioned stock_deduction_log setup
+    await prepare_deduction_log()
+
+    stop = asyncio.Event()
+    background = [
+        asyncio.create_task(run_reservation_sweeper(stop)),
+        asyncio.create_task(run_log_maintenance(stop)),
+    ]
     yield
+    stop.set()
+    await asyncio.gather(*background)
     await close_redis()
     await engine.dispose()
 
@@ -39,6 +51,7 @@ if settings.METRICS_ENABLED:
     Instrumentator().instrument(app).expose(app, endpoint="/metrics")
 
 app.include_router(stock.router)
+app.include_router(export.router)
 app.include_router(health.router)
 
 
@@ -1,12 +1,13 @@
 """
 Stock Service — Database models
 
-[TRANSACTIONAL DATA] stock_deduction_log — wiped on reset
+[TRANSACTIONAL DATA] stock_deduction_log, stock_reservations, stock_restorations — wiped on reset
 [CONFIG DATA]        inventory — preserved (initial quantities restored via seed)
 """
 import uuid
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, func, Text
+from enum import Enum as PyEnum
+from sqlalchemy import String, Integer, DateTime, func, Text, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.database import Base
 
@@ -48,12 +49,63 @@ class StockDeductionLog(Base):
     """
     [TRANSACTIONAL DATA] — Wiped on reset.
     Audit trail for every successful deduction.
+
+    Range-partitioned by created_at into daily partitions
+    (stock_deduction_log_pYYYYMMDD, see app/db/partitions.py) so the hot
+    partition and its order_id index stay small; partitions past the
+    retention window are archived and dropped. The partition key has to be
+    part of the primary key.
     """
     __tablename__ = "stock_deduction_log"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     order_id: Mapped[str] = mapped_column(String(36), index=True, nullable=False)
     menu_item_id: Mapped[str] = mapped_column(String(36), nullable=False)
     quantity_deducted: Mapped[int] = mapped_column(Integer, nullable=False)
     student_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
+
+
+class StockRestoration(Base):
+    """
+    [TRANSACTIONAL DATA] — Wiped on reset.
+    One row per order whose deductions were given back (compensation for a
+    failed order). The primary key makes POST /stock/restore idempotent.
+    """
+    __tablename__ = "stock_restorations"
+
+    order_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    restored_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class ReservationStatus(str, PyEnum):
+    HELD = "HELD"
+    CONFIRMED = "CONFIRMED"
+    RELEASED = "RELEASED"
+    EXPIRED = "EXPIRED"
+
+
+class StockReservation(Base):
+    """
+    [TRANSACTIONAL DATA] — Wiped on reset.
+    A TTL hold on stock for one item of an order. Held quantity is already
+    subtracted from inventory.current_stock; confirming turns the hold into a
+    deduction-log entry, releasing or expiring it returns the quantity.
+    """
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        UniqueConstraint("order_id", "menu_item_id", name="uq_stock_reservations_order_item"),
+        Index("ix_stock_reservations_status_expires_at", "status", "expires_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    order_id: Mapped[str] = mapped_column(String(36), index=True, nullable=False)
+    menu_item_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    student_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default=ReservationStatus.HELD.value)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
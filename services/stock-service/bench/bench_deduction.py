@@ -0,0 +1,131 @@
+"""
+Stock Service — Deduction benchmark: ORM path vs asyncpg fast path
+
+Runs the same synthetic order load through stock_ops.deduct_inventory (one
+ORM session per order, one optimistic-locked transaction per item — what
+/stock/deduct does by default) and fast_ops.deduct_order_fast, and reports
+throughput, latency and CPU time per order for each.
+
+Run inside the stock-service container (it uses the service's own settings):
+
+    docker compose exec stock-service python -m bench.bench_deduction --orders 5000 --concurrency 32
+
+Bench rows use the "bench-" prefix and are deleted afterwards; the real
+inventory is not touched. Redis is not involved — only the DB path is measured.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.db.database import AsyncSessionLocal, engine
+from app.db.fast_ops import deduct_order_fast
+from app.db.partitions import prepare_deduction_log
+from app.db.stock_ops import deduct_inventory
+
+BENCH_PREFIX = "bench-"
+
+
+async def _orm_order(order_id: str, items: list[tuple[str, int]]):
+    async with AsyncSessionLocal() as db:
+        for menu_item_id, quantity in items:
+            await deduct_inventory(
+                db=db, order_id=order_id, student_id="bench",
+                menu_item_id=menu_item_id, quantity=quantity,
+            )
+
+
+async def _fast_order(order_id: str, items: list[tuple[str, int]]):
+    await deduct_order_fast(order_id=order_id, student_id="bench", items=items)
+
+
+async def _seed(item_count: int):
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO inventory (id, menu_item_id, current_stock, initial_stock, version_id) "
+            "SELECT gen_random_uuid()::text, :prefix || 'item-' || g, 1000000000, 1000000000, 1 "
+            "FROM generate_series(1, :n) AS g "
+            "ON CONFLICT (menu_item_id) DO UPDATE SET current_stock = EXCLUDED.current_stock"
+        ), {"prefix": BENCH_PREFIX, "n": item_count})
+
+
+async def _cleanup():
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM stock_deduction_log WHERE student_id = 'bench'"))
+        await conn.execute(text("DELETE FROM inventory WHERE menu_item_id LIKE :p"), {"p": f"{BENCH_PREFIX}%"})
+
+
+async def _run(name: str, deduct, orders: list[list[tuple[str, int]]], concurrency: int) -> dict:
+    queue = list(enumerate(orders))
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            n, items = queue.pop()
+            started = time.perf_counter()
+            try:
+                await deduct(f"{BENCH_PREFIX}{name}-{n}-{uuid.uuid4().hex[:8]}", items)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "path": name,
+        "orders/s": len(orders) / wall,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "cpu µs/order": cpu / len(orders) * 1_000_000,
+        "errors": errors,
+    }
+
+
+async def main(args):
+    await prepare_deduction_log()
+    await _seed(args.items)
+    rng = random.Random(args.seed)
+    item_ids = [f"{BENCH_PREFIX}item-{i}" for i in range(1, args.items + 1)]
+    orders = [
+        [(m, rng.randint(1, 3)) for m in rng.sample(item_ids, args.items_per_order)]
+        for _ in range(args.orders)
+    ]
+
+    try:
+        # Warm both paths (pool connections, prepared statements) before measuring
+        warmup = orders[: args.concurrency]
+        await _run("orm", _orm_order, warmup, args.concurrency)
+        await _run("fast", _fast_order, warmup, args.concurrency)
+
+        results = [
+            await _run("orm", _orm_order, orders, args.concurrency),
+            await _run("fast", _fast_order, orders, args.concurrency),
+        ]
+    finally:
+        await _cleanup()
+        await engine.dispose()
+
+    print(f"{args.orders} orders × {args.items_per_order} item(s), {args.items} items, concurrency {args.concurrency}")
+    header = list(results[0])
+    print("  ".join(f"{h:>14}" for h in header))
+    for r in results:
+        print("  ".join(f"{v:>14.1f}" if isinstance(v, float) else f"{v:>14}" for v in r.values()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--items", type=int, default=50, help="distinct bench menu items")
+    parser.add_argument("--items-per-order", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""
+Stock Service — Deduction export tests
+
+GET /stock/export/deductions streams every deduction in the range in
+created_at order, as NDJSON or as CSV behind a header line; an empty range
+is an empty body (NDJSON) or just the header (CSV).
+"""
+import csv
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.export import DEDUCTION_EXPORT_COLUMNS, export_deductions
+from app.core import export
+from conftest import DEDUCTION_COUNT
+
+
+async def _body(start, end, fmt) -> str:
+    response = await export_deductions(start=start, end=end, format=fmt)
+    return "".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.mark.asyncio
+async def test_export_streams_the_range_as_ndjson_and_csv(engine, deductions, monkeypatch):
+    student_id = deductions
+    monkeypatch.setattr(export, "engine", engine)
+    monkeypatch.setattr(export.settings, "EXPORT_FETCH_SIZE", 7)  # several chunks
+    now = datetime.now(timezone.utc)
+    start, end = now - timedelta(minutes=5), now + timedelta(minutes=5)
+
+    lines = [json.loads(line) for line in (await _body(start, end, "ndjson")).splitlines()]
+    ours = [r for r in lines if r["student_id"] == student_id]
+    assert len(ours) == DEDUCTION_COUNT
+    assert sorted(r["quantity_deducted"] for r in ours) == list(range(1, DEDUCTION_COUNT + 1))
+    created = [r["created_at"] for r in lines]
+    assert created == sorted(created)
+
+    header, *rows = csv.reader((await _body(start, end, "csv")).splitlines())
+    assert header == DEDUCTION_EXPORT_COLUMNS
+    ours_csv = [dict(zip(header, row)) for row in rows if row[header.index("student_id")] == student_id]
+    assert {r["id"] for r in ours_csv} == {r["id"] for r in ours}
+
+
+@pytest.mark.asyncio
+async def test_empty_range_is_empty_or_header_only(engine, deductions, monkeypatch):
+    monkeypatch.setattr(export, "engine", engine)
+    later = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+    assert await _body(later, later + timedelta(minutes=5), "ndjson") == ""
+    assert (await _body(later, later + timedelta(minutes=5), "csv")).splitlines() == [",".join(DEDUCTION_EXPORT_COLUMNS)]
+
+
+@pytest.mark.asyncio
+async def test_end_must_be_after_start():
+    now = datetime.now(timezone.utc)
+    with pytest.raises(HTTPException) as exc:
+        await export_deductions(start=now, end=now, format="ndjson")
+    assert exc.value.status_code == 400
@@ -0,0 +1,59 @@
+"""
+Stock Service — Deduction log partition tests
+
+stock_deduction_log is range-partitioned by UTC day, with the partitions up
+to the pre-make horizon already in place and the overflow partition after them.
+"""
+import uuid
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.db import partitions
+
+
+async def _bounds(engine) -> dict[str, str]:
+    async with engine.connect() as conn:
+        return dict((await conn.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ), {"parent": partitions.PARENT_TABLE})).fetchall())
+
+
+@pytest.mark.asyncio
+async def test_upcoming_days_and_overflow_are_partitioned(engine):
+    await partitions.ensure_partitions()
+    bounds = await _bounds(engine)
+
+    today, horizon = partitions._premake_range()
+    day = today
+    while day <= horizon:
+        assert partitions._partition_name(day) in bounds, sorted(bounds)
+        day += timedelta(days=1)
+    assert bounds[partitions.OVERFLOW_PARTITION].endswith("(MAXVALUE)")
+
+
+@pytest.mark.asyncio
+async def test_day_partitions_follow_utc_midnight(engine):
+    today, _ = partitions._premake_range()
+    midnight = datetime.combine(today, time(), timezone.utc)
+    async with engine.connect() as conn:
+        await conn.execute(text("SET TimeZone = 'Asia/Dhaka'"))  # bounds must not depend on it
+        landed = [
+            (await conn.execute(text(
+                f"INSERT INTO {partitions.PARENT_TABLE} "
+                "(id, order_id, menu_item_id, quantity_deducted, student_id, created_at) "
+                "VALUES (:id, :id, 'ITEM-0', 1, 'PARTITION-TESTER', :at) RETURNING tableoid::regclass::text"
+            ), {"id": str(uuid.uuid4()), "at": at})).scalar_one()
+            for at in (midnight, midnight + timedelta(days=1, seconds=-1), midnight + timedelta(days=1))
+        ]
+        await conn.rollback()
+
+    assert landed == [
+        partitions._partition_name(today),
+        partitions._partition_name(today),
+        partitions._partition_name(today + timedelta(days=1)),
+    ]
@@ -0,0 +1,64 @@
+"""
+Stock Service — Two-phase reservation tests
+
+Reserving takes stock out of inventory at once, a replayed or concurrent
+reserve for the same order holds only once, a repeated item is held once for
+its summed quantity, and releasing returns the stock.
+"""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.reservation_ops import (
+    ReservationStateError, confirm_reservation, release_reservation, reserve_items,
+)
+from conftest import INITIAL_STOCK, current_stock
+
+TTL_SECONDS = 60
+
+
+async def _reserve(engine, order_id: str, items: list[tuple[str, int]]) -> list[dict]:
+    async with AsyncSession(engine) as db:
+        return await reserve_items(db, order_id, "RESERVATION-TESTER", items, TTL_SECONDS)
+
+
+@pytest.mark.asyncio
+async def test_reserve_holds_once_and_release_returns_stock(engine, menu_item):
+    order_id = str(uuid.uuid4())
+
+    held = await _reserve(engine, order_id, [(menu_item, 2)])
+    assert held[0]["remaining_stock"] == INITIAL_STOCK - 2
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK - 2
+
+    replayed = await _reserve(engine, order_id, [(menu_item, 2)])
+    assert replayed[0]["remaining_stock"] is None
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK - 2, "A replayed reserve must not hold twice"
+
+    async with AsyncSession(engine) as db:
+        await release_reservation(db, order_id)
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK
+
+    async with AsyncSession(engine) as db:
+        with pytest.raises(ReservationStateError):
+            await confirm_reservation(db, order_id)
+
+
+@pytest.mark.asyncio
+async def test_repeated_item_is_held_once_for_the_summed_quantity(engine, menu_item):
+    held = await _reserve(engine, str(uuid.uuid4()), [(menu_item, 1), (menu_item, 2)])
+
+    assert [(h["menu_item_id"], h["quantity"]) for h in held] == [(menu_item, 3)]
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK - 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reserves_for_one_order_hold_once(engine, menu_item):
+    order_id = str(uuid.uuid4())
+
+    results = await asyncio.gather(*(_reserve(engine, order_id, [(menu_item, 2)]) for _ in range(2)))
+
+    assert all(r[0]["quantity"] == 2 for r in results)
+    # The loser's rollback returned the stock it had taken
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK - 2
@@ -0,0 +1,33 @@
+"""
+Stock Service — Compensation tests
+
+restore_orders gives back what was deducted for the listed orders, and
+restoring the same orders again changes nothing.
+"""
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.stock_ops import deduct_inventory, restore_orders
+from conftest import INITIAL_STOCK, current_stock
+
+
+@pytest.mark.asyncio
+async def test_restore_returns_deducted_stock_once(engine, menu_item):
+    order_ids = [str(uuid.uuid4()) for _ in range(3)]
+    for order_id in order_ids:
+        async with AsyncSession(engine) as db:
+            await deduct_inventory(db, order_id, "RESTORE-TESTER", menu_item, 2)
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK - 6
+
+    async with AsyncSession(engine) as db:
+        restored, changes, _ = await restore_orders(db, order_ids[:2])
+    assert sorted(restored) == sorted(order_ids[:2])
+    assert [(c["menu_item_id"], c["quantity"]) for c in changes] == [(menu_item, 4)]
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK - 2
+
+    async with AsyncSession(engine) as db:
+        restored, changes, _ = await restore_orders(db, order_ids[:2])
+    assert restored == [] and changes == []
+    assert await current_stock(engine, menu_item) == INITIAL_STOCK - 2, "Restoring twice must not give stock back twice"
@@ -7,8 +7,16 @@ Tests:
   3. Idempotency key deduplication
   4. Stock Service optimistic locking (concurrent deductions don't oversell)
   5. Identity Provider rate limiting (429 after 3 attempts)
+  6. Health endpoints
+  7. Kitchen Queue outbox (a queued order is dispatched to the worker)
+  8. Kitchen board live feed (snapshot, then inserts; resume via Last-Event-ID)
+  9. Kitchen order counters (/kitchen/stats follows new orders without a DB scan)
+ 10. Kitchen wait-time estimate (capacity model ETA on queue and /kitchen/eta)
+ 11. Kitchen dead letters (listing filters, replay skips unknown entries)
+ 12. Kitchen status history (a processed order's transitions and stage percentiles)
 """
 import asyncio
+import json
 import uuid
 import pytest
 import pytest_asyncio
@@ -19,6 +27,7 @@ import redis.asyncio as aioredis
 IDENTITY_URL = "http://localhost:8001"
 GATEWAY_URL = "http://localhost:8002"
 STOCK_URL = "http://localhost:8003"
+KITCHEN_URL = "http://localhost:8004"
 NOTIFICATION_URL = "http://localhost:8005"
 REDIS_URL = "redis://localhost:6379"
 
@@ -270,3 +279,196 @@ async def test_all_health_endpoints_return_200(url):
     body = r.json()
     assert "status" in body
     assert body["status"] == "healthy"
+
+
+# ─── Test 7: Kitchen Dispatch Outbox ────────────────────────────────────────────
+@pytest.mark.asyncio
+async def test_queued_order_is_dispatched_to_worker():
+    """
+    POST /kitchen/queue only commits the order + outbox row; the relay must
+    then hand it to the Celery worker, which moves it out of PENDING.
+    """
+    order_id = str(uuid.uuid4())
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        try:
+            r = await client.post(
+                f"{KITCHEN_URL}/kitchen/queue",
+                json={
+                    "order_id": order_id,
+                    "student_id": "OUTBOX-TESTER",
+                    "items": [{"menu_item_id": "OUTBOX-TEST-ITEM", "quantity": 1}],
+                },
+            )
+        except httpx.ConnectError:
+            pytest.skip("Kitchen Queue not reachable from test environment")
+        assert r.status_code == 202, r.text
+
+        status = "pending"
+        for _ in range(50):
+            status = (await client.get(f"{KITCHEN_URL}/kitchen/orders/{order_id}")).json()["status"]
+            if status != "pending":
+                break
+            await asyncio.sleep(0.2)
+    assert status != "pending", "Order was never dispatched from the outbox"
+
+
+# ─── Test 8: Kitchen Board Live Feed ────────────────────────────────────────────
+async def _read_sse_events(response: httpx.Response, count: int) -> list[dict]:
+    """Collect the next `count` SSE events (comments/keepalives skipped)."""
+    events, current = [], {}
+    async for line in response.aiter_lines():
+        if not line:
+            if "event" in current:
+                events.append(current)
+                if len(events) == count:
+                    return events
+            current = {}
+        elif not line.startswith(":") and ":" in line:
+            field, _, value = line.partition(":")
+            current[field] = value.strip()
+    return events
+
+
+@pytest.mark.asyncio
+async def test_board_stream_sends_snapshot_then_inserts():
+    """
+    The board feed opens with a snapshot, then pushes a newly queued order;
+    reconnecting with Last-Event-ID replays only what came after it.
+    """
+    order_id = str(uuid.uuid4())
+    async with httpx.AsyncClient(timeout=15.0) as client:
+        try:
+            async with client.stream("GET", f"{KITCHEN_URL}/kitchen/board/stream") as r:
+                assert r.status_code == 200
+                [snapshot] = await _read_sse_events(r, 1)
+                assert snapshot["event"] == "snapshot"
+                assert "orders" in json.loads(snapshot["data"])
+
+                await client.post(
+                    f"{KITCHEN_URL}/kitchen/queue",
+                    json={
+                        "order_id": order_id,
+                        "student_id": "BOARD-TESTER",
+                        "items": [{"menu_item_id": "BOARD-TEST-ITEM", "quantity": 1}],
+                    },
+                )
+                [inserted] = await asyncio.wait_for(_read_sse_events(r, 1), timeout=10)
+        except httpx.ConnectError:
+            pytest.skip("Kitchen Queue not reachable from test environment")
+
+        assert inserted["event"] == "order_inserted"
+        assert json.loads(inserted["data"])["order_id"] == order_id
+
+        if snapshot["id"] == "0-0":
+            return  # the feed was empty when we connected: nothing to resume from
+        # Resuming from the snapshot's id replays the insert, not a new snapshot
+        async with client.stream(
+            "GET", f"{KITCHEN_URL}/kitchen/board/stream", headers={"Last-Event-ID": snapshot["id"]},
+        ) as r:
+            [replayed] = await asyncio.wait_for(_read_sse_events(r, 1), timeout=10)
+        assert replayed["event"] != "snapshot"
+
+
+# ─── Test 9: Kitchen Order Counters ─────────────────────────────────────────────
+@pytest.mark.asyncio
+async def test_kitchen_stats_count_new_orders():
+    """A queued order adds one to the status totals and shows up in this minute's creations."""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        try:
+            before = (await client.get(f"{KITCHEN_URL}/kitchen/stats")).json()
+        except httpx.ConnectError:
+            pytest.skip("Kitchen Queue not reachable from test environment")
+
+        r = await client.post(
+            f"{KITCHEN_URL}/kitchen/queue",
+            json={
+                "order_id": str(uuid.uuid4()),
+                "student_id": "STATS-TESTER",
+                "items": [{"menu_item_id": "STATS-TEST-ITEM", "quantity": 1}],
+            },
+        )
+        assert r.status_code == 202, r.text
+        after = (await client.get(f"{KITCHEN_URL}/kitchen/stats")).json()
+
+    # The worker may already have moved it on, so compare totals, not "pending"
+    assert sum(after["status_counts"].values()) == sum(before["status_counts"].values()) + 1
+    # Created this minute (or the last one, if the clock just rolled over)
+    assert sum(m["created"] for m in after["per_minute"][-2:]) >= 1
+
+
+# ─── Test 10: Kitchen Wait-Time Estimate ────────────────────────────────────────
+@pytest.mark.asyncio
+async def test_kitchen_eta_from_capacity_model():
+    """Queued orders get an ETA of at least one item's prep time; /kitchen/eta lists every station."""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        try:
+            eta = (await client.get(f"{KITCHEN_URL}/kitchen/eta")).json()
+        except httpx.ConnectError:
+            pytest.skip("Kitchen Queue not reachable from test environment")
+
+        r = await client.post(
+            f"{KITCHEN_URL}/kitchen/queue",
+            json={
+                "order_id": str(uuid.uuid4()),
+                "student_id": "ETA-TESTER",
+                "items": [{"menu_item_id": "ETA-TEST-ITEM", "quantity": 2}],
+            },
+        )
+        assert r.status_code == 202, r.text
+
+    assert eta["stations"]
+    assert all(s["slots"] >= 1 and s["wait_seconds"] >= 0 for s in eta["stations"].values())
+    assert eta["estimated_wait_seconds"] > 0
+    assert r.json()["estimated_wait_seconds"] > 0
+
+
+# ─── Test 11: Kitchen Dead Letters ──────────────────────────────────────────────
+@pytest.mark.asyncio
+async def test_kitchen_dead_letters_list_and_replay():
+    """The dead-letter listing filters by order; replaying unknown ids sends nothing."""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        try:
+            r = await client.get(f"{KITCHEN_URL}/kitchen/dead-letters", params={"order_id": str(uuid.uuid4())})
+        except httpx.ConnectError:
+            pytest.skip("Kitchen Queue not reachable from test environment")
+        assert r.status_code == 200, r.text
+        assert r.json() == []
+
+        r = await client.post(f"{KITCHEN_URL}/kitchen/dead-letters/replay", json={"ids": ["1-0"]})
+        assert r.status_code == 200, r.text
+        assert r.json() == {"replayed": [], "skipped": []}
+
+
+# ─── Test 12: Kitchen Status History ────────────────────────────────────────────
+@pytest.mark.asyncio
+async def test_kitchen_status_history_and_stage_percentiles():
+    """A processed order has a history starting at PENDING; stage stats report every stage."""
+    order_id = str(uuid.uuid4())
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        try:
+            r = await client.post(
+                f"{KITCHEN_URL}/kitchen/queue",
+                json={
+                    "order_id": order_id,
+                    "student_id": "HISTORY-TESTER",
+                    "items": [{"menu_item_id": "HISTORY-TEST-ITEM", "quantity": 1}],
+                },
+            )
+        except httpx.ConnectError:
+            pytest.skip("Kitchen Queue not reachable from test environment")
+        assert r.status_code == 202, r.text
+
+        history = None
+        for _ in range(20):  # the worker picks it up within a few seconds
+            await asyncio.sleep(0.5)
+            r = await client.get(f"{KITCHEN_URL}/kitchen/orders/{order_id}/history")
+            if r.status_code == 200:
+                history = r.json()
+                break
+        stages = (await client.get(f"{KITCHEN_URL}/kitchen/stats/stages", params={"window_minutes": 5})).json()
+
+    assert history, "order never left PENDING"
+    assert history[0]["from_status"] == "pending"
+    assert all(h["seconds_in_state"] >= 0 for h in history)
+    assert set(stages["stages"]) == {"pending", "stock_verified", "in_kitchen"}
+    assert stages["stages"]["pending"]["count"] >= 1